@@ -1,76 +1,95 @@
-import os
-import json
-import requests
-import random
-import string
+import asyncio
 import base64
-from dotenv import load_dotenv
+from core.github import github
+from agents.devops.repo_pool import repo_pool, unique_repo_name, CLAIMED_DESCRIPTION
+from agents.manager.plan import Plan
+from core.webhooks import GITHUB_WEBHOOK_SECRET, WEBHOOK_URL
 
-load_dotenv()
-
-# --- CONFIG ---
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GITHUB_API_URL = "https://api.github.com"
-HEADERS = {
-    "Authorization": f"token {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3+json"
-}
-
-def create_repo(repo_name):
-    rand_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
-    unique_name = f"{repo_name}-{rand_suffix}"
+async def create_repo(repo_name):
     payload = {
-        "name": unique_name,
-        "description": "Shadow Workplace Simulation.",
+        "name": unique_repo_name(repo_name),
+        "description": CLAIMED_DESCRIPTION,
         "private": False,
-        "auto_init": True 
+        "auto_init": True
     }
     try:
-        response = requests.post(f"{GITHUB_API_URL}/user/repos", json=payload, headers=HEADERS)
+        response = await github.post("/user/repos", json=payload)
         return response.json() if response.status_code == 201 else None
     except: return None
 
-def create_file(owner, repo, filepath, content):
-    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{filepath}"
+async def create_file(owner, repo, filepath, content):
+    url = f"/repos/{owner}/{repo}/contents/{filepath}"
     b64_content = base64.b64encode(content.encode("utf-8")).decode("utf-8")
     payload = {"message": f"DevOps: Setup {filepath}", "content": b64_content}
     try:
-        get_resp = requests.get(url, headers=HEADERS)
+        get_resp = await github.get(url)
         if get_resp.status_code == 200: payload["sha"] = get_resp.json().get("sha")
-        requests.put(url, json=payload, headers=HEADERS)
+        await github.put(url, json=payload)
     except Exception as e: print(f"⚠️ File Error: {e}")
 
-def create_issue(owner, repo, title, body):
-    requests.post(f"{GITHUB_API_URL}/repos/{owner}/{repo}/issues", json={"title": title, "body": body}, headers=HEADERS)
+async def _head_commit(owner, repo, branch, attempts=5):
+    """(commit sha, tree sha) of the branch head. A just-created repo can 409/404 for a moment."""
+    for attempt in range(attempts):
+        resp = await github.get(f"/repos/{owner}/{repo}/commits/{branch}")
+        if resp.status_code == 200:
+            data = resp.json()
+            return data["sha"], data["commit"]["tree"]["sha"]
+        if resp.status_code not in (404, 409): break
+        await asyncio.sleep(0.5 * (attempt + 1))
+    return None, None
 
-def devops_node(state):
-    print("--- DEVOPS AGENT STARTED ---")
-    manager_output = state["messages"][-1]
-    
+async def commit_files(owner, repo, branch, files, message):
+    """
+    Writes all files as ONE commit on top of the branch head via the Git Data API:
+    head -> tree (blobs inlined as content) -> commit -> ref update.
+    4 calls regardless of how many files. Returns True on success.
+    """
     try:
-        clean_json = manager_output.replace("```json", "").replace("```", "").strip()
-        plan = json.loads(clean_json)
-        
-        base_name = plan.get("project_name", "shadow-project")
-        tickets = plan.get("tickets", [])
-        starter_files = plan.get("starter_files", []) 
-        
-        repo_data = create_repo(base_name)
-        if not repo_data: return {"messages": ["❌ Error: Failed to create GitHub repository."]}
+        parent_sha, base_tree = await _head_commit(owner, repo, branch)
+        if not parent_sha: return False
 
-        full_repo_name = repo_data['name']
-        owner = repo_data['owner']['login']
-        repo_url = repo_data['html_url']
-        
-        print(f"🏗️ Repo Created: {repo_url}")
-        
-        # 1. Create Starter Files
-        for file in starter_files:
-            create_file(owner, full_repo_name, file['name'], file['content'])
+        tree_resp = await github.post(f"/repos/{owner}/{repo}/git/trees", json={
+            "base_tree": base_tree,
+            "tree": [{"path": path, "mode": "100644", "type": "blob", "content": content} for path, content in files.items()]
+        })
+        if tree_resp.status_code != 201: return False
+
+        commit_resp = await github.post(f"/repos/{owner}/{repo}/git/commits", json={
+            "message": message, "tree": tree_resp.json()["sha"], "parents": [parent_sha]
+        })
+        if commit_resp.status_code != 201: return False
+
+        ref_resp = await github.patch(f"/repos/{owner}/{repo}/git/refs/heads/{branch}", json={"sha": commit_resp.json()["sha"]})
+        return ref_resp.status_code == 200
+    except Exception as e:
+        print(f"⚠️ Bulk Commit Error: {e}")
+        return False
+
+async def create_push_hook(owner, repo):
+    """Subscribes the repo's pushes to POST /github/webhook so reviews are ready before Submit. Never raises."""
+    try:
+        resp = await github.post(f"/repos/{owner}/{repo}/hooks", json={
+            "name": "web", "active": True, "events": ["push"],
+            "config": {"url": WEBHOOK_URL, "content_type": "json", "secret": GITHUB_WEBHOOK_SECRET, "insecure_ssl": "0"}
+        })
+        # 422: a resumed run already installed it
+        if resp.status_code not in (201, 422): print(f"⚠️ Push hook failed: {resp.status_code}")
+    except Exception as e: print(f"⚠️ Push hook failed: {e}")
+
+async def create_issue(owner, repo, title, body):
+    """Result dict for one ticket: number/url on success, error otherwise. Never raises."""
+    try:
+        resp = await github.post(f"/repos/{owner}/{repo}/issues", json={"title": title, "body": body})
+        if resp.status_code == 201:
+            issue = resp.json()
+            return {"ok": True, "number": issue["number"], "url": issue["html_url"], "error": None}
+        return {"ok": False, "number": None, "url": None, "error": f"HTTP {resp.status_code}: {resp.text[:200]}"}
+    except Exception as e:
+        return {"ok": False, "number": None, "url": None, "error": str(e)}
 
-        # 2. GENERATE BEAUTIFUL README
-        # We use a clear, modern layout with emojis and tables/lists.
-        readme_content = f"""# 🚀 Project: {base_name.replace('-', ' ').title()}
+def build_readme(base_name, tickets, starter_files):
+    # We use a clear, modern layout with emojis and tables/lists.
+    readme_content = f"""# 🚀 Project: {base_name.replace('-', ' ').title()}
 
 ![Status](https://img.shields.io/badge/Status-Active_Simulation-success)
 ![Role](https://img.shields.io/badge/Role-Junior_Developer-blue)
@@ -83,30 +102,30 @@ The environment has been pre-configured with the necessary starter files.
 | File | Description |
 |------|-------------|
 """
-        if starter_files:
-            for f in starter_files:
-                readme_content += f"| `{f['name']}` | Pre-loaded starter code |\n"
-        else:
-            readme_content += "| *None* | Greenfield Project |\n"
+    if starter_files:
+        for f in starter_files:
+            readme_content += f"| `{f['name']}` | Pre-loaded starter code |\n"
+    else:
+        readme_content += "| *None* | Greenfield Project |\n"
 
-        readme_content += """
+    readme_content += """
 
 ---
 
 ## 🎟️ Your Assignment Checklist
 Please complete the tickets in order.
 """
-        
-        # Loop through tickets and format them as clear sections
-        for t in tickets:
-            readme_content += f"""
+
+    # Loop through tickets and format them as clear sections
+    for t in tickets:
+        readme_content += f"""
 ### ⬜ Ticket #{t['id']}: {t['title']}
 {t['body']}
 
 <br>
 """
 
-        readme_content += """
+    readme_content += """
 ---
 
 ## 🚀 Submission Guide
@@ -117,14 +136,211 @@ Please complete the tickets in order.
 
 *Generated by Shadow Workplace AI*
 """
-        
-        create_file(owner, full_repo_name, "README.md", readme_content)
+    return readme_content
+
+async def list_issues(owner, repo):
+    """Title -> issue for the repo's issues (pull requests excluded). Empty on error."""
+    try:
+        resp = await github.get(f"/repos/{owner}/{repo}/issues", params={"state": "all", "per_page": 100})
+        if resp.status_code != 200: return {}
+        return {i["title"]: i for i in resp.json() if "pull_request" not in i}
+    except Exception as e:
+        print(f"⚠️ Issue Listing Error: {e}")
+        return {}
+
+# --- PIPELINED PROVISIONING ---
+# Provisioners started while the manager was still planning, by provisioning_id
+IN_FLIGHT = {}
+
+async def _provision_repo(base_name):
+    """Claim a warm repo from the pool; create one from scratch only on a miss."""
+    try:
+        repo_data = await repo_pool.claim(base_name)
+    except Exception as e:
+        # A pool failure is just a miss
+        print(f"⚠️ Repo pool error: {e}")
+        repo_data = None
+    repo_data = repo_data or await create_repo(base_name)
+    if repo_data: print(f"🏗️ Repo Created: {repo_data['html_url']}")
+    return repo_data
+
+def _done(value):
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(value)
+    return future
+
+def _repo_ref(repo_data):
+    """The part of the repo JSON later steps need; small enough to checkpoint."""
+    return {
+        "name": repo_data['name'],
+        "owner": {"login": repo_data['owner']['login']},
+        "html_url": repo_data['html_url'],
+        "default_branch": repo_data.get('default_branch', 'main')
+    }
+
+class Provisioner:
+    """
+    Builds the workspace while the plan is still streaming (see core/pipeline.py):
+    the repo is claimed as soon as the project name is known and every ticket is
+    opened as an issue as soon as it is complete. Starter files wait for finish(),
+    because they go into one commit together with the README, which needs every ticket.
+    """
+
+    def __init__(self, repo=None):
+        # Awaited by issues that stream in before the project name; start() resolves it
+        self.repo = asyncio.get_running_loop().create_future()
+        self._provisioning = None
+        # A repo that already exists (e.g. from the checkpoint of an earlier attempt)
+        if repo: self.repo.set_result(repo)
+        self.issues = []
+        self.starter_files = []
+        self._opened = set()
+        self._last_issue = None
 
-        # 3. Create Issues (Metadata)
+    def on_item(self, kind, value):
+        if kind == "project_name": self.start(value)
+        elif kind == "ticket": self.open_issue(value)
+        elif kind == "starter_file": self.starter_files.append(value)
+
+    def start(self, base_name):
+        if self.repo.done() or self._provisioning: return
+        self._provisioning = asyncio.create_task(_provision_repo(base_name))
+        self._provisioning.add_done_callback(self._resolve_repo)
+
+    def _resolve_repo(self, task):
+        if self.repo.done(): return
+        if task.cancelled(): self.repo.cancel()
+        elif task.exception(): self.repo.set_exception(task.exception())
+        else: self.repo.set_result(task.result())
+
+    def open_issue(self, ticket):
+        key = (ticket.id, ticket.title)
+        if key in self._opened: return
+        self._opened.add(key)
+        # GitHub numbers issues as the POSTs arrive, so a repo's issues are created one
+        # after another; different repos (provisioners) still create theirs concurrently
+        self._last_issue = asyncio.create_task(self._issue(ticket, self._last_issue))
+        self.issues.append(self._last_issue)
+
+    async def _issue(self, ticket, previous):
+        repo_data = await self.repo
+        # asyncio.wait never raises: a failed or cancelled predecessor doesn't stop this one
+        if previous is not None: await asyncio.wait({previous})
+        if not repo_data:
+            result = {"ok": False, "number": None, "url": None, "error": "No repository"}
+        else:
+            result = await create_issue(repo_data['owner']['login'], repo_data['name'], ticket.title, ticket.body)
+            if not result["ok"]: print(f"⚠️ Issue for ticket {ticket.id} failed: {result['error']}")
+        return {"ticket_id": ticket.id, "title": ticket.title, **result}
+
+    async def started_repo(self):
+        """The repo claimed while the plan streamed, as a checkpointable ref; None if none was."""
+        if not (self.repo.done() or self._provisioning): return None
+        repo_data = await self.repo
+        return _repo_ref(repo_data) if repo_data else None
+
+    async def skip_existing(self, tickets):
+        """For a resumed run: tickets an earlier attempt already opened are reported, not opened twice."""
+        repo_data = await self.repo
+        existing = await list_issues(repo_data['owner']['login'], repo_data['name'])
         for ticket in tickets:
-            create_issue(owner, full_repo_name, ticket['title'], ticket['body'])
-            
-        return {"messages": [f"✅ SUCCESS: Workspace ready at {repo_url}"]}
-            
+            issue = existing.get(ticket.title)
+            if not issue or (ticket.id, ticket.title) in self._opened: continue
+            self._opened.add((ticket.id, ticket.title))
+            self.issues.append(_done({
+                "ticket_id": ticket.id, "title": ticket.title,
+                "ok": True, "number": issue["number"], "url": issue["html_url"], "error": None
+            }))
+
+    async def cancel(self):
+        tasks = [self.repo] + ([self._provisioning] if self._provisioning else []) + self.issues
+        for task in tasks: task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def finish(self, plan):
+        """Starts whatever the stream didn't, commits files + README, and waits for the issues."""
+        self.start(plan.project_name)
+        for ticket in plan.tickets: self.open_issue(ticket)
+
+        repo_data = await self.repo
+        if not repo_data:
+            await asyncio.gather(*self.issues)
+            raise RuntimeError("Failed to create GitHub repository.")
+
+        full_repo_name = repo_data['name']
+        owner = repo_data['owner']['login']
+        repo_url = repo_data['html_url']
+
+        # 1. Starter Files + GENERATED README in a single commit
+        starter_files = [f.model_dump() for f in plan.starter_files]
+        tickets = [t.model_dump() for t in plan.tickets]
+        files = {file['name']: file['content'] for file in starter_files}
+        files["README.md"] = build_readme(plan.project_name, tickets, starter_files)
+        branch = repo_data.get('default_branch', 'main')
+
+        if not await commit_files(owner, full_repo_name, branch, files, "DevOps: Setup workspace"):
+            # Fall back to one Contents API commit per file
+            print("⚠️ Bulk commit failed, uploading files one by one")
+            for path, content in files.items():
+                await create_file(owner, full_repo_name, path, content)
+        # After the setup commit, so only the user's own pushes get pre-reviewed
+        if WEBHOOK_URL and GITHUB_WEBHOOK_SECRET: await create_push_hook(owner, full_repo_name)
+
+        # 2. Issues (Metadata), most of them already opened while the plan streamed
+        issues = await asyncio.gather(*self.issues)
+        failed = sum(1 for i in issues if not i["ok"])
+
+        message = f"✅ SUCCESS: Workspace ready at {repo_url}"
+        if failed: message += f" (⚠️ {failed} of {len(issues)} tickets could not be opened as issues)"
+        return {"messages": [message], "issues": issues}
+
+async def arepo_node(state):
+    """
+    Claims or creates the repo for the plan (or picks up the one the pipelined
+    manager already started). Raises on failure so a retried run resumes here;
+    once it succeeds the repo is in the checkpoint and is never created twice.
+    """
+    print("--- DEVOPS: REPOSITORY ---")
+    plan = state.get("plan")
+    if plan is None: raise RuntimeError("DevOps Agent Failed: the manager produced no plan.")
+    plan = Plan.model_validate(plan)
+
+    # The pipelined manager checkpointed the repo it claimed: reuse it, even if this process never saw it
+    if state.get("repo"):
+        return {"messages": [f"🏗️ Repo ready: {state['repo']['html_url']}"]}
+
+    provisioner = IN_FLIGHT.get(state.get("provisioning_id"))
+    if provisioner:
+        provisioner.start(plan.project_name)
+        repo_data = await provisioner.repo
+    else:
+        repo_data = await _provision_repo(plan.project_name)
+
+    if not repo_data:
+        if provisioner: await IN_FLIGHT.pop(state.get("provisioning_id")).cancel()
+        raise RuntimeError("Failed to create GitHub repository.")
+    return {"repo": _repo_ref(repo_data), "messages": [f"🏗️ Repo ready: {repo_data['html_url']}"]}
+
+async def adevops_node(state):
+    """Commits the starter files and README and opens the issues without blocking the event loop."""
+    print("--- DEVOPS AGENT STARTED ---")
+    plan = state.get("plan")
+    if plan is None: raise RuntimeError("DevOps Agent Failed: the manager produced no plan.")
+    plan = Plan.model_validate(plan)
+
+    # Picks up the work the pipelined manager already started, if any
+    provisioner = IN_FLIGHT.pop(state.get("provisioning_id"), None)
+    try:
+        if provisioner is None:
+            provisioner = Provisioner(repo=state.get("repo"))
+            # Sequential run, or a resumed one whose first attempt may have opened some issues
+            if provisioner.repo.done(): await provisioner.skip_existing(plan.tickets)
+        return await provisioner.finish(plan)
+
     except Exception as e:
-        return {"messages": [f"❌ DevOps Agent Failed: {str(e)}"]}
\ No newline at end of file
+        if provisioner: await provisioner.cancel()
+        # Raised, not returned, so the checkpointed run can be retried from here
+        raise RuntimeError(f"DevOps Agent Failed: {str(e)}") from e
+
+def devops_node(state):
+    return asyncio.run(adevops_node(state))
@@ -0,0 +1,135 @@
+import os
+import random
+import string
+import asyncio
+from collections import deque
+from core.github import github
+
+# --- CONFIG ---
+# Number of initialized, unclaimed repos to keep ready. 0 disables the pool.
+REPO_POOL_SIZE = int(os.getenv("REPO_POOL_SIZE", "0"))
+# Optional "owner/repo" template to generate pool repos from instead of auto_init
+REPO_POOL_TEMPLATE = os.getenv("REPO_POOL_TEMPLATE")
+REPO_POOL_REFILL_INTERVAL = float(os.getenv("REPO_POOL_REFILL_INTERVAL", "60"))
+
+POOL_PREFIX = "shadow-pool-"
+POOL_DESCRIPTION = "Shadow Workplace pool repository (unclaimed)."
+CLAIMED_DESCRIPTION = "Shadow Workplace Simulation."
+
+def unique_repo_name(base_name):
+    rand_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
+    return f"{base_name}-{rand_suffix}"
+
+class RepoPool:
+    """
+    Keeps `size` empty, initialized repositories ready so onboarding can claim
+    one (a single rename) instead of waiting on repo creation. A background task
+    refills the pool after every claim and on a timer. Unclaimed pool repos
+    survive restarts: they are rediscovered by name prefix on start().
+
+    The pool lives in each process: every uvicorn worker keeps its own `size`
+    repos ready, so N workers hold up to N * size. Workers that discover the
+    same leftover repo may both try to claim it; the rename refuses redirects,
+    so only the first one gets it.
+    """
+
+    def __init__(self, size=REPO_POOL_SIZE, template=REPO_POOL_TEMPLATE):
+        self.size = size
+        self.template = template
+        self.ready = deque()
+        self.hits = 0
+        self.misses = 0
+        self._wake = None
+        self._task = None
+
+    @property
+    def enabled(self):
+        return self.size > 0 and self._task is not None
+
+    async def start(self):
+        if self.size <= 0: return
+        self._wake = asyncio.Event()
+        await self._discover()
+        self._task = asyncio.create_task(self._refill_loop())
+        print(f"🏊 Repo pool started with {len(self.ready)}/{self.size} ready")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def claim(self, base_name):
+        """Renames a pooled repo to `<base_name>-xxxx` and returns its repo JSON, or None on a miss."""
+        if not self.enabled: return None
+        try:
+            while self.ready:
+                repo = self.ready.popleft()
+                try:
+                    claimed = await self._rename(repo, unique_repo_name(base_name))
+                except Exception as e:
+                    # Back in line: if the rename did land, the next claim gets a redirect and drops it
+                    self.ready.appendleft(repo)
+                    print(f"⚠️ Could not claim pool repo {repo['name']}: {e}")
+                    break
+                if claimed:
+                    self.hits += 1
+                    return claimed
+            self.misses += 1
+            return None
+        finally:
+            self._wake.set()
+
+    def stats(self):
+        return {"size": self.size, "ready": len(self.ready), "hits": self.hits, "misses": self.misses}
+
+    # --- INTERNALS ---
+    async def _rename(self, repo, new_name):
+        owner, name = repo["owner"]["login"], repo["name"]
+        # No redirects: if another worker already renamed it, GitHub would redirect us to *their* repo
+        resp = await github.patch(
+            f"/repos/{owner}/{name}",
+            json={"name": new_name, "description": CLAIMED_DESCRIPTION},
+            follow_redirects=False
+        )
+        return resp.json() if resp.status_code == 200 else None
+
+    async def _create(self):
+        name = unique_repo_name(POOL_PREFIX.rstrip("-"))
+        if self.template:
+            resp = await github.post(f"/repos/{self.template}/generate", json={
+                "name": name, "description": POOL_DESCRIPTION, "private": False
+            })
+        else:
+            resp = await github.post("/user/repos", json={
+                "name": name, "description": POOL_DESCRIPTION, "private": False, "auto_init": True
+            })
+        return resp.json() if resp.status_code == 201 else None
+
+    async def _discover(self):
+        try:
+            resp = await github.get("/user/repos", params={"affiliation": "owner", "per_page": 100, "sort": "created"})
+            if resp.status_code != 200: return
+            for repo in resp.json():
+                if repo["name"].startswith(POOL_PREFIX) and repo.get("description") == POOL_DESCRIPTION:
+                    self.ready.append(repo)
+        except Exception as e:
+            print(f"⚠️ Repo pool discovery failed: {e}")
+
+    async def _refill_loop(self):
+        while True:
+            while len(self.ready) < self.size:
+                try:
+                    repo = await self._create()
+                except Exception as e:
+                    print(f"⚠️ Repo pool refill failed: {e}")
+                    repo = None
+                if not repo: break
+                self.ready.append(repo)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=REPO_POOL_REFILL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+repo_pool = RepoPool()
@@ -1,19 +1,15 @@
-import os
+import asyncio
 import json
 import re
-from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import ValidationError
 from langchain_core.messages import HumanMessage, SystemMessage
-from dotenv import load_dotenv
-
-load_dotenv()
+from core.llm import get_llm
+from agents.manager.plan import Plan, Ticket, PlanStreamParser
+from agents.manager.plan_cache import plan_cache
 
 # --- CONFIG ---
-api_key = os.getenv("GOOGLE_API_KEY")
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash", 
-    google_api_key=api_key,
-    temperature=0.7
-)
+# Model clients are shared process-wide; see core/llm.py
+TEMPERATURE = 0.7
 
 # --- HELPER: ROBUST JSON EXTRACTOR ---
 def extract_json(text):
@@ -24,13 +20,8 @@ def extract_json(text):
         return text
     except: return text
 
-def manager_node(state):
-    print("--- MANAGER AGENT STARTED ---")
-    messages = state.get("messages", [])
-    user_input = messages[0] if messages else "I want a coding challenge."
-    print(f"🧠 Analyzing Request: '{user_input}'")
-
-    system_prompt = """You are a Senior Technical Mentor.
+# --- PROMPT ---
+SYSTEM_PROMPT = """You are a Senior Technical Mentor.
     Your goal is to generating a coding project tailored EXACTLY to the user's skill level.
 
     ### 1. DETECT SKILL LEVEL (CRITICAL):
@@ -77,26 +68,114 @@ def manager_node(state):
     }
     """
 
+# --- HELPERS ---
+def _build_messages(user_input):
+    return [
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(content=f"User Request: {str(user_input)}")
+    ]
+
+FALLBACK_PLAN = Plan(
+    project_name="shadow-fallback",
+    tickets=[Ticket(id="1", title="Mission 1: System Check", body="AI Generation Failed. Please try a simpler prompt.")]
+)
+
+def _parse_plan(content):
+    """Validated Plan, or None if the model didn't return a usable one."""
     try:
-        response = llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"User Request: {str(user_input)}")
-        ])
-        
-        clean_content = extract_json(response.content)
-        parsed_json = json.loads(clean_content)
-        return {"messages": [json.dumps(parsed_json)]}
+        clean_content = extract_json(content)
+        return Plan.model_validate(json.loads(clean_content))
 
     except json.JSONDecodeError as e:
         print(f"❌ JSON Parse Error: {e}")
-        # Robust Fallback
-        fallback = json.dumps({
-            "project_name": "shadow-fallback",
-            "tickets": [{"id": "1", "title": "Mission 1: System Check", "body": "AI Generation Failed. Please try a simpler prompt."}],
-            "starter_files": []
-        })
-        return {"messages": [fallback]}
+        return None
+    except ValidationError as e:
+        print(f"❌ Plan Validation Error: {e.error_count()} problem(s)")
+        return None
+
+def _plan_result(user_input, content, streamed=None):
+    plan = _parse_plan(content)
+    if plan is None:
+        # Keep whatever items did stream whole, else the robust fallback (never cached)
+        plan = (streamed and streamed.partial()) or FALLBACK_PLAN
+    else:
+        plan_cache.add(user_input, plan.model_dump())
+    return _result(plan)
+
+def _result(plan):
+    # The plan travels as typed state; messages only carry a short status line
+    return {"plan": plan, "messages": [f"📋 Plan ready: {plan.project_name} ({len(plan.tickets)} tickets)"]}
+
+def _cached_plan(user_input):
+    plan = plan_cache.lookup(user_input)
+    if plan is None: return None
+    try:
+        plan = Plan.model_validate(plan)
+    except ValidationError:
+        return None
+    print("⚡ Plan served from cache")
+    return plan
+
+def plan_items(plan):
+    """The (kind, value) pieces of a finished plan, in the order PlanStreamParser reports them."""
+    yield "project_name", plan.project_name
+    for ticket in plan.tickets: yield "ticket", ticket
+    for starter_file in plan.starter_files: yield "starter_file", starter_file
+
+def _chunk_text(chunk):
+    content = chunk.content
+    if isinstance(content, str): return content
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+def _get_user_input(state):
+    messages = state.get("messages", [])
+    user_input = messages[0] if messages else "I want a coding challenge."
+    print(f"🧠 Analyzing Request: '{user_input}'")
+    return user_input
+
+# --- MAIN NODES ---
+def manager_node(state):
+    print("--- MANAGER AGENT STARTED ---")
+    user_input = _get_user_input(state)
+    cached = _cached_plan(user_input)
+    if cached: return _result(cached)
+
+    try:
+        response = get_llm(TEMPERATURE).invoke(_build_messages(user_input))
+        return _plan_result(user_input, response.content)
 
     except Exception as e:
         print(f"❌ Manager Crash: {e}")
-        return {"messages": ["Error"]}
\ No newline at end of file
+        # Raised so a checkpointed run stops before DevOps and retries the plan on resume
+        raise
+
+async def astream_manager(state, on_item=None):
+    """
+    Streams the plan from Gemini and calls on_item(kind, value) for the project
+    name, each ticket and each starter file the moment it is complete, so work
+    can start before the plan is finished. Returns the node result.
+    """
+    print("--- MANAGER AGENT STARTED (async) ---")
+    user_input = _get_user_input(state)
+    # The plan cache is SQLite, which can wait on another worker's write lock: keep it off the event loop
+    cached = await asyncio.to_thread(_cached_plan, user_input)
+    if cached:
+        if on_item:
+            for kind, value in plan_items(cached): on_item(kind, value)
+        return _result(cached)
+
+    parser = PlanStreamParser()
+    try:
+        async for chunk in get_llm(TEMPERATURE).astream(_build_messages(user_input)):
+            for kind, value in parser.feed(_chunk_text(chunk)):
+                if on_item: on_item(kind, value)
+        return await asyncio.to_thread(_plan_result, user_input, parser.buffer, parser)
+
+    except Exception as e:
+        print(f"❌ Manager Crash: {e}")
+        # Raised so a checkpointed run stops before DevOps and retries the plan on resume
+        raise
+
+async def amanager_node(state):
+    """Same as manager_node, but streams Gemini's output without blocking the event loop."""
+    return await astream_manager(state)
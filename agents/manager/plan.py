@@ -0,0 +1,133 @@
+import re
+import json
+from typing import List
+from pydantic import BaseModel, field_validator
+
+# --- TYPES ---
+class Ticket(BaseModel):
+    id: str
+    title: str
+    body: str = ""
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def _id_as_text(cls, value):
+        return str(value)
+
+class StarterFile(BaseModel):
+    name: str
+    content: str = ""
+
+class Plan(BaseModel):
+    project_name: str = "shadow-project"
+    tickets: List[Ticket] = []
+    starter_files: List[StarterFile] = []
+
+    @field_validator("project_name", mode="before")
+    @classmethod
+    def _slug(cls, value):
+        # GitHub repo names: letters, digits, '-', '_' and '.'
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "-", str(value or "")).strip("-.")
+        return slug[:80] or "shadow-project"
+
+# --- INCREMENTAL PARSER ---
+ARRAY_FIELDS = {"tickets": Ticket, "starter_files": StarterFile}
+
+class PlanStreamParser:
+    """
+    Reads the manager's JSON as it streams and reports each piece as soon as it is complete:
+
+        ("project_name", "fintech-api")
+        ("ticket", Ticket(...))
+        ("starter_file", StarterFile(...))
+
+    Anything before the first '{' (prose, ```json fences) is ignored. Malformed
+    items are skipped; the final, fully parsed plan stays the source of truth.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._key = None
+        self._after_colon = False
+        self._array = None
+        self._item_start = None
+        self._started = False
+        self.project_name = None
+        self.tickets = []
+        self.starter_files = []
+
+    def feed(self, chunk):
+        """Appends a chunk and returns the (kind, value) events it completed."""
+        self.buffer += chunk
+        events = []
+        text = self.buffer
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped: self._escaped = False
+                elif ch == "\\": self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1: self._top_level_string(text[self._string_start:i + 1], events)
+                continue
+
+            if not self._started:
+                if ch == "{": self._started, self._depth = True, 1
+                continue
+
+            if ch == '"':
+                self._in_string, self._string_start = True, i
+            elif ch in "{[":
+                if self._depth == 1 and ch == "[" and self._after_colon and self._key in ARRAY_FIELDS:
+                    self._array = self._key
+                elif self._depth == 2 and ch == "{" and self._array:
+                    self._item_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 2 and ch == "}" and self._item_start is not None:
+                    self._emit_item(text[self._item_start:i + 1], events)
+                    self._item_start = None
+                elif self._depth == 1:
+                    self._array = None
+            elif self._depth == 1 and ch == ":":
+                self._after_colon = True
+            elif self._depth == 1 and ch == ",":
+                self._key, self._after_colon = None, False
+        self._pos = len(text)
+        return events
+
+    def partial(self):
+        """Plan built from what has streamed so far, or None if nothing has."""
+        if not (self.project_name or self.tickets or self.starter_files): return None
+        return Plan(project_name=self.project_name, tickets=self.tickets, starter_files=self.starter_files)
+
+    def _top_level_string(self, literal, events):
+        try:
+            value = json.loads(literal)
+        except json.JSONDecodeError:
+            # e.g. an invalid escape from the model: skip it, the end-of-stream parse decides
+            if not self._after_colon: self._key = None
+            return
+        if not self._after_colon:
+            self._key = value
+        elif self._key == "project_name":
+            self.project_name = Plan(project_name=value).project_name
+            events.append(("project_name", self.project_name))
+
+    def _emit_item(self, literal, events):
+        try:
+            item = ARRAY_FIELDS[self._array].model_validate(json.loads(literal))
+        except ValueError:
+            return
+        if self._array == "tickets":
+            self.tickets.append(item)
+            events.append(("ticket", item))
+        else:
+            self.starter_files.append(item)
+            events.append(("starter_file", item))
@@ -0,0 +1,72 @@
+import os
+import re
+import random
+from core.cache import SQLiteLRU
+
+# --- CONFIG ---
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "1") == "1"
+PLAN_CACHE_MAX_KEYS = int(os.getenv("PLAN_CACHE_MAX_KEYS", "1000"))
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", str(7 * 24 * 3600)))
+# Keep up to N different plans per normalized prompt and pick one at random once full
+PLAN_CACHE_VARIANTS = int(os.getenv("PLAN_CACHE_VARIANTS", "1"))
+
+# Mirrors the keyword lists in the manager's system prompt (plural-folded, see _terms)
+SKILL_LEVELS = [
+    ("beginner", {"learn", "learning", "scratch", "beginner", "newbie", "basic"}),
+    ("senior", {"advanced", "scalable", "design", "microservice", "senior", "staff", "architect"}),
+    ("junior", {"internship", "intern", "junior", "portfolio", "project", "build", "entry"}),
+]
+STOPWORDS = {
+    "a", "an", "the", "for", "of", "to", "in", "on", "at", "with", "and", "or", "i", "im", "me", "my",
+    "want", "would", "like", "need", "be", "as", "is", "am", "from", "some", "please", "job", "role",
+    "position", "simulate", "simulation", "level", "developer", "dev", "engineer", "system"
+}
+
+def _terms(prompt):
+    words = re.findall(r"[a-z0-9+#]+", prompt.lower())
+    # Cheap plural folding so 'apps' and 'app' share a key
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+
+def detect_level(prompt):
+    words = set(_terms(prompt))
+    for level, keywords in SKILL_LEVELS:
+        if words & keywords: return level
+    return "junior"
+
+def normalize_prompt(prompt):
+    """'Backend Intern for a FinTech app' and 'backend  intern, fintech apps' -> 'junior|app backend fintech'"""
+    level = detect_level(prompt)
+    level_words = set().union(*(keywords for _, keywords in SKILL_LEVELS))
+    terms = sorted({w for w in _terms(prompt) if w not in STOPWORDS and w not in level_words})
+    return f"{level}|{' '.join(terms)}"
+
+class PlanCache:
+    """Normalized prompt -> up to PLAN_CACHE_VARIANTS generated plans, persisted in SQLite."""
+
+    def __init__(self):
+        self.store = SQLiteLRU("manager_plans", PLAN_CACHE_MAX_KEYS, ttl=PLAN_CACHE_TTL)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, prompt):
+        """A cached plan, or None when the model should be called (miss, or variants not filled yet)."""
+        if not PLAN_CACHE_ENABLED: return None
+        variants = self.store.get(normalize_prompt(prompt)) or []
+        if len(variants) < PLAN_CACHE_VARIANTS:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return random.choice(variants)
+
+    def add(self, prompt, plan):
+        if not PLAN_CACHE_ENABLED: return
+        key = normalize_prompt(prompt)
+        variants = self.store.get(key) or []
+        if plan not in variants:
+            variants = (variants + [plan])[-PLAN_CACHE_VARIANTS:]
+        self.store.put(key, variants)
+
+    def stats(self):
+        return {**self.store.stats(), "plan_hits": self.hits, "plan_misses": self.misses}
+
+plan_cache = PlanCache()
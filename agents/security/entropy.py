@@ -0,0 +1,165 @@
+import os
+import re
+import numpy as np
+
+# --- CONFIG ---
+ENTROPY_SCAN_ENABLED = os.getenv("ENTROPY_SCAN_ENABLED", "1") == "1"
+# Token-like runs shorter than this are never secrets worth blocking on; longer ones are data blobs
+ENTROPY_MIN_LENGTH = int(os.getenv("ENTROPY_MIN_LENGTH", "20"))
+ENTROPY_MAX_LENGTH = int(os.getenv("ENTROPY_MAX_LENGTH", "512"))
+# Bits per character a token must reach, by charset (the usual truffleHog-style cut-offs)
+BASE64_THRESHOLD = float(os.getenv("ENTROPY_BASE64_THRESHOLD", "4.5"))
+HEX_THRESHOLD = float(os.getenv("ENTROPY_HEX_THRESHOLD", "3.0"))
+# A token of length L can't exceed log2(L) bits, so short tokens need this share of that instead.
+# Random 20-character keys average ~0.95 of it; identifiers glued to numbers rarely get there.
+LENGTH_FACTOR = float(os.getenv("ENTROPY_LENGTH_FACTOR", "0.95"))
+# Tokens per histogram batch: batch x 256 counters, ~8 MB at the default
+BATCH_TOKENS = 4096
+
+# --- ALLOWLIST ---
+# Lockfiles and generated assets are full of hashes and base64 by design
+ALLOWED_FILES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "pipfile.lock", "cargo.lock",
+    "composer.lock", "gemfile.lock", "go.sum", "npm-shrinkwrap.json", "bun.lockb", "uv.lock"
+}
+ALLOWED_SUFFIXES = (".lock", ".min.js", ".min.css", ".map", ".svg", ".ipynb", ".snap")
+# Hex digests are only allowed where the line says it is one
+HASH_CONTEXT = re.compile(r"sha\d*|md5|hash|digest|checksum|integrity|commit|revision|etag|fingerprint|uuid|guid", re.IGNORECASE)
+# Test suites are full of hex test vectors (digests, UUIDs, HMAC keys); base64 in them is still checked
+TEST_PATH = re.compile(r"(?:^|/)(?:tests?|spec)/|(?:^|/)test_[^/]*$|_test\.\w+$")
+# Subresource-integrity values and data URIs
+ALLOWED_PREFIXES = ("sha1-", "sha256-", "sha384-", "sha512-")
+# Inline opt-out, e.g. a deliberate test fixture
+ALLOW_MARKERS = ("pragma: allowlist secret", "shadow: allow")
+# A secret is a value: a token is only reported inside a string literal or right after an assignment
+QUOTES = "\"'`"
+# Alphabet tables ("0123456789ABCDEF...") have maximal entropy; random keys almost never hold a run this long
+SEQUENCE_RUN = 6
+ASSIGNMENT = re.compile(r"(?<![=!<>])[=:][ \t]*$")
+
+# --- BYTE TABLES ---
+def _table(chars):
+    table = np.zeros(256, dtype=bool)
+    table[np.frombuffer(chars.encode("ascii"), dtype=np.uint8)] = True
+    return table
+
+DIGITS = "0123456789"
+LOWER = "abcdefghijklmnopqrstuvwxyz"
+UPPER = LOWER.upper()
+# No "=": it separates keyword arguments and assignments (name=value), and base64 padding adds no entropy
+IS_TOKEN = _table(DIGITS + LOWER + UPPER + "+/_-")
+# One bit per character class, OR-ed over each token to tell its charset
+DIGIT, LETTER, NOT_HEX = 1, 2, 4
+CLASS = (
+    _table(DIGITS) * DIGIT + _table(LOWER + UPPER) * LETTER + (IS_TOKEN & ~_table(DIGITS + "abcdefABCDEF")) * NOT_HEX
+).astype(np.uint8)
+# c * log2(c) for every count a token can have, so entropy is one table lookup per histogram cell
+C_LOG_C = np.zeros(ENTROPY_MAX_LENGTH + 1)
+C_LOG_C[1:] = np.arange(1, ENTROPY_MAX_LENGTH + 1) * np.log2(np.arange(1, ENTROPY_MAX_LENGTH + 1))
+
+def in_value_position(prefix):
+    """Whether a token preceded by `prefix` (its line up to the token) sits in a string literal or is assigned."""
+    if any(prefix.count(quote) % 2 for quote in QUOTES): return True
+    return bool(ASSIGNMENT.search(prefix))
+
+def has_sequence(token, run=SEQUENCE_RUN):
+    """Whether `token` contains `run` consecutive characters in code point order, like "abcdef" or "345678"."""
+    length = 1
+    for a, b in zip(token, token[1:]):
+        length = length + 1 if ord(b) - ord(a) == 1 else 1
+        if length >= run: return True
+    return False
+
+def allowed_file(path):
+    name = os.path.basename(path).lower()
+    return name in ALLOWED_FILES or name.endswith(ALLOWED_SUFFIXES)
+
+def shannon_entropy(starts, lengths, data):
+    """
+    Bits per character of each token data[start:start + length], computed from
+    per-token byte histograms BATCH_TOKENS at a time: H = log2(L) - sum(c log2 c) / L.
+    """
+    entropy = np.empty(len(starts))
+    for a in range(0, len(starts), BATCH_TOKENS):
+        s, l = starts[a:a + BATCH_TOKENS], lengths[a:a + BATCH_TOKENS]
+        n = len(s)
+        # Byte positions of every token in the batch, and which token each belongs to
+        positions, _ = _gather(s, l)
+        token = np.repeat(np.arange(n), l)
+        counts = np.bincount(token * 256 + data[positions], minlength=n * 256).reshape(n, 256)
+        entropy[a:a + n] = np.log2(l) - C_LOG_C[counts].sum(axis=1) / l
+    return entropy
+
+def _line(data, newlines, index):
+    start = int(newlines[index - 1]) + 1 if index else 0
+    end = int(newlines[index]) if index < len(newlines) else len(data)
+    return data[start:end].tobytes().decode("utf-8", "replace")
+
+def _gather(starts, lengths):
+    """Byte offsets of every token, concatenated, and where each token begins in them."""
+    first = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum()) - np.repeat(first - starts, lengths), first
+
+def find_high_entropy(batch):
+    """
+    High-entropy tokens in [(path, text), ...], scanned as one byte array.
+
+    Returns (path, line, column, token, charset) tuples, charset being "hex" or
+    "base64". Candidates are maximal runs of [A-Za-z0-9+/_-] between
+    ENTROPY_MIN_LENGTH and ENTROPY_MAX_LENGTH bytes that mix letters and digits;
+    only those are histogrammed, and only hits in a string literal or an
+    assigned value (in_value_position) are reported.
+    """
+    files = [(path, text.encode("utf-8", "replace")) for path, text in batch if not allowed_file(path)]
+    if not files: return []
+    data = np.frombuffer(b"\n".join(raw for _, raw in files), dtype=np.uint8)
+    file_starts = np.cumsum([0] + [len(raw) + 1 for _, raw in files[:-1]])
+
+    # 1. Maximal token runs of a plausible length
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], IS_TOKEN[data], [False])).view(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    lengths = ends - starts
+    keep = (lengths >= ENTROPY_MIN_LENGTH) & (lengths <= ENTROPY_MAX_LENGTH)
+    starts, lengths = starts[keep], lengths[keep]
+    if not len(starts): return []
+
+    # 2. Charset: both need a digit and a letter, which random keys almost always have and words don't
+    positions, first = _gather(starts, lengths)
+    classes = np.bitwise_or.reduceat(CLASS[data[positions]], first)
+    mixed = (classes & DIGIT > 0) & (classes & LETTER > 0)
+    starts, lengths, is_hex = starts[mixed], lengths[mixed], (classes[mixed] & NOT_HEX) == 0
+    if not len(starts): return []
+
+    # 3. Entropy against the charset threshold, relaxed for short tokens
+    entropy = shannon_entropy(starts, lengths, data)
+    threshold = np.minimum(np.where(is_hex, HEX_THRESHOLD, BASE64_THRESHOLD), LENGTH_FACTOR * np.log2(lengths))
+    hits = np.flatnonzero(entropy >= threshold)
+    if not len(hits): return []
+
+    # 4. Only the (few) hits are handled in Python: position, allowlist, context
+    starts, lengths, is_hex = starts[hits], lengths[hits], is_hex[hits]
+    newlines = np.flatnonzero(data == 10)
+    file_index = np.searchsorted(file_starts, starts, side="right") - 1
+    line_index = np.searchsorted(newlines, starts)
+    file_line = np.searchsorted(newlines, file_starts)
+    line_starts = np.concatenate(([0], newlines + 1))[line_index]
+    line_ends = np.concatenate((newlines, [len(data)]))[line_index]
+    found = []
+    for i in range(len(starts)):
+        start, length, line_start = int(starts[i]), int(lengths[i]), int(line_starts[i])
+        token = data[start:start + length].tobytes().decode("ascii")
+        line_text = data[line_start:int(line_ends[i])].tobytes().decode("utf-8", "replace")
+
+        # Offsets are in bytes; the prefix is decoded on its own so the column counts characters
+        prefix = data[line_start:start].tobytes().decode("utf-8", "replace")
+        if not in_value_position(prefix) or has_sequence(token): continue
+        # Random hex is ~3/8 letters; long numbers like "2602...896e0" are hex-only by accident
+        if is_hex[i] and sum(c.isalpha() for c in token) < length // 8: continue
+        # Doctest output: the line after a ">>>" prompt shows what the example returns
+        if line_index[i] > 0 and _line(data, newlines, int(line_index[i]) - 1).lstrip().startswith(">>>"): continue
+        if token.startswith(ALLOWED_PREFIXES) or "base64," in prefix: continue
+        if any(marker in line_text for marker in ALLOW_MARKERS): continue
+        if is_hex[i] and (HASH_CONTEXT.search(line_text) or TEST_PATH.search(files[int(file_index[i])][0])): continue
+        f = int(file_index[i])
+        found.append((files[f][0], int(line_index[i] - file_line[f]) + 1, len(prefix) + 1, token, "hex" if is_hex[i] else "base64"))
+    return found
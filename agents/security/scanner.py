@@ -0,0 +1,205 @@
+import os
+import re
+import atexit
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from agents.security import entropy
+
+# --- CONFIG ---
+# Repos larger than this are scanned in a process pool, one batch of files per task.
+# Well under INGEST_TOTAL_MAX_BYTES (8 MB), the most a snapshot can hold, so big repos do get the pool.
+PARALLEL_THRESHOLD_BYTES = int(os.getenv("SCAN_PARALLEL_THRESHOLD_BYTES", str(2 * 1024 * 1024)))
+BATCH_BYTES = int(os.getenv("SCAN_BATCH_BYTES", str(1024 * 1024)))
+SCAN_PROCESSES = int(os.getenv("SCAN_PROCESSES", "0")) or os.cpu_count() or 1
+
+# --- RULES ---
+# (rule id, label, literal prefixes, body pattern, needs word boundary before the prefix)
+#
+# Every rule starts with a literal so the combined pattern is a flat alternation of
+# literal-led branches. That lets the regex engine skip ahead to candidate first
+# characters instead of trying every rule at every offset (an order of magnitude
+# faster than \b-led rules on typical source).
+RULES = [
+    ("google_api_key", "Google API Key", ["AIza"], r"[0-9A-Za-z_\-]{35}", False),
+    ("openai_api_key", "OpenAI Key", ["sk-"], r"(?:proj-|svcacct-|admin-)?[A-Za-z0-9_\-]{20,}", True),
+    ("github_token", "GitHub Token", ["ghp_", "gho_", "ghu_", "ghs_", "ghr_"], r"[A-Za-z0-9]{36,255}", True),
+    ("github_fine_grained_pat", "GitHub Fine-Grained PAT", ["github_pat_"], r"[A-Za-z0-9_]{82}", True),
+    ("aws_access_key_id", "AWS Access Key ID", ["AKIA", "ASIA", "ABIA", "ACCA"], r"[0-9A-Z]{16}(?![0-9A-Za-z])", True),
+    ("aws_secret_access_key", "AWS Secret Access Key", ["aws_secret_access_key", "AWS_SECRET_ACCESS_KEY"],
+        r"[\"']?[ \t]*[:=][ \t]*[\"']?[A-Za-z0-9/+=]{40}(?![A-Za-z0-9/+=])", True),
+    ("slack_token", "Slack Token", ["xoxa-", "xoxb-", "xoxp-", "xoxo-", "xoxs-", "xoxr-"], r"[0-9A-Za-z\-]{10,}", True),
+    ("slack_webhook", "Slack Webhook", ["https://hooks.slack.com/services/"], r"T[A-Za-z0-9_]+/B[A-Za-z0-9_]+/[A-Za-z0-9_]+", False),
+    ("private_key", "Private Key", ["-----BEGIN "], r"(?:RSA |EC |DSA |OPENSSH |PGP |ENCRYPTED )?PRIVATE KEY(?: BLOCK)?-----", False),
+    # KEY=value lines (.env files, shell exports, module constants) with a literal, token-like value.
+    # The match starts at the keyword; the rest of the variable name is checked in _valid().
+    ("env_secret", "Hardcoded Secret", ["SECRET", "TOKEN", "PASSWORD", "PASSWD", "API_KEY", "APIKEY", "PRIVATE_KEY"],
+        r"[A-Z0-9_]*[ \t]*[:=][ \t]*[\"']?[A-Za-z0-9_\-+/.=]{8,}[\"']?[ \t]*(?:#.*)?(?m:$)", False),
+]
+LABELS = {rule: label for rule, label, _, _, _ in RULES}
+# Findings of the entropy detector (agents/security/entropy.py), by charset
+ENTROPY_RULES = {"base64": "high_entropy_string", "hex": "high_entropy_hex"}
+LABELS.update({"high_entropy_string": "High-Entropy String", "high_entropy_hex": "High-Entropy Hex String"})
+NEEDS_BOUNDARY = {rule for rule, _, _, _, boundary in RULES if boundary}
+
+def _compile(rules):
+    branches, groups = [], {}
+    for rule, _, prefixes, body, _ in rules:
+        for i, prefix in enumerate(prefixes):
+            # Keep the first character outside the group so the branch stays literal-led
+            group = f"{rule}__{i}"
+            groups[group] = rule
+            branches.append(f"{re.escape(prefix[0])}(?P<{group}>{re.escape(prefix[1:])}{body})")
+    return re.compile("|".join(branches)), groups
+
+COMBINED, GROUP_RULES = _compile(RULES)
+# Every rule but env_secret, re-run inside an env_secret match so the token in `KEY=<token>` gets its own label
+SPECIFIC, SPECIFIC_RULES = _compile([rule for rule in RULES if rule[0] != "env_secret"])
+# Changes whenever the rule set (or the entropy settings) does, so cached per-file results never outlive their rules
+ENTROPY_ID = (
+    f"{entropy.ENTROPY_SCAN_ENABLED}:{entropy.ENTROPY_MIN_LENGTH}:{entropy.ENTROPY_MAX_LENGTH}:"
+    f"{entropy.BASE64_THRESHOLD}:{entropy.HEX_THRESHOLD}:{entropy.LENGTH_FACTOR}"
+)
+RULESET_ID = hashlib.sha1((COMBINED.pattern + SPECIFIC.pattern + ENTROPY_ID).encode("utf-8")).hexdigest()[:12]
+ENV_NAME_PREFIX = re.compile(r"[ \t]*(?:export[ \t]+)?[A-Z0-9_]*")
+
+# Values that are obviously not real credentials
+PLACEHOLDERS = ("your", "xxxx", "changeme", "example", "placeholder", "dummy", "redacted", "<", "${")
+# The value of an env_secret match, and whether it was quoted
+ENV_VALUE = re.compile(r"[A-Z0-9_]*[ \t]*[:=][ \t]*([\"']?)([^\"'\s#]*)")
+# Not secrets even when quoted: attribute/module paths (settings.KEY, django.contrib...Hasher),
+# plain snake_case words ("bearer_token") and numbers
+DOTTED_NAME = re.compile(r"[a-z_][a-z0-9_]*(?:\.[A-Za-z_]\w*)+")
+WORDS = re.compile(r"[a-z]+(?:_[a-z]+)*")
+
+def is_env_file(path):
+    """.env-style files, the only place an unquoted KEY=value is a literal rather than code."""
+    name = path.rsplit("/", 1)[-1].lower()
+    return name.startswith(".env") or name.endswith(".env")
+
+def _redact(text):
+    return text[:4] + "…" if len(text) > 4 else "…"
+
+def _valid(rule, text, start, line_start, value, env_file):
+    if rule in NEEDS_BOUNDARY and start > 0 and (text[start - 1].isalnum() or text[start - 1] == "_"):
+        return False
+    if rule == "env_secret":
+        if not ENV_NAME_PREFIX.fullmatch(text, line_start, start): return False
+        if any(p in value.lower() for p in PLACEHOLDERS): return False
+        quote, literal = ENV_VALUE.match(value).groups()
+        # In source files an unquoted value is an expression (a name, a call, a number)
+        if not quote and not env_file: return False
+        if literal.isdigit() or DOTTED_NAME.fullmatch(literal) or WORDS.fullmatch(literal): return False
+    return True
+
+def scan_text(text, path):
+    """All findings in one file, in order, from a single pass of the combined pattern."""
+    findings = []
+    line, line_start, pos = 1, 0, 0
+    env_file = is_env_file(path)
+    for match in COMBINED.finditer(text):
+        start = match.start()
+        newlines = text.count("\n", pos, start)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", pos, start) + 1
+        pos = start
+
+        rule = GROUP_RULES[match.lastgroup]
+        if rule == "env_secret":
+            # The match covers the value, so the specific rules never saw it: a known token format
+            # wins over the generic label, and still counts where env_secret itself is rejected
+            inner = [(SPECIFIC_RULES[m.lastgroup], m) for m in SPECIFIC.finditer(text, start, match.end())]
+            inner = [(r, m) for r, m in inner if _valid(r, text, m.start(), line_start, m.group(), env_file)]
+            if inner:
+                findings.extend(_finding(r, m, path, line, line_start) for r, m in inner)
+                continue
+        if not _valid(rule, text, start, line_start, match.group(), env_file): continue
+        findings.append(_finding(rule, match, path, line, line_start))
+    return findings
+
+def _finding(rule, match, path, line, line_start):
+    return {
+        "rule": rule,
+        "label": LABELS[rule],
+        "path": path,
+        "line": line,
+        "column": match.start() - line_start + 1,
+        "preview": _redact(match.group().strip())
+    }
+
+def _entropy_findings(batch, known):
+    """High-entropy tokens on lines the rules haven't already reported."""
+    findings = []
+    for path, line, column, token, charset in entropy.find_high_entropy(batch):
+        if (path, line) in known: continue
+        rule = ENTROPY_RULES[charset]
+        findings.append({
+            "rule": rule, "label": LABELS[rule], "path": path,
+            "line": line, "column": column, "preview": _redact(token)
+        })
+    return findings
+
+def _scan_batch(batch):
+    batch = list(batch)
+    findings = []
+    for path, text in batch:
+        findings.extend(scan_text(text, path))
+    if entropy.ENTROPY_SCAN_ENABLED:
+        # One vectorized pass over the whole batch, then back into per-file order
+        extra = _entropy_findings(batch, {(f["path"], f["line"]) for f in findings})
+        if extra:
+            order = {path: i for i, (path, _) in enumerate(batch)}
+            findings = sorted(findings + extra, key=lambda f: (order[f["path"]], f["line"], f["column"]))
+    return findings
+
+def _batches(blobs):
+    batch, size = [], 0
+    for path, text in blobs.items():
+        batch.append((path, text))
+        size += len(text)
+        if size >= BATCH_BYTES:
+            yield batch
+            batch, size = [], 0
+    if batch: yield batch
+
+# --- PROCESS POOL ---
+# One long-lived pool per size, started on first use. "spawn": the app forks from threaded code otherwise.
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _pool(processes):
+    with _pools_lock:
+        if processes not in _pools:
+            _pools[processes] = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+        return _pools[processes]
+
+def shutdown_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools: pool.shutdown(wait=False, cancel_futures=True)
+
+atexit.register(shutdown_pools)
+
+def scan_files(blobs, processes=None):
+    """
+    Scans {path: text} and returns every finding with path/line/column.
+
+    Small inputs are scanned inline; anything past PARALLEL_THRESHOLD_BYTES is
+    split into ~BATCH_BYTES batches and fanned out across the shared process pool.
+    """
+    processes = processes or SCAN_PROCESSES
+    total = sum(len(text) for text in blobs.values())
+    if processes <= 1 or total < PARALLEL_THRESHOLD_BYTES:
+        return _scan_batch(blobs.items())
+
+    try:
+        return [finding for batch in _pool(processes).map(_scan_batch, _batches(blobs)) for finding in batch]
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed): start a fresh pool next time, scan this one inline
+        with _pools_lock: _pools.pop(processes, None)
+        print("⚠️ Scanner process pool broke, scanning inline")
+        return _scan_batch(blobs.items())
@@ -1,78 +1,102 @@
 import os
-import requests
-import re
-from dotenv import load_dotenv
+import asyncio
+from core.snapshot import ensure_snapshot
+from core.review_cache import blob_findings, REVIEW_CACHE_ENABLED
+from agents.security.scanner import scan_files, RULESET_ID
 
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"}
+# --- CONFIG ---
+MAX_REPORTED_FINDINGS = 10
+# Text files too large to ingest were never scanned; by default that blocks the review like a finding would
+BLOCK_UNSCANNED = os.getenv("SCAN_BLOCK_UNSCANNED", "1") == "1"
 
-def get_code_from_github(repo_url):
-    """Fetches the code AND the filename."""
-    try:
-        clean_url = repo_url.rstrip("/")
-        parts = clean_url.split("/")
-        owner, repo = parts[-2], parts[-1]
-        
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/contents"
-        response = requests.get(api_url, headers=HEADERS)
-        
-        if response.status_code != 200: return "ERROR_ACCESS", "Unknown"
+def format_block_message(findings):
+    lines = [f"🚨 SECURITY BLOCK: Found {len(findings)} secret(s). Remove them before review:"]
+    for f in findings[:MAX_REPORTED_FINDINGS]:
+        lines.append(f"- {f['label']} in {f['path']}:{f['line']}:{f['column']} ({f['preview']})")
+    if len(findings) > MAX_REPORTED_FINDINGS:
+        lines.append(f"- ...and {len(findings) - MAX_REPORTED_FINDINGS} more")
+    return "\n".join(lines)
 
-        files = response.json()
-        target_file = None
-        
-        # Priority: Look for main.py first, then app.py, then any .py
-        if isinstance(files, list):
-            # Sort so we prioritize main.py
-            files.sort(key=lambda x: 0 if x["name"] == "main.py" else 1)
-            
-            for f in files:
-                if f["name"].endswith(".py"):
-                    target_file = f
-                    break
-        
-        if not target_file: return "NO_PYTHON_CODE", "None"
+def format_unscanned(unscanned, heading="⚠️"):
+    lines = [f"{heading} {len(unscanned)} file(s) were too large to scan for secrets:"]
+    for f in unscanned[:MAX_REPORTED_FINDINGS]:
+        reason = "over the per-file limit" if f["reason"] == "file_too_large" else "past the repo size limit"
+        lines.append(f"- {f['path']} ({f['size'] // 1024} KB, {reason})")
+    if len(unscanned) > MAX_REPORTED_FINDINGS:
+        lines.append(f"- ...and {len(unscanned) - MAX_REPORTED_FINDINGS} more")
+    return "\n".join(lines)
 
-        return requests.get(target_file["download_url"]).text, target_file["name"]
-    except Exception as e:
-        return f"ERROR: {str(e)}", "Error"
+def _scan_cached(snapshot, blobs):
+    """Scans only files whose blob SHA has no cached findings for the current rule set."""
+    if not REVIEW_CACHE_ENABLED: return scan_files(blobs)
 
-def security_node(state):
+    key_by_path = {f["path"]: f"{RULESET_ID}:{f['sha']}" for f in snapshot.get("files", []) if f.get("sha")}
+    cached = blob_findings.get_many(key_by_path[p] for p in blobs if p in key_by_path)
+    to_scan = {p: text for p, text in blobs.items() if key_by_path.get(p) not in cached}
+    if len(to_scan) < len(blobs):
+        print(f"⚡ {len(blobs) - len(to_scan)} unchanged files served from cache, scanning {len(to_scan)}")
+
+    by_path = {p: [] for p in to_scan}
+    for f in scan_files(to_scan):
+        by_path[f["path"]].append(f)
+    blob_findings.put_many({
+        key_by_path[p]: [{k: v for k, v in f.items() if k != "path"} for f in found]
+        for p, found in by_path.items() if p in key_by_path
+    })
+
+    findings = []
+    for p in blobs:
+        if p in by_path:
+            findings.extend(by_path[p])
+        else:
+            findings.extend({**f, "path": p} for f in cached[key_by_path[p]])
+    return findings
+
+async def asecurity_node(state):
+    """Scans every file in the review snapshot in one pass and blocks on any leaked secret."""
     print("--- SECURITY AGENT STARTED ---")
-    repo_url = state.get("repo_url", "")
-    
-    # 1. Fetch Code
-    code, filename = get_code_from_github(repo_url)
-    
-    print(f"🔎 Scanning File: {filename}")
-    
-    if code == "NO_PYTHON_CODE" or "ERROR" in code:
-        return {"messages": ["Security Passed (No Code)"], "security_status": "clean"}
 
-    # 2. Check for Google Keys
-    if "AIza" in code:
-        # Find the specific line for debugging
-        for line in code.splitlines():
-            if "AIza" in line:
-                print(f"🚨 DETECTED 'AIza' on line: {line.strip()}")
-        
+    # Read Code from the shared snapshot
+    snapshot = await ensure_snapshot(state)
+    blobs = snapshot.get("blobs") or {}
+    unscanned = snapshot.get("unscanned") or []
+
+    if snapshot.get("error") or not (blobs or unscanned):
+        print("🔎 Nothing to scan.")
+        return {"messages": ["Security Passed (No Code)"], "security_status": "clean", "security_findings": []}
+
+    print(f"🔎 Scanning {len(blobs)} files")
+    # Large repos fan out to a process pool; either way keep it off the event loop
+    findings = await asyncio.to_thread(_scan_cached, snapshot, blobs) if blobs else []
+    if unscanned: print(f"⚠️ {len(unscanned)} files were too large to scan")
+
+    if findings:
+        for f in findings:
+            print(f"🚨 DETECTED {f['label']} at {f['path']}:{f['line']}:{f['column']}")
+        message = format_block_message(findings)
+        if unscanned: message += "\n" + format_unscanned(unscanned)
         return {
-            "messages": [f"🚨 SECURITY BLOCK: Found Google Key in {filename}. Remove 'AIza...'."],
-            "security_status": "blocked" 
+            "messages": [message],
+            "security_status": "blocked",
+            "security_findings": findings
         }
 
-    # 3. Check for OpenAI Keys (Smarter Regex)
-    # Looks for 'sk-' followed by 20+ chars, ignoring 'task-manager' etc.
-    if re.search(r"\bsk-[a-zA-Z0-9]{20,}", code):
-        print(f"🚨 DETECTED 'sk-' Key Pattern in {filename}")
+    if unscanned and BLOCK_UNSCANNED:
+        # Padding a repo past the ingest limits must not be a way around the scan
         return {
-            "messages": [f"🚨 SECURITY BLOCK: Found OpenAI Key in {filename}."],
-            "security_status": "blocked" 
+            "messages": [format_unscanned(unscanned, "🚨 SECURITY BLOCK:") + "\nShrink or remove them before review."],
+            "security_status": "blocked",
+            "security_findings": []
         }
-    
+
     print("✅ Security Check Passed.")
+    passed = "Security check passed."
+    if unscanned: passed += "\n" + format_unscanned(unscanned)
     return {
-        "messages": ["Security check passed."], 
-        "security_status": "clean"
-    }
\ No newline at end of file
+        "messages": [passed],
+        "security_status": "clean",
+        "security_findings": []
+    }
+
+def security_node(state):
+    return asyncio.run(asecurity_node(state))
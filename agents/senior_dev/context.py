@@ -0,0 +1,146 @@
+import os
+import re
+import ast
+from core.snapshot import CODE_EXTENSIONS
+
+# --- CONFIG ---
+# Rough size of the review prompt's assignment + code sections, in tokens
+REVIEW_TOKEN_BUDGET = int(os.getenv("REVIEW_TOKEN_BUDGET", "12000"))
+# At most this many files go in verbatim; the rest are reduced to outlines
+REVIEW_FULL_FILES = int(os.getenv("REVIEW_FULL_FILES", "3"))
+# Share of the budget the tickets may use before their bodies are cut
+TICKET_BUDGET_SHARE = 0.25
+CHARS_PER_TOKEN = 4
+# Don't bother with an outline squeezed into less than this
+MIN_OUTLINE_TOKENS = 64
+OMITTED_NOTE_TOKENS = 48
+
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "your", "you", "are", "will", "into", "when",
+    "step", "mission", "objective", "context", "orders", "matters", "create", "file", "add", "use", "make"
+}
+JS_OUTLINE = re.compile(
+    r"^\s*(?:export\s+)?(?:async\s+)?(?:function\s*\*?\s*\w+\s*\([^)]*\)|class\s+\w+[^{]*|"
+    r"(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>)",
+    re.MULTILINE
+)
+HTML_OUTLINE = re.compile(r"<(?:title|h[1-3]|form|script|section)\b[^>]*>.{0,80}", re.IGNORECASE)
+
+def count_tokens(text):
+    """Cheap, deterministic estimate (~4 chars per token); close enough to budget a prompt."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def truncate(text, tokens):
+    """Cuts text to about `tokens` tokens at a line boundary and says how much was dropped."""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit: return text
+    cut = text.rfind("\n", 0, limit)
+    kept = text[:cut if cut > 0 else limit]
+    return f"{kept}\n... [truncated {text.count(chr(10), len(kept)) + 1} more lines]"
+
+def _words(text):
+    words = set()
+    for token in re.findall(r"[A-Za-z][A-Za-z0-9_]+", text):
+        # snake_case and camelCase parts count as separate words
+        for part in re.split(r"_|(?<=[a-z0-9])(?=[A-Z])", token):
+            if len(part) > 2 and part.lower() not in STOPWORDS: words.add(part.lower())
+    return words
+
+def ticket_terms(issues):
+    return _words(" ".join(f"{i['title']} {i.get('body') or ''}" for i in issues))
+
+def _python_outline(text):
+    tree = ast.parse(text)
+    lines = []
+
+    def visit(nodes, indent):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+                lines.append(f"{indent}{prefix} {node.name}({ast.unparse(node.args)}): ...")
+            elif isinstance(node, ast.ClassDef):
+                bases = ", ".join(ast.unparse(b) for b in node.bases)
+                lines.append(f"{indent}class {node.name}({bases}):" if bases else f"{indent}class {node.name}:")
+                visit(node.body, indent + "    ")
+            elif isinstance(node, (ast.Import, ast.ImportFrom)) and not indent:
+                lines.append(ast.unparse(node))
+
+    visit(tree.body, "")
+    return "\n".join(lines)
+
+def outline(path, text):
+    """Signatures only: defs/classes/imports for Python, functions/classes for JS, key tags for HTML."""
+    if path.endswith(".py"):
+        try:
+            return _python_outline(text)
+        except (SyntaxError, ValueError):
+            pass
+    pattern = HTML_OUTLINE if path.endswith(".html") else JS_OUTLINE
+    return "\n".join(m.group(0).strip() for m in pattern.finditer(text))
+
+def rank_files(blobs, issues, target=None):
+    """Code files, most relevant to the tickets first. Ties break on path so the order is stable."""
+    terms = ticket_terms(issues)
+
+    def score(path):
+        name_hits = len(_words(path.replace("/", " ").replace(".", " ")) & terms)
+        ident_hits = len(_words(" ".join(re.findall(r"(?:def|class|function)\s+(\w+)", blobs[path]))) & terms)
+        # The file the reviewers used to look at alone (main.py etc.) starts with a head start
+        return (3 * name_hits + ident_hits + 2 * (path == target), -path.count("/"))
+
+    code_paths = [p for p in blobs if p.endswith(CODE_EXTENSIONS)]
+    return sorted(sorted(code_paths), key=score, reverse=True)
+
+def format_ticket_context(issues, budget):
+    if not issues: return "No open tickets found."
+    per_ticket = max(budget // len(issues), 16)
+    return "\n".join(
+        truncate(f"- Ticket #{i['number']}: {i['title']}\n  {(i.get('body') or '').strip()}", per_ticket)
+        for i in issues
+    )
+
+def pack_context(snapshot, budget=REVIEW_TOKEN_BUDGET, full_files=REVIEW_FULL_FILES):
+    """
+    Fits the tickets and the submission into `budget` tokens:
+    tickets first (capped at TICKET_BUDGET_SHARE), then files by relevance,
+    the top `full_files` verbatim and the rest as outlines while they fit.
+    Returns {"tickets", "code", "tokens", "full", "outlined", "omitted"}.
+    """
+    issues = snapshot.get("issues") or []
+    tickets = format_ticket_context(issues, int(budget * TICKET_BUDGET_SHARE))
+    remaining = budget - count_tokens(tickets) - OMITTED_NOTE_TOKENS
+
+    blocks, full, outlined, omitted = [], [], [], []
+    for path in rank_files(snapshot.get("blobs") or {}, issues, snapshot.get("target")):
+        text = snapshot["blobs"][path]
+        block = f"### {path}\n{text}\n"
+        if len(full) < full_files and count_tokens(block) <= remaining:
+            full.append(path)
+        elif not blocks:
+            # The most relevant file always goes in; cut to half of what's left so others still get outlines
+            block = f"### {path} (truncated)\n{truncate(text, remaining // 2)}\n"
+            full.append(path)
+        else:
+            summary = outline(path, text)
+            # No single outline may take more than half of what's left
+            share = max(remaining // 2, MIN_OUTLINE_TOKENS)
+            block = f"### {path} (outline)\n{truncate(summary, share - count_tokens(path) - 16)}\n"
+            if not summary or count_tokens(block) > remaining:
+                omitted.append(path)
+                continue
+            outlined.append(path)
+        blocks.append(block)
+        remaining -= count_tokens(block)
+
+    if omitted:
+        note = f"... {len(omitted)} more file(s) omitted: {', '.join(omitted)}"
+        blocks.append(truncate(note, OMITTED_NOTE_TOKENS - 8) + "\n")
+    code = "\n".join(blocks)
+    return {
+        "tickets": tickets,
+        "code": code,
+        "tokens": count_tokens(tickets) + count_tokens(code),
+        "full": full,
+        "outlined": outlined,
+        "omitted": omitted
+    }
@@ -0,0 +1,98 @@
+import os
+import asyncio
+from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.callbacks.manager import adispatch_custom_event
+from agents.senior_dev.context import (
+    REVIEW_TOKEN_BUDGET, TICKET_BUDGET_SHARE, count_tokens, truncate, rank_files, format_ticket_context
+)
+from core.snapshot import CODE_EXTENSIONS
+
+# --- CONFIG ---
+# Switch to per-file reviews once the code no longer fits one prompt
+REVIEW_MAP_REDUCE_THRESHOLD = int(os.getenv("REVIEW_MAP_REDUCE_THRESHOLD", str(REVIEW_TOKEN_BUDGET)))
+REVIEW_MAP_CONCURRENCY = int(os.getenv("REVIEW_MAP_CONCURRENCY", "4"))
+REVIEW_MAP_MAX_FILES = int(os.getenv("REVIEW_MAP_MAX_FILES", "12"))
+REVIEW_FILE_TOKEN_BUDGET = int(os.getenv("REVIEW_FILE_TOKEN_BUDGET", "6000"))
+# LangGraph's convention for "don't stream this model's tokens"; per-file notes would interleave
+NOSTREAM = {"tags": ["nostream"]}
+
+def should_map_reduce(snapshot):
+    code = [text for path, text in (snapshot.get("blobs") or {}).items() if path.endswith(CODE_EXTENSIONS)]
+    return len(code) > 1 and sum(count_tokens(text) for text in code) > REVIEW_MAP_REDUCE_THRESHOLD
+
+def build_file_prompt(sprint_tasks, path, code):
+    return f"""You are a Senior Software Engineer reviewing ONE file of a larger submission.
+
+    === THE ASSIGNMENT ===
+    {sprint_tasks}
+
+    === FILE: {path} ===
+    {code}
+
+    ### INSTRUCTIONS:
+    1. List which tickets this file works towards, if any.
+    2. List concrete bugs, missing pieces and code smells, most serious first. Max 6 bullets.
+    3. End with one line: "FILE VERDICT: OK" or "FILE VERDICT: NEEDS WORK".
+    Be terse; another engineer will merge your notes with the other files'.
+    """
+
+def build_reduce_prompt(sprint_tasks, file_reviews, unreviewed):
+    notes = "\n\n".join(f"--- {path} ---\n{review}" for path, review in file_reviews)
+    skipped = f"\n    (Not reviewed individually: {', '.join(unreviewed)})" if unreviewed else ""
+    return f"""You are a Senior Software Engineer. Your team reviewed the submission file by file.
+
+    === THE ASSIGNMENT ===
+    {sprint_tasks}
+
+    === PER-FILE REVIEW NOTES ===
+    {notes}{skipped}
+
+    ### INSTRUCTIONS:
+    1. Judge the submission as a whole against the Assignment, using the notes.
+    2. If the code meets the requirements, start your response with "**STATUS: APPROVED**".
+    3. If APPROVED, generate a "Resume Boost" section at the bottom.
+       - "Resume Bullet Point: Built a [Project Name] using [Tech Stack] that [Key Feature]."
+    4. If REJECTED, roast them professionally, citing files.
+    """
+
+async def _dispatch(name, data):
+    try:
+        await adispatch_custom_event(name, data)
+    except RuntimeError:
+        pass  # Not running inside a graph (e.g. debug_agents.py); nobody to tell
+
+async def amap_reduce_review(llm, snapshot):
+    """
+    Reviews the most relevant files concurrently (at most REVIEW_MAP_CONCURRENCY
+    calls in flight), emitting a "file_reviewed" custom event as each finishes,
+    then merges the notes into the final verdict with one reduce call.
+    """
+    issues = snapshot.get("issues") or []
+    sprint_tasks = format_ticket_context(issues, int(REVIEW_TOKEN_BUDGET * TICKET_BUDGET_SHARE))
+    ranked = rank_files(snapshot["blobs"], issues, snapshot.get("target"))
+    selected, unreviewed = ranked[:REVIEW_MAP_MAX_FILES], ranked[REVIEW_MAP_MAX_FILES:]
+    print(f"🗂️ Map-reduce review: {len(selected)} files, {REVIEW_MAP_CONCURRENCY} at a time")
+
+    limit = asyncio.Semaphore(REVIEW_MAP_CONCURRENCY)
+    done = 0
+
+    async def review_file(path):
+        nonlocal done
+        code = truncate(snapshot["blobs"][path], REVIEW_FILE_TOKEN_BUDGET)
+        async with limit:
+            response = await llm.ainvoke([
+                SystemMessage(content=build_file_prompt(sprint_tasks, path, code)),
+                HumanMessage(content="Review this file.")
+            ], config=NOSTREAM)
+        done += 1
+        await _dispatch("file_reviewed", {"path": path, "review": response.content, "done": done, "total": len(selected)})
+        return path, response.content
+
+    # Keep ranking order in the reduce prompt, whatever order the calls finish in
+    file_reviews = await asyncio.gather(*(review_file(path) for path in selected))
+
+    response = await llm.ainvoke([
+        SystemMessage(content=build_reduce_prompt(sprint_tasks, file_reviews, unreviewed)),
+        HumanMessage(content="Here is my PR. Review it.")
+    ])
+    return response.content
@@ -1,70 +1,25 @@
-import os
-import requests
+import asyncio
 import json
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
-from dotenv import load_dotenv
-
-load_dotenv()
+from core.llm import get_llm
+from core.github import github, parse_repo_url
+from core.snapshot import ensure_snapshot
+from core.review_cache import mark_posted
+from agents.senior_dev.context import pack_context
+from agents.senior_dev.map_reduce import should_map_reduce, amap_reduce_review
 
 # --- CONFIG ---
-api_key = os.getenv("GOOGLE_API_KEY")
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-HEADERS = {
-    "Authorization": f"token {GITHUB_TOKEN}", 
-    "Accept": "application/vnd.github.v3+json"
-}
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=api_key,
-    temperature=0.3
-)
-
-# --- HELPER 1: FETCH CODE ---
-def get_code_from_github(repo_url):
-    try:
-        clean_url = repo_url.rstrip("/")
-        parts = clean_url.split("/")
-        owner, repo = parts[-2], parts[-1]
-        
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/contents"
-        response = requests.get(api_url, headers=HEADERS)
-        
-        if response.status_code != 200: return "ERROR_ACCESS", None, None
-
-        files = response.json()
-        target_file = None
-        
-        # Priority Search
-        if isinstance(files, list):
-            for f in files:
-                if f["name"].endswith(".py") or f["name"].endswith(".js") or f["name"].endswith(".html"):
-                    target_file = f
-                    break
-        
-        if not target_file: return "NO_CODE", owner, repo
+# Model clients are shared process-wide; see core/llm.py
+TEMPERATURE = 0.3
 
-        return requests.get(target_file["download_url"]).text, owner, repo
-    except Exception as e:
-        return f"ERROR: {str(e)}", None, None
+# --- HELPER 1: FORMAT TICKETS ---
+def format_tickets(issues):
+    summary = [f"- Ticket #{i['number']}: {i['title']}" for i in issues]
+    return "\n".join(summary) if summary else "No open tickets found."
 
-# --- HELPER 2: FETCH TICKETS ---
-def get_open_issues(owner, repo):
-    try:
-        url = f"https://api.github.com/repos/{owner}/{repo}/issues?state=open"
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            issues = response.json()
-            summary = [f"- Ticket #{i['number']}: {i['title']}" for i in issues]
-            return "\n".join(summary) if summary else "No open tickets found."
-        return "Could not fetch issues."
-    except:
-        return "Error fetching issues."
-
-# --- HELPER 3: POST REVIEW ---
-def post_github_review(owner, repo, review_content):
-    url = f"https://api.github.com/repos/{owner}/{repo}/issues"
+# --- HELPER 2: POST REVIEW ---
+async def post_github_review(owner, repo, review_content):
+    url = f"/repos/{owner}/{repo}/issues"
     
     title = "⚠️ Code Review: Needs Improvement"
     if "APPROVED" in review_content.upper():
@@ -75,27 +30,11 @@ def post_github_review(owner, repo, review_content):
         "body": f"## Senior Developer Feedback\n\n{review_content}\n\n---\n*Generated by Shadow Workplace AI*"
     }
     
-    requests.post(url, json=payload, headers=HEADERS)
+    await github.post(url, json=payload)
 
 # --- MAIN NODE ---
-def senior_dev_node(state):
-    print("--- SENIOR DEV AGENT STARTED ---")
-    repo_url = state.get("repo_url", "")
-    
-    if not repo_url: return {"messages": ["❌ Error: No Repo URL provided."]}
-
-    # 1. Fetch Code & Requirements
-    code_result, owner, repo = get_code_from_github(repo_url)
-    
-    if code_result == "NO_CODE":
-        return {"messages": ["⚠️ Repo is empty. Push some code first!"]}
-    elif "ERROR" in code_result:
-        return {"messages": [f"⚠️ Connection Error: {code_result}"]}
-
-    sprint_tasks = get_open_issues(owner, repo)
-
-    # 2. AI Analysis
-    system_prompt = f"""You are a Senior Software Engineer. 
+def build_review_prompt(sprint_tasks, code_result):
+    return f"""You are a Senior Software Engineer. 
     
     === THE ASSIGNMENT ===
     {sprint_tasks}
@@ -110,19 +49,84 @@ def senior_dev_node(state):
        - "Resume Bullet Point: Built a [Project Name] using [Tech Stack] that [Key Feature]."
     4. If REJECTED, roast them professionally.
     """
+
+async def adraft_review_node(state):
+    """Writes the review for the snapshot against the open tickets. Nothing is posted yet."""
+    print("--- SENIOR DEV AGENT STARTED ---")
+    repo_url = state.get("repo_url", "")
+    
+    if not repo_url: return {"messages": ["❌ Error: No Repo URL provided."]}
+
+    # 1. Read Code & Requirements from the shared snapshot
+    snapshot = await ensure_snapshot(state)
+    
+    if snapshot.get("error"):
+        return {"messages": [f"⚠️ Connection Error: {snapshot['error']}"]}
+    elif not snapshot.get("target"):
+        return {"messages": ["⚠️ Repo is empty. Push some code first!"]}
+
+    # Too big for one prompt: review file by file, then merge
+    if should_map_reduce(snapshot):
+        try:
+            return {"draft_review": await amap_reduce_review(get_llm(TEMPERATURE), snapshot)}
+        except Exception as e:
+            return {"messages": [f"❌ Senior Dev AI Error: {str(e)}"]}
+
+    # Most relevant files in full, the rest as outlines, within REVIEW_TOKEN_BUDGET
+    context = pack_context(snapshot)
+    print(f"📦 Review context ~{context['tokens']} tokens: {len(context['full'])} full, "
+          f"{len(context['outlined'])} outlined, {len(context['omitted'])} omitted")
+
+    # 2. AI Analysis
+    system_prompt = build_review_prompt(context["tickets"], context["code"])
     
     try:
-        response = llm.invoke([
+        response = await get_llm(TEMPERATURE).ainvoke([
             SystemMessage(content=system_prompt),
             HumanMessage(content="Here is my PR. Review it.")
         ])
-        
-        review_text = response.content
+        return {"draft_review": response.content}
 
-        # 3. Post to GitHub
-        post_github_review(owner, repo, review_text)
-        
-        return {"messages": [review_text]}
+    except Exception as e:
+        return {"messages": [f"❌ Senior Dev AI Error: {str(e)}"]}
 
+async def apublish_review_node(state):
+    """
+    Posts the drafted review as an issue and sets the verdict. No-op if drafting failed.
+    With publish=False (a pre-review on push) the verdict is set but nothing is posted.
+    """
+    review_text = state.get("draft_review")
+    if not review_text: return {}
+    review_status = "approved" if "APPROVED" in review_text.upper() else "changes_requested"
+    if not state.get("publish", True):
+        return {"messages": [review_text], "review_status": review_status, "posted": False}
+
+    snapshot = await ensure_snapshot(state)
+    try:
+        await post_github_review(snapshot["owner"], snapshot["repo"], review_text)
     except Exception as e:
-        return {"messages": [f"❌ Senior Dev AI Error: {str(e)}"]}
\ No newline at end of file
+        print(f"⚠️ Could not post review: {e}")
+
+    return {"messages": [review_text], "review_status": review_status, "posted": True}
+
+async def adeliver_review_node(state):
+    """Posts a review pre-computed on push, now that its commit was submitted. Left unposted if GitHub fails."""
+    print("--- DELIVERING PRE-COMPUTED REVIEW ---")
+    owner, repo = parse_repo_url(state["repo_url"])
+    try:
+        await post_github_review(owner, repo, state["messages"][0])
+    except Exception as e:
+        print(f"⚠️ Could not post review: {e}")
+        return {}
+    await mark_posted(owner, repo, state["head_sha"])
+    return {"posted": True}
+
+async def asenior_dev_node(state):
+    """Draft + publish in one step, for running the Senior Dev on its own."""
+    state = {**state, "snapshot": await ensure_snapshot(state)}
+    draft = await adraft_review_node(state)
+    if "draft_review" not in draft: return draft
+    return await apublish_review_node({**state, **draft})
+
+def senior_dev_node(state):
+    return asyncio.run(asenior_dev_node(state))
@@ -16,8 +16,8 @@ def create_api_router(graph: Any):  # <--- CHANGED: graph: Any (instead of Compi
         # Note: We ensure messages is a list as expected by AgentState
         initial_state = {"messages": [request.prompt]}
         
-        # Run the graph synchronously
-        result = graph.invoke(initial_state)
+        # Await the graph so slow nodes don't block the event loop
+        result = await graph.ainvoke(initial_state)
         
         return {"status": "success", "result": result}
 
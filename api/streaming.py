@@ -0,0 +1,89 @@
+import json
+
+# --- SERVER SIDE ---
+def _jsonable(value):
+    # Typed state (e.g. the setup Plan) is sent as its fields
+    if hasattr(value, "model_dump"): return value.model_dump()
+    return str(value)
+
+def format_sse(event, data):
+    """One Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=_jsonable)}\n\n"
+
+async def graph_events(graph, initial_state, token_nodes=(), hidden_fields=("snapshot", "draft_review", "provisioning_id"), config=None, held_nodes=None):
+    """
+    Runs a compiled graph and yields SSE frames as it goes:
+
+      node_started / node_finished  for every graph node
+      token                         for every LLM chunk emitted inside `token_nodes`
+                                    (models tagged "nostream" are skipped)
+      <custom name>                 for every adispatch_custom_event, e.g. file_reviewed
+      result                        once, with the final state (minus `hidden_fields`)
+      error                         if the run raises
+
+    `held_nodes` maps a node to a custom event name: the node's token and custom
+    frames are held back until it dispatches that event, and dropped if it
+    finishes without it (e.g. a speculative draft the scan then blocked).
+
+    Nodes don't need to call the model with .astream(): under astream_events an
+    .ainvoke() call is streamed through the callback system automatically.
+    """
+    held_nodes = held_nodes or {}
+    held = {node: [] for node in held_nodes}
+    try:
+        async for event in graph.astream_events(initial_state, config, version="v2"):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+            frame = None
+
+            if kind == "on_chat_model_stream" and node in token_nodes:
+                if "nostream" in event.get("tags", []): continue
+                text = event["data"]["chunk"].content
+                if text: frame = format_sse("token", {"node": node, "text": text})
+
+            elif kind == "on_custom_event":
+                frame = format_sse(event["name"], {"node": node, **(event["data"] or {})})
+                if node in held and event["name"] == held_nodes[node]:
+                    yield frame
+                    for frame in held.pop(node): yield frame
+                    continue
+
+            elif kind in ("on_chain_start", "on_chain_end") and node and event["name"] == node:
+                started = kind == "on_chain_start"
+                if started and node in held_nodes: held[node] = []
+                if not started and held.pop(node, None): print(f"🗑️ Held back {node} output that was never released")
+                yield format_sse("node_started" if started else "node_finished", {"node": node})
+
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                output = event["data"].get("output") or {}
+                yield format_sse("result", {k: v for k, v in output.items() if k not in hidden_fields})
+
+            if frame is None: continue
+            if node in held: held[node].append(frame)
+            else: yield frame
+
+    except Exception as e:
+        yield format_sse("error", {"message": str(e)})
+
+def final_result(frames):
+    """The `result` payload of a graph_events run, from its frames; an `error` frame is raised."""
+    result = None
+    for event, data in iter_sse("".join(frames).split("\n")):
+        if event == "error": raise RuntimeError(data["message"])
+        if event == "result": result = data
+    return result
+
+# --- CLIENT SIDE ---
+def iter_sse(lines):
+    """Parses decoded SSE lines (e.g. requests' iter_lines) into (event, data) pairs."""
+    event, data = "message", []
+    for line in lines:
+        if line is None: continue
+        if line == "":
+            if data: yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+    if data: yield event, json.loads("\n".join(data))
@@ -2,9 +2,24 @@ import streamlit as st
 import requests
 import re
 import time
+from api.streaming import iter_sse
 
 # --- CONFIG ---
 API_URL = "http://127.0.0.1:8000"
+# Progress labels for the streamed graph events
+NODE_LABELS = {
+    "manager": "🤖 Manager AI is scoping the project...",
+    "repo": "🏗️ DevOps is creating your repository...",
+    "devops": "⚙️ DevOps is provisioning your repository...",
+    "resolve": "📌 Finding your latest commit...",
+    "cache_lookup": "⚡ Checking for a previous verdict...",
+    "snapshot": "📸 Fetching your repository...",
+    "security": "🔍 Security Agent scanning...",
+    "screen": "🔍 Security scan + 🧠 Senior Dev review in parallel...",
+    "senior_dev": "🧠 Senior Dev reviewing...",
+    "publish": "📝 Posting the review...",
+    "deliver": "📝 Posting the review prepared when you pushed...",
+}
 st.set_page_config(
     page_title="Shadow Workplace", 
     page_icon="🏢", 
@@ -143,13 +158,21 @@ if not st.session_state.repo_url:
         start_btn = st.button("🚀 Start Simulation", use_container_width=True)
 
     if start_btn and job_prompt:
-        with st.spinner("🤖 Manager AI is scoping the project..."):
+        with st.status("🤖 Manager AI is scoping the project...", expanded=True) as status:
             try:
-                resp = requests.post(f"{API_URL}/agent/start_job", json={"prompt": job_prompt})
-                data = resp.json()
+                resp = requests.post(f"{API_URL}/agent/start_job/stream", json={"prompt": job_prompt}, stream=True)
+                data = {}
+                for event, payload in iter_sse(resp.iter_lines(decode_unicode=True)):
+                    if event == "node_started" and payload["node"] in NODE_LABELS:
+                        status.update(label=NODE_LABELS[payload["node"]])
+                        st.write(NODE_LABELS[payload["node"]])
+                    elif event == "result":
+                        data = payload
+                    elif event == "error":
+                        raise RuntimeError(payload["message"])
                 
                 msgs = data.get("messages", [])
-                last_msg = msgs[-1]
+                last_msg = msgs[-1] if msgs else ""
                 
                 # Regex to find repo URL
                 url_match = re.search(r'(https://github\.com/[^\s]+)', last_msg)
@@ -160,8 +183,10 @@ if not st.session_state.repo_url:
                     st.session_state.job_history.append(f"{job_prompt} - {st.session_state.repo_url}")
                     st.rerun()
                 else:
+                    status.update(label="Provisioning failed", state="error")
                     st.error("Failed to provision workspace. Please try again.")
             except Exception as e:
+                status.update(label="Connection error", state="error")
                 st.error(f"Connection Error: {e}")
 
 # --- PHASE 2: WORKSPACE (If hired) ---
@@ -193,11 +218,36 @@ else:
     st.subheader("3. Code Review")
     
     if st.button("📢 Submit Work for Review", type="primary"):
-        with st.spinner("🔍 Security Agent scanning... 🧠 Senior Dev reviewing..."):
+        with st.status("🔍 Security Agent scanning... 🧠 Senior Dev reviewing...", expanded=True) as status:
+            try:
+                # Stream the run: progress labels per node, the review text token by token
+                resp = requests.post(f"{API_URL}/agent/review_code/stream", json={"repo_url": st.session_state.repo_url}, stream=True)
+                data, streamed = {}, ""
+                live_review = st.empty()
+                for event, payload in iter_sse(resp.iter_lines(decode_unicode=True)):
+                    if event == "node_started" and payload["node"] in NODE_LABELS:
+                        status.update(label=NODE_LABELS[payload["node"]])
+                    elif event == "token":
+                        streamed += payload["text"]
+                        live_review.markdown(streamed)
+                    elif event == "file_reviewed":
+                        # Large submissions are reviewed file by file before the final verdict
+                        status.update(label=f"🧠 Reviewed {payload['done']}/{payload['total']} files...")
+                        with st.expander(f"📄 {payload['path']}"):
+                            st.markdown(payload["review"])
+                    elif event == "result":
+                        data = payload
+                    elif event == "error":
+                        raise RuntimeError(payload["message"])
+                live_review.empty()
+                status.update(label="Review complete", state="complete", expanded=False)
+            except Exception as e:
+                data = None
+                status.update(label="Review failed", state="error")
+                st.error(f"Review System Error: {e}")
+
+        if data is not None:
             try:
-                resp = requests.post(f"{API_URL}/agent/review_code", json={"repo_url": st.session_state.repo_url})
-                data = resp.json()
-                
                 security_status = data.get("security_status", "clean")
                 review_msg = data.get("messages", ["No response"])[0]
 
@@ -0,0 +1,149 @@
+"""
+Requests/sec for the real /agent/review_code with a blocked vs. free event loop.
+
+Drives main.app in-process (httpx ASGI transport) against the offline fakes
+from bench_load.py: benchmarks/fake_github.py on a local port and
+benchmarks/fake_llm.py behind core.llm.set_llm_override. Every request runs
+the whole review graph (snapshot, scan, draft, publish) on its own seeded
+repository, with the review cache and the quota governor off.
+
+  * before: each review runs to completion while the event loop waits on it,
+            as when the handler called the sync graph.invoke (one private
+            loop per review, in a worker thread the handler blocks on)
+  * after:  the handler awaits graph.ainvoke, as it does now
+
+While the reviews run, a probe polls GET /agent/cache/stats; its latency
+shows how long other requests queue behind a blocked loop.
+
+Usage:
+    python benchmarks/bench_async.py --clients 50 --requests 100 --gh-latency 0.05
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load import SEED_FILES, SEED_ISSUES, drive, free_port, percentile, serve_in_thread  # noqa: E402
+from fake_github import FakeGitHub  # noqa: E402
+from fake_llm import FakeChatModel  # noqa: E402
+
+
+def blocking(run_review, github):
+    """run_review as the pre-async handler ran it: the event loop is stuck until the review is done."""
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    def once(initial_state, idempotency_key):
+        async def review():
+            try:
+                return await run_review(initial_state, idempotency_key)
+            finally:
+                await github.aclose()  # This loop's connection pool dies with it
+        return asyncio.run(review())
+
+    async def run(initial_state, idempotency_key=None):
+        return pool.submit(once, initial_state, idempotency_key).result()
+
+    return run
+
+
+async def probe(shadow, interval, samples, stop):
+    transport = httpx.ASGITransport(app=shadow.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            await client.get("/agent/cache/stats")
+            samples.append(time.perf_counter() - start)
+            await asyncio.sleep(interval)
+
+
+async def measure(shadow, repo_urls, args):
+    urls = itertools.cycle(repo_urls)
+
+    async def review(client):
+        resp = await client.post("/agent/review_code", json={"repo_url": next(urls)})
+        return resp.status_code == 200 and bool(resp.json().get("messages"))
+
+    probes, stop = [], asyncio.Event()
+    prober = asyncio.create_task(probe(shadow, args.probe_interval, probes, stop))
+    latencies, errors, elapsed = await drive(shadow, review, args.clients, args.requests)
+    stop.set()
+    await prober
+    return latencies, errors, elapsed, probes
+
+
+async def run(shadow, fake, args):
+    await shadow.start_job_workers()
+    results = {}
+    try:
+        original = shadow.run_review
+        for label, mode in (("before (blocking)", "before"), ("after (ainvoke)", "after")):
+            # Fresh repos per mode, one per client, so no run is coalesced or served from a cache
+            repo_urls = [fake.seed_repo(f"bench-{mode}-{i}", SEED_FILES, SEED_ISSUES)["html_url"] for i in range(args.clients)]
+            shadow.run_review = blocking(original, shadow.github) if mode == "before" else original
+            latencies, errors, elapsed, probes = await measure(shadow, repo_urls, args)
+            results[label] = args.requests / elapsed
+            print(f"{label:<18} {elapsed:7.2f} s  {results[label]:7.1f} req/s  "
+                  f"p50 {percentile(latencies, 50) * 1000:6.0f} ms  p95 {percentile(latencies, 95) * 1000:6.0f} ms  "
+                  f"probe p95 {percentile(probes, 95) * 1000:6.0f} ms  errors {errors}")
+        shadow.run_review = original
+    finally:
+        await shadow.close_github_pool()
+
+    before, after = results.values()
+    print(f"speedup: {after / before:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--gh-latency", type=float, default=0.05, help="seconds per fake GitHub call")
+    parser.add_argument("--gh-jitter", type=float, default=0.02, help="extra random seconds per GitHub call")
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.005, help="seconds between fake LLM tokens")
+    parser.add_argument("--review-tokens", type=int, default=200)
+    parser.add_argument("--probe-interval", type=float, default=0.05, help="seconds between stats probes")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.gh_latency, args.gh_jitter)
+    port = free_port()
+    serve_in_thread(fake.app, port)
+
+    # Must be in place before main.py (and core.github) read their config
+    workdir = tempfile.mkdtemp(prefix="shadow-bench-")
+    os.environ.update({
+        "GITHUB_API_URL": f"http://127.0.0.1:{port}",
+        "GITHUB_TOKEN": "bench-token",
+        "GOOGLE_API_KEY": "bench-key",
+        "SHADOW_CACHE_DB": os.path.join(workdir, "cache.sqlite3"),
+        "SHADOW_CHECKPOINT_DB": os.path.join(workdir, "checkpoints.sqlite3"),
+        "REVIEW_CACHE_ENABLED": "0",
+        "QUOTA_ENABLED": "0",
+        "WARM_UP_ON_STARTUP": "0",
+    })
+
+    import main as shadow
+    from core.llm import set_llm_override
+
+    set_llm_override(FakeChatModel(
+        first_token_latency=args.first_token_latency,
+        token_latency=args.token_latency,
+        review_tokens=args.review_tokens
+    ))
+
+    print(f"{args.requests} reviews, {args.clients} concurrent clients, fake GitHub on :{port} "
+          f"({args.gh_latency * 1000:.0f} ms), first LLM token after {args.first_token_latency * 1000:.0f} ms")
+    asyncio.run(run(shadow, fake, args))
+
+
+if __name__ == "__main__":
+    main()
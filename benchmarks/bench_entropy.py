@@ -0,0 +1,134 @@
+"""
+Entropy detector throughput on the scanner's synthetic corpus.
+
+Builds --size-mb of Python-like source (benchmarks/bench_scanner.py), plants
+one random base64 or hex token per --secret-every files, then runs
+agents.security.entropy.find_high_entropy over it in SCAN_BATCH_BYTES batches
+(as the scanner does) and reports MB/s, plus the same candidates scored with
+a per-character Python loop on --naive-mb of it for comparison.
+
+The synthetic corpus only measures recall, so the detector is also run over
+real code (--real-source, default: this interpreter's standard library) and
+every finding there is reported as a false positive, split into test suites
+and everything else.
+
+Usage:
+    python benchmarks/bench_entropy.py --size-mb 100
+    python benchmarks/bench_entropy.py --real-source ~/src/django --show 20
+"""
+import argparse
+import math
+import os
+import random
+import re
+import string
+import sys
+import sysconfig
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_scanner import build_corpus  # noqa: E402
+from agents.security import entropy  # noqa: E402
+from agents.security.scanner import _batches  # noqa: E402
+
+CANDIDATE = re.compile(r"[A-Za-z0-9+/_\-]{%d,%d}" % (entropy.ENTROPY_MIN_LENGTH, entropy.ENTROPY_MAX_LENGTH))
+
+
+def plant_tokens(blobs, every, seed=11):
+    rng = random.Random(seed)
+    planted = 0
+    for i, path in enumerate(list(blobs)):
+        if i % every: continue
+        if rng.random() < 0.5:
+            token = "".join(rng.choices(string.ascii_letters + string.digits + "+/", k=40))
+        else:
+            token = "".join(rng.choices("0123456789abcdef", k=48))
+        lines = blobs[path].split("\n")
+        lines.insert(rng.randrange(len(lines)), f"client_secret = '{token}'")
+        blobs[path] = "\n".join(lines)
+        planted += 1
+    return planted
+
+
+def load_source(root):
+    blobs = {}
+    for directory, _, names in os.walk(root):
+        if "site-packages" in directory: continue
+        for name in names:
+            if not name.endswith(".py"): continue
+            path = os.path.join(directory, name)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                blobs[os.path.relpath(path, root)] = f.read()
+    return blobs
+
+
+def false_positives(root, show):
+    blobs = load_source(root)
+    mb = sum(len(text) for text in blobs.values()) / (1024 * 1024)
+    start = time.perf_counter()
+    found = [hit for batch in _batches(blobs) for hit in entropy.find_high_entropy(batch)]
+    elapsed = time.perf_counter() - start
+    in_tests = [hit for hit in found if entropy.TEST_PATH.search(hit[0])]
+    other = [hit for hit in found if not entropy.TEST_PATH.search(hit[0])]
+    print(f"real source: {root}: {len(blobs)} files, {mb:.1f} MB, {mb / elapsed:.1f} MB/s")
+    for label, hits in (("outside tests", other), ("in test suites", in_tests)):
+        print(f"  false positives {label:<15} {len(hits):5} findings in {len({hit[0] for hit in hits})} files")
+    for path, line, _, token, charset in (other + in_tests)[:show]:
+        print(f"    {path}:{line} {charset} {token[:48]}")
+
+
+def naive_entropy(text):
+    counts = Counter(text)
+    return -sum(c / len(text) * math.log2(c / len(text)) for c in counts.values())
+
+
+def naive_scan(blobs):
+    """Every candidate token scored one character at a time: the baseline the detector replaces."""
+    hits = 0
+    for text in blobs.values():
+        for match in CANDIDATE.finditer(text):
+            token = match.group()
+            if not any(c.isdigit() for c in token) or not any(c.isalpha() for c in token): continue
+            threshold = entropy.HEX_THRESHOLD if all(c in string.hexdigits for c in token) else entropy.BASE64_THRESHOLD
+            if naive_entropy(token) >= min(threshold, entropy.LENGTH_FACTOR * math.log2(len(token))): hits += 1
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--file-kb", type=int, default=32)
+    parser.add_argument("--secret-every", type=int, default=50)
+    parser.add_argument("--naive-mb", type=int, default=5, help="corpus share scored by the pure-Python baseline")
+    parser.add_argument("--real-source", default=sysconfig.get_paths()["stdlib"], help="tree of .py files with no secrets")
+    parser.add_argument("--show", type=int, default=10, help="false positives to print")
+    args = parser.parse_args()
+
+    if args.real_source: false_positives(args.real_source, args.show)
+
+    blobs, total, _ = build_corpus(args.size_mb, args.file_kb, 10 ** 9)
+    planted = plant_tokens(blobs, args.secret_every)
+    mb = sum(len(text) for text in blobs.values()) / (1024 * 1024)
+    print(f"corpus: {len(blobs)} files, {mb:.1f} MB, {planted} planted tokens")
+
+    start = time.perf_counter()
+    found = [hit for batch in _batches(blobs) for hit in entropy.find_high_entropy(batch)]
+    elapsed = time.perf_counter() - start
+    print(f"{'numpy':<10} {elapsed:7.2f} s  {mb / elapsed:7.1f} MB/s  {len(found)} findings ({planted} planted)")
+
+    sample, size = {}, 0
+    for path, text in blobs.items():
+        if size >= args.naive_mb * 1024 * 1024: break
+        sample[path] = text
+        size += len(text)
+    start = time.perf_counter()
+    hits = naive_scan(sample)
+    elapsed = time.perf_counter() - start
+    print(f"{'naive':<10} {elapsed:7.2f} s  {size / (1024 * 1024) / elapsed:7.1f} MB/s  {hits} findings (first {size / (1024 * 1024):.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
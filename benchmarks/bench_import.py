@@ -0,0 +1,82 @@
+"""
+Cold-start cost of `import main`, measured with `python -X importtime`.
+
+Runs three fresh interpreters:
+
+  * baseline: python -c pass, i.e. interpreter startup (subtracted out)
+  * lazy:     import main, what a worker pays before it can serve
+  * eager:    import main + core.registry.warm_up(), i.e. every agent, graph
+              and the Gemini SDK, which is what importing main used to cost
+
+and reports the cumulative import time of each plus the slowest top-level
+packages pulled in by the eager run.
+
+Usage:
+    python benchmarks/bench_import.py --runs 5 --top 10
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = {
+    "baseline": "pass",
+    "lazy": "import main",
+    "eager": "import main; from core.registry import warm_up; warm_up()",
+}
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run(code):
+    """(wall seconds, {top-level module: cumulative microseconds}) for one fresh interpreter."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "WARM_UP_ON_STARTUP": "0"}
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise SystemExit(f"`{code}` failed:\n{proc.stderr[-2000:]}")
+    top = {}
+    for match in LINE.finditer(proc.stderr):
+        cumulative, indent, module = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1: top[module] = top.get(module, 0) + cumulative
+    return wall, top
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        walls, imports = [], []
+        for _ in range(args.runs):
+            wall, top = run(code)
+            walls.append(wall)
+            imports.append(sum(top.values()) / 1e6)
+        results[name] = (statistics.median(walls), statistics.median(imports), top)
+
+    base_wall = results["baseline"][0]
+    print(f"{args.runs} runs each, median")
+    print(f"{'scenario':<10} {'wall':>9} {'imports':>9}")
+    for name in ("lazy", "eager"):
+        wall, imports, _ = results[name]
+        print(f"{name:<10} {wall - base_wall:8.2f}s {imports:8.2f}s")
+    lazy, eager = results["lazy"][1], results["eager"][1]
+    print(f"lazy import is {eager / lazy:.1f}x faster ({eager - lazy:.2f}s saved per cold start)")
+
+    print("\nslowest top-level imports (eager run):")
+    for module, micros in sorted(results["eager"][2].items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {module:<40} {micros / 1e6:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
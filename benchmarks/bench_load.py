@@ -0,0 +1,197 @@
+"""
+Offline load test for main.py: latency percentiles, throughput and outbound
+calls per request, with no real GitHub or Gemini traffic.
+
+Starts benchmarks/fake_github.py on a local port, points the app's GitHub
+client at it via GITHUB_API_URL, routes every model call to
+benchmarks/fake_llm.py (core.llm.set_llm_override), then drives the app
+in-process (httpx ASGI transport):
+
+  * setup:  POST /agent/start_job, then poll /agent/jobs/{id} until it finishes
+  * review: POST /agent/review_code against a seeded repository
+
+The review and plan caches are off unless --warm-caches is given, so every
+request does the full amount of work. App settings such as
+GITHUB_CONTENT_SPACING or JOB_WORKERS are read from the environment as usual.
+
+Usage:
+    python benchmarks/bench_load.py --endpoint both --concurrency 20 --requests 100
+    python benchmarks/bench_load.py --endpoint review --gh-latency 0.1 --rate-limit 500 --rate-window 60
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_github import FakeGitHub  # noqa: E402
+from fake_llm import FakeChatModel  # noqa: E402
+
+SEED_FILES = {
+    "main.py": "\n".join(
+        [f"def handler_{i}(request):\n    return {{'id': {i}, 'ok': True}}\n" for i in range(40)]
+        + ["if __name__ == '__main__':\n    handler_0(None)\n"]
+    ),
+    "utils.py": "import os\n\nAPI_URL = os.getenv('API_URL', 'http://localhost:8000')\n",
+    "requirements.txt": "fastapi\nuvicorn\n",
+    "README.md": "# Bench Repo\n",
+}
+SEED_ISSUES = [(f"🧱 Mission {i}: Bench Task", f"**Objective:** Implement step {i}.") for i in range(1, 4)]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+# --- CLIENTS ---
+async def run_setup(client, poll_interval):
+    resp = await client.post("/agent/start_job", json={"prompt": "Backend Intern for a Fintech App"},
+                             headers={"Idempotency-Key": uuid.uuid4().hex})
+    if resp.status_code != 202: return False
+    status_url = resp.json()["status_url"]
+    while True:
+        await asyncio.sleep(poll_interval)
+        job = (await client.get(status_url)).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job["status"] == "succeeded"
+
+
+async def run_review(client, repo_url):
+    resp = await client.post("/agent/review_code", json={"repo_url": repo_url})
+    return resp.status_code == 200 and bool(resp.json().get("messages"))
+
+
+async def drive(shadow, call, concurrency, total):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+
+    transport = httpx.ASGITransport(app=shadow.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                try:
+                    ok = await call(client)
+                except Exception as e:
+                    print(f"⚠️ Request failed: {e!r}")
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                if not ok: errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+
+def report(label, total, latencies, errors, elapsed, gh_calls, llm):
+    print(f"\n=== {label}: {total} requests ===")
+    print(f"errors      {errors}")
+    print(f"throughput  {total / elapsed:8.2f} req/s  ({elapsed:.2f} s)")
+    for p in (50, 95, 99):
+        print(f"p{p:<10} {percentile(latencies, p) * 1000:8.0f} ms")
+    print(f"GitHub      {sum(gh_calls.values()) / total:8.1f} calls/request")
+    for route, count in gh_calls.most_common():
+        print(f"  {route:<52} {count / total:6.2f}")
+    print(f"LLM         {llm.calls / total:8.1f} calls/request, {llm.tokens / total:.0f} tokens/request")
+
+
+async def run(shadow, fake, llm, args, repo_url):
+    await shadow.start_job_workers()
+    try:
+        endpoints = {
+            "setup": lambda client: run_setup(client, args.poll_interval),
+            "review": lambda client: run_review(client, repo_url),
+        }
+        for name in (["setup", "review"] if args.endpoint == "both" else [args.endpoint]):
+            fake.calls.clear()
+            llm.calls = llm.tokens = 0
+            latencies, errors, elapsed = await drive(shadow, endpoints[name], args.concurrency, args.requests)
+            report(name, args.requests, latencies, errors, elapsed, fake.calls.copy(), llm)
+    finally:
+        await shadow.close_github_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=("setup", "review", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--gh-latency", type=float, default=0.05, help="seconds per fake GitHub call")
+    parser.add_argument("--gh-jitter", type=float, default=0.02, help="extra random seconds per GitHub call")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="GitHub calls allowed per window")
+    parser.add_argument("--rate-window", type=float, default=3600.0, help="seconds per rate-limit window")
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.005, help="seconds between fake LLM tokens")
+    parser.add_argument("--review-tokens", type=int, default=200)
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="seconds between job status polls")
+    parser.add_argument("--warm-caches", action="store_true", help="leave the review and plan caches enabled")
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.gh_latency, args.gh_jitter, args.rate_limit, args.rate_window)
+    repo_url = fake.seed_repo("bench-repo", SEED_FILES, SEED_ISSUES)["html_url"]
+    port = free_port()
+    serve_in_thread(fake.app, port)
+
+    # Must be in place before main.py (and core.github) read their config
+    cache_enabled = "1" if args.warm_caches else "0"
+    workdir = tempfile.mkdtemp(prefix="shadow-bench-")
+    os.environ.update({
+        "GITHUB_API_URL": f"http://127.0.0.1:{port}",
+        "GITHUB_TOKEN": "bench-token",
+        "GOOGLE_API_KEY": "bench-key",
+        "SHADOW_CACHE_DB": os.path.join(workdir, "cache.sqlite3"),
+        "SHADOW_CHECKPOINT_DB": os.path.join(workdir, "checkpoints.sqlite3"),
+        "REVIEW_CACHE_ENABLED": cache_enabled,
+        "PLAN_CACHE_ENABLED": cache_enabled,
+        "WARM_UP_ON_STARTUP": "0",
+    })
+
+    import main as shadow
+    from core.llm import set_llm_override
+
+    llm = FakeChatModel(
+        first_token_latency=args.first_token_latency,
+        token_latency=args.token_latency,
+        review_tokens=args.review_tokens
+    )
+    set_llm_override(llm)
+
+    print(f"fake GitHub on :{port} ({args.gh_latency * 1000:.0f} ms, {args.rate_limit}/{args.rate_window:.0f}s), "
+          f"{args.concurrency} concurrent clients")
+    asyncio.run(run(shadow, fake, llm, args, repo_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+In-memory stand-in for the slice of the GitHub REST API that Shadow Workplace uses:
+repos (create, list, generate, rename), contents, issues, tarballs and the Git
+Data API (commits, trees, refs).
+
+Every response waits `latency` seconds (plus up to `jitter`), and the server
+enforces a `rate_limit` calls per `rate_window` seconds window with the same
+X-RateLimit-* headers and 403 rejections the real API sends. Calls are counted
+per route template in `FakeGitHub.calls`.
+
+Point the app at it with GITHUB_API_URL=http://127.0.0.1:<port>; see bench_load.py.
+"""
+import io
+import base64
+import time
+import random
+import asyncio
+import hashlib
+import tarfile
+import itertools
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, PlainTextResponse
+
+
+class FakeGitHub:
+    def __init__(self, latency=0.05, jitter=0.0, rate_limit=5000, rate_window=3600.0, login="bench"):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.login = login
+        self.calls = Counter()
+        self.repos = {}      # "owner/name" -> repo record
+        self.commits = {}    # sha -> {"tree": sha, "parents": [...]}
+        self.trees = {}      # sha -> {path: content}
+        self._seq = itertools.count(1)
+        self._window_start = time.time()
+        self._window_used = 0
+        self.app = self._build_app()
+
+    # --- STATE HELPERS ---
+    def _sha(self):
+        return hashlib.sha1(str(next(self._seq)).encode()).hexdigest()
+
+    def _store_tree(self, files):
+        sha = self._sha()
+        self.trees[sha] = dict(files)
+        return sha
+
+    def _store_commit(self, tree, parents):
+        sha = self._sha()
+        self.commits[sha] = {"tree": tree, "parents": parents}
+        return sha
+
+    def _repo_json(self, repo):
+        return {
+            "name": repo["name"],
+            "full_name": f"{repo['owner']}/{repo['name']}",
+            "owner": {"login": repo["owner"]},
+            "html_url": f"https://github.com/{repo['owner']}/{repo['name']}",
+            "description": repo["description"],
+            "default_branch": "main",
+            "private": False
+        }
+
+    def _head_files(self, repo):
+        return self.trees[self.commits[repo["branches"]["main"]]["tree"]]
+
+    def seed_repo(self, name, files, issues=(), description="Shadow Workplace Simulation.", owner=None):
+        """Creates a repo with `files` ({path: text}) on main and open `issues` ([(title, body)])."""
+        owner = owner or self.login
+        head = self._store_commit(self._store_tree(files), [])
+        repo = {"owner": owner, "name": name, "description": description, "branches": {"main": head}, "issues": []}
+        self.repos[f"{owner}/{name}"] = repo
+        for title, body in issues:
+            self._add_issue(repo, title, body)
+        return self._repo_json(repo)
+
+    def _add_issue(self, repo, title, body):
+        issue = {
+            "number": len(repo["issues"]) + 1,
+            "title": title,
+            "body": body,
+            "state": "open",
+            "html_url": f"https://github.com/{repo['owner']}/{repo['name']}/issues/{len(repo['issues']) + 1}"
+        }
+        repo["issues"].append(issue)
+        return issue
+
+    def _tarball(self, repo, sha):
+        buffer = io.BytesIO()
+        prefix = f"{repo['owner']}-{repo['name']}-{sha[:7]}"
+        with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+            for path, content in sorted(self.trees[self.commits[sha]["tree"]].items()):
+                data = content.encode("utf-8")
+                info = tarfile.TarInfo(f"{prefix}/{path}")
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        return buffer.getvalue()
+
+    # --- RATE LIMIT ---
+    def _take_token(self):
+        now = time.time()
+        if now - self._window_start >= self.rate_window:
+            self._window_start, self._window_used = now, 0
+        allowed = self._window_used < self.rate_limit
+        if allowed: self._window_used += 1
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(self.rate_limit - self._window_used, 0)),
+            "X-RateLimit-Reset": str(int(self._window_start + self.rate_window))
+        }
+        return allowed, headers
+
+    # --- APP ---
+    def _build_app(self):
+        app = FastAPI()
+        gh = self
+
+        @app.middleware("http")
+        async def latency_and_limits(request: Request, call_next):
+            await asyncio.sleep(gh.latency + random.uniform(0, gh.jitter))
+            allowed, headers = gh._take_token()
+            if not allowed:
+                gh.calls["rate_limited"] += 1
+                response = JSONResponse({"message": "API rate limit exceeded"}, status_code=403)
+            else:
+                response = await call_next(request)
+                route = request.scope.get("route")
+                gh.calls[f"{request.method} {route.path if route else request.url.path}"] += 1
+            response.headers.update(headers)
+            return response
+
+        def not_found():
+            return JSONResponse({"message": "Not Found"}, status_code=404)
+
+        # Repos
+        @app.post("/user/repos")
+        async def create_repo(payload: dict):
+            key = f"{gh.login}/{payload['name']}"
+            if key in gh.repos:
+                return JSONResponse({"message": "name already exists on this account"}, status_code=422)
+            files = {"README.md": f"# {payload['name']}\n"} if payload.get("auto_init") else {}
+            created = gh.seed_repo(payload["name"], files, description=payload.get("description"))
+            return JSONResponse(created, status_code=201)
+
+        @app.get("/user/repos")
+        async def list_repos():
+            return [gh._repo_json(r) for r in gh.repos.values() if r["owner"] == gh.login]
+
+        @app.post("/repos/{owner}/{repo}/generate")
+        async def generate(owner: str, repo: str, payload: dict):
+            template = gh.repos.get(f"{owner}/{repo}")
+            if not template: return not_found()
+            created = gh.seed_repo(payload["name"], gh._head_files(template), description=payload.get("description"))
+            return JSONResponse(created, status_code=201)
+
+        @app.patch("/repos/{owner}/{repo}")
+        async def update_repo(owner: str, repo: str, payload: dict):
+            record = gh.repos.pop(f"{owner}/{repo}", None)
+            if not record: return not_found()
+            record["name"] = payload.get("name", record["name"])
+            record["description"] = payload.get("description", record["description"])
+            gh.repos[f"{owner}/{record['name']}"] = record
+            return gh._repo_json(record)
+
+        # Commits and Git Data
+        @app.get("/repos/{owner}/{repo}/commits/{ref}")
+        async def get_commit(owner: str, repo: str, ref: str):
+            record = gh.repos.get(f"{owner}/{repo}")
+            if not record: return not_found()
+            sha = record["branches"]["main"] if ref in ("HEAD", "main") else ref
+            if sha not in gh.commits: return not_found()
+            return {"sha": sha, "commit": {"tree": {"sha": gh.commits[sha]["tree"]}}}
+
+        @app.post("/repos/{owner}/{repo}/git/trees")
+        async def create_tree(owner: str, repo: str, payload: dict):
+            files = dict(gh.trees.get(payload.get("base_tree"), {}))
+            files.update({entry["path"]: entry["content"] for entry in payload["tree"]})
+            return JSONResponse({"sha": gh._store_tree(files)}, status_code=201)
+
+        @app.post("/repos/{owner}/{repo}/git/commits")
+        async def create_commit(owner: str, repo: str, payload: dict):
+            if payload["tree"] not in gh.trees: return JSONResponse({"message": "Tree not found"}, status_code=422)
+            return JSONResponse({"sha": gh._store_commit(payload["tree"], payload.get("parents", []))}, status_code=201)
+
+        @app.patch("/repos/{owner}/{repo}/git/refs/heads/{branch}")
+        async def update_ref(owner: str, repo: str, branch: str, payload: dict):
+            record = gh.repos.get(f"{owner}/{repo}")
+            if not record or payload["sha"] not in gh.commits: return not_found()
+            record["branches"][branch] = payload["sha"]
+            return {"ref": f"refs/heads/{branch}", "object": {"sha": payload["sha"]}}
+
+        # Contents
+        @app.get("/repos/{owner}/{repo}/contents")
+        async def list_contents(owner: str, repo: str):
+            record = gh.repos.get(f"{owner}/{repo}")
+            if not record: return not_found()
+            return [
+                {
+                    "type": "file", "path": path, "size": len(content),
+                    "sha": hashlib.sha1(content.encode()).hexdigest(),
+                    "download_url": f"/raw/{owner}/{repo}/{path}"
+                }
+                for path, content in sorted(gh._head_files(record).items()) if "/" not in path
+            ]
+
+        @app.get("/repos/{owner}/{repo}/contents/{path:path}")
+        async def get_content(owner: str, repo: str, path: str):
+            record = gh.repos.get(f"{owner}/{repo}")
+            files = gh._head_files(record) if record else {}
+            if path not in files: return not_found()
+            return {"type": "file", "path": path, "sha": hashlib.sha1(files[path].encode()).hexdigest()}
+
+        @app.put("/repos/{owner}/{repo}/contents/{path:path}")
+        async def put_content(owner: str, repo: str, path: str, payload: dict):
+            record = gh.repos.get(f"{owner}/{repo}")
+            if not record: return not_found()
+            files = {**gh._head_files(record), path: base64.b64decode(payload["content"]).decode("utf-8")}
+            head = record["branches"]["main"]
+            record["branches"]["main"] = gh._store_commit(gh._store_tree(files), [head])
+            return JSONResponse({"content": {"path": path}}, status_code=201)
+
+        @app.get("/raw/{owner}/{repo}/{path:path}")
+        async def raw(owner: str, repo: str, path: str):
+            record = gh.repos.get(f"{owner}/{repo}")
+            files = gh._head_files(record) if record else {}
+            if path not in files: return not_found()
+            return PlainTextResponse(files[path])
+
+        @app.get("/repos/{owner}/{repo}/tarball/{ref}")
+        async def tarball(owner: str, repo: str, ref: str):
+            record = gh.repos.get(f"{owner}/{repo}")
+            if not record: return not_found()
+            sha = record["branches"]["main"] if ref in ("HEAD", "main") else ref
+            if sha not in gh.commits: return not_found()
+            return Response(gh._tarball(record, sha), media_type="application/x-gzip")
+
+        # Issues
+        @app.get("/repos/{owner}/{repo}/issues")
+        async def list_issues(owner: str, repo: str):
+            record = gh.repos.get(f"{owner}/{repo}")
+            if not record: return not_found()
+            return [i for i in record["issues"] if i["state"] == "open"]
+
+        @app.post("/repos/{owner}/{repo}/issues")
+        async def create_issue(owner: str, repo: str, payload: dict):
+            record = gh.repos.get(f"{owner}/{repo}")
+            if not record: return not_found()
+            return JSONResponse(gh._add_issue(record, payload["title"], payload.get("body") or ""), status_code=201)
+
+        return app
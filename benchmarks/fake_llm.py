@@ -0,0 +1,81 @@
+"""
+Offline stand-in for the Gemini chat model.
+
+Answers the Manager's system prompt with a fixed project plan and everything
+else with an approving code review, emitting `review_tokens` word-sized tokens
+`token_latency` seconds apart after a `first_token_latency` delay. Both
+ainvoke() and astream() are supported, so SSE token streaming works as it
+does with the real model.
+"""
+import json
+import time
+import asyncio
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+BENCH_PLAN = {
+    "project_name": "bench-project",
+    "tickets": [
+        {"id": str(i), "title": f"🧱 Mission {i}: Bench Task", "body": f"**Objective:** Implement step {i}."}
+        for i in range(1, 4)
+    ],
+    "starter_files": [
+        {"name": "main.py", "content": "def main():\n    print('Ready')\n\nif __name__ == '__main__':\n    main()\n"},
+        {"name": "requirements.txt", "content": "fastapi\n"}
+    ]
+}
+
+
+class FakeChatModel(BaseChatModel):
+    token_latency: float = 0.01
+    first_token_latency: float = 0.2
+    review_tokens: int = 200
+    calls: int = 0
+    tokens: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-gemini"
+
+    def _reply(self, messages):
+        prompt = " ".join(str(m.content) for m in messages)
+        if "Senior Technical Mentor" in prompt:
+            return json.dumps(BENCH_PLAN)
+        filler = " ".join(["looks", "good"] * (self.review_tokens // 2))
+        return f"**STATUS: APPROVED**\n\n{filler}"
+
+    def _tokens(self, messages):
+        self.calls += 1
+        tokens = [word + " " for word in self._reply(messages).split(" ")]
+        self.tokens += len(tokens)
+        return tokens
+
+    # --- SYNC ---
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = self._tokens(messages)
+        time.sleep(self.first_token_latency + self.token_latency * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_latency)
+        for token in self._tokens(messages):
+            time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager: run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    # --- ASYNC ---
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.first_token_latency + self.token_latency * len(tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_latency)
+        for token in self._tokens(messages):
+            await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager: await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
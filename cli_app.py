@@ -1,27 +1,67 @@
-import requests
+import os
+import re
+import csv
+import sys
+import json
 import time
-from rich.console import Console
+import uuid
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from rich.console import Console, Group
 from rich.panel import Panel
 from rich.layout import Layout
 from rich.prompt import Prompt
 from rich.markdown import Markdown
 from rich.status import Status
 from rich.live import Live
+from rich.table import Table
+from api.streaming import iter_sse
 
 # CONFIG
-API_URL = "http://127.0.0.1:8000"
+API_URL = os.getenv("SHADOW_API_URL", "http://127.0.0.1:8000")
+# Batch mode: seconds between job status polls, and how long one item may take end to end
+BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "2"))
+BATCH_ITEM_TIMEOUT = float(os.getenv("BATCH_ITEM_TIMEOUT", "900"))
 console = Console()
 
+NODE_LABELS = {
+    "manager": "Manager is negotiating with DevOps...",
+    "repo": "DevOps is creating your repository...",
+    "devops": "DevOps is provisioning your repository...",
+    "cache_lookup": "Checking for a previous verdict...",
+    "snapshot": "Fetching your repository...",
+    "security": "Security Agent is scanning...",
+    "screen": "Security scan and Senior Engineer review running in parallel...",
+    "senior_dev": "Senior Engineer is judging you...",
+    "publish": "Posting the review to GitHub...",
+    "deliver": "Posting the review prepared when you pushed...",
+}
+
+def stream_events(path, payload):
+    """POSTs to a /stream endpoint and yields (event, data) as they arrive."""
+    response = requests.post(f"{API_URL}{path}", json=payload, stream=True)
+    response.raise_for_status()
+    for event, data in iter_sse(response.iter_lines(decode_unicode=True)):
+        if event == "error": raise RuntimeError(data["message"])
+        yield event, data
+
 def get_hired():
     console.clear()
     console.print(Panel.fit("[bold cyan]🏢 WELCOME TO SHADOW WORKPLACE[/bold cyan]", border_style="cyan"))
     
     prompt_text = Prompt.ask("[bold green]?[/bold green] What job role do you want to simulate?")
     
-    with console.status("[bold yellow]Manager is negotiating with DevOps...[/bold yellow]", spinner="dots"):
+    with console.status("[bold yellow]Manager is negotiating with DevOps...[/bold yellow]", spinner="dots") as status:
         try:
-            response = requests.post(f"{API_URL}/agent/start_job", json={"prompt": prompt_text})
-            data = response.json()
+            data = {}
+            for event, payload in stream_events("/agent/start_job/stream", {"prompt": prompt_text}):
+                if event == "node_started" and payload["node"] in NODE_LABELS:
+                    status.update(f"[bold yellow]{NODE_LABELS[payload['node']]}[/bold yellow]")
+                elif event == "result":
+                    data = payload
             
             # Extract Repo URL
             msgs = data.get("messages", [])
@@ -46,18 +86,204 @@ def get_roasted(repo_url):
     console.print(f"Target Repo: [underline blue]{repo_url}[/underline blue]")
     Prompt.ask("Press [bold red]ENTER[/bold red] when you have pushed your bad code to GitHub...")
     
-    with console.status("[bold red]Senior Engineer is judging you...[/bold red]", spinner="bouncingBar"):
-        try:
-            response = requests.post(f"{API_URL}/agent/review_code", json={"repo_url": repo_url})
-            data = response.json()
+    try:
+        data, streamed = {}, ""
+        # Live panel: node progress as the subtitle, the review text as it streams in
+        with Live(Panel("", title="[bold red]Code Review Verdict[/bold red]", border_style="red"), console=console, refresh_per_second=8) as live:
+            stage = "Connecting..."
+            for event, payload in stream_events("/agent/review_code/stream", {"repo_url": repo_url}):
+                if event == "node_started" and payload["node"] in NODE_LABELS:
+                    stage = NODE_LABELS[payload["node"]]
+                elif event == "token":
+                    streamed += payload["text"]
+                elif event == "file_reviewed":
+                    stage = f"Reviewed {payload['done']}/{payload['total']} files (last: {payload['path']})"
+                elif event == "result":
+                    data = payload
+                    stage = "Done"
+                live.update(Panel(Markdown(streamed), title="[bold red]Code Review Verdict[/bold red]", subtitle=stage, border_style="red"))
+
             review = data.get("messages", ["Error"])[0]
-            
-            console.print(Panel(Markdown(review), title="[bold red]Code Review Verdict[/bold red]", border_style="red"))
-            
-        except Exception as e:
-            console.print(f"[bold red]Error:[/bold red] {e}")
+            live.update(Panel(Markdown(review), title="[bold red]Code Review Verdict[/bold red]", border_style="red"))
+        
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e}")
+
+# --- BATCH MODE ---
+REPO_URL = re.compile(r"https?://github\.com/[^/\s]+/[^/\s]+/?$")
+REPORT_FIELDS = ["line", "kind", "input", "outcome", "latency_s", "job_id", "repo_url",
+                 "security_status", "review_status", "findings", "attempts", "error"]
+# How many finished rows stay in the live table next to the running ones
+RECENT_ROWS = 10
+OUTCOME_STYLES = {"ok": "green", "blocked": "yellow", "failed": "red", "error": "red"}
+
+_local = threading.local()
+_stop = threading.Event()
+
+def _session():
+    """One keep-alive session per worker thread."""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+        _local.session.mount("http://", HTTPAdapter(pool_maxsize=1))
+        _local.session.mount("https://", HTTPAdapter(pool_maxsize=1))
+    return _local.session
+
+def read_batch(path):
+    """One item per line: a GitHub repo URL is reviewed, anything else is a role prompt to provision. # comments are skipped."""
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"): continue
+            items.append({
+                "line": n, "kind": "review" if REPO_URL.match(line) else "setup", "input": line,
+                "state": "queued", "stage": "", "outcome": None, "started": None, "latency_s": None,
+                "job_id": None, "repo_url": None, "security_status": None, "review_status": None,
+                "findings": None, "attempts": 0, "error": None
+            })
+    return items
+
+def _post(path, payload, key, deadline):
+    """POST with an Idempotency-Key, waiting out a full job queue (503) until the item's deadline."""
+    while True:
+        response = _session().post(f"{API_URL}{path}", json=payload, headers={"Idempotency-Key": key},
+                                   timeout=max(deadline - time.monotonic(), 1))
+        if response.status_code != 503 or time.monotonic() + BATCH_POLL_INTERVAL > deadline:
+            response.raise_for_status()
+            return response.json()
+        time.sleep(BATCH_POLL_INTERVAL)
+
+def run_setup_item(item, key, deadline):
+    job = _post("/agent/start_job", {"prompt": item["input"]}, key, deadline)
+    item["job_id"] = job["job_id"]
+    while True:
+        job = _session().get(f"{API_URL}/agent/jobs/{item['job_id']}", timeout=30).json()
+        item["attempts"] = job.get("attempts", 0)
+        if job.get("progress"): item["stage"] = job["progress"][-1]["node"]
+        if job["status"] == "succeeded":
+            item["repo_url"] = job["repo_url"]
+            return "ok"
+        if job["status"] == "failed":
+            item["error"] = job["error"]
+            return "failed"
+        if _stop.is_set(): raise RuntimeError("batch interrupted")
+        if time.monotonic() > deadline: raise TimeoutError(f"job still {job['status']} after {BATCH_ITEM_TIMEOUT:.0f}s")
+        time.sleep(BATCH_POLL_INTERVAL)
+
+def run_review_item(item, key, deadline):
+    item["stage"] = "review"
+    result = _post("/agent/review_code", {"repo_url": item["input"]}, key, deadline)
+    item["repo_url"] = item["input"]
+    item["security_status"] = result.get("security_status")
+    item["review_status"] = result.get("review_status")
+    item["findings"] = len(result.get("security_findings") or [])
+    if item["security_status"] == "blocked": return "blocked"
+    if not item["review_status"]:
+        # The graph finished without a verdict: the last message says why (empty repo, LLM error...)
+        item["error"] = (result.get("messages") or ["No verdict"])[-1]
+        return "failed"
+    return "ok"
+
+def run_item(item, batch_id):
+    """Runs one line against the API; never raises, the outcome and error end up on the item."""
+    item["state"], item["started"] = "running", time.time()
+    started = time.monotonic()
+    deadline = started + BATCH_ITEM_TIMEOUT
+    # Stable per batch and line, so re-running a batch with the same --batch-id reuses jobs instead of duplicating repos
+    key = f"{batch_id}:{item['line']}"
+    try:
+        runner = run_setup_item if item["kind"] == "setup" else run_review_item
+        item["outcome"] = runner(item, key, deadline)
+    except Exception as e:
+        item["outcome"], item["error"] = "error", f"{type(e).__name__}: {e}"
+    item["latency_s"] = round(time.monotonic() - started, 3)
+    item["state"] = "done"
+    return item
+
+def percentile(values, q):
+    if not values: return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+def batch_view(items, started, concurrency):
+    done = [i for i in items if i["state"] == "done"]
+    latencies = [i["latency_s"] for i in done]
+    elapsed = time.monotonic() - started
+    counts = {outcome: sum(1 for i in done if i["outcome"] == outcome) for outcome in OUTCOME_STYLES}
+
+    summary = "   ".join([
+        f"[bold]{len(done)}/{len(items)}[/bold] done",
+        *(f"[{style}]{outcome} {counts[outcome]}[/{style}]" for outcome, style in OUTCOME_STYLES.items()),
+        f"p50 {percentile(latencies, 50) or 0:.1f}s", f"p95 {percentile(latencies, 95) or 0:.1f}s",
+        f"{len(done) / elapsed * 60 if elapsed else 0:.0f}/min", f"x{concurrency}"
+    ])
+
+    table = Table(expand=True)
+    for column in ("Line", "Kind", "Stage", "Outcome", "Latency"):
+        table.add_column(column, no_wrap=True)
+    table.add_column("Input", overflow="ellipsis", no_wrap=True, ratio=1)
+    table.add_column("Result", overflow="ellipsis", no_wrap=True, ratio=1)
+    running = [i for i in items if i["state"] == "running"]
+    recent = sorted(done, key=lambda i: i["started"] + i["latency_s"])[-RECENT_ROWS:]
+    for i in running + recent[::-1]:
+        latency = f"{i['latency_s']:.1f}s" if i["latency_s"] is not None else f"{time.time() - i['started']:.0f}s…"
+        outcome = f"[{OUTCOME_STYLES[i['outcome']]}]{i['outcome']}[/]" if i["outcome"] else "[cyan]running[/cyan]"
+        if i["outcome"] == "blocked": detail = f"{i['findings']} security findings"
+        else: detail = i["error"] or (i["review_status"] if i["kind"] == "review" else i["repo_url"]) or ""
+        table.add_row(str(i["line"]), i["kind"], i["stage"], outcome, latency, i["input"], detail)
+    return Group(summary, table)
+
+def write_report(path, items):
+    """JSONL, or CSV when the path ends in .csv; one row per item with its latency and outcome."""
+    rows = [{field: item[field] for field in REPORT_FIELDS} for item in items]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows: f.write(json.dumps(row) + "\n")
+
+def run_batch(path, concurrency, report, batch_id):
+    items = read_batch(path)
+    if not items:
+        console.print(f"[bold red]No prompts or repo URLs in {path}[/bold red]")
+        return 1
+    console.print(Panel.fit(
+        f"[bold cyan]🏭 BATCH {batch_id}[/bold cyan]: {sum(i['kind'] == 'setup' for i in items)} setups, "
+        f"{sum(i['kind'] == 'review' for i in items)} reviews against {API_URL}", border_style="cyan"))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool, \
+            Live(batch_view(items, started, concurrency), console=console, refresh_per_second=4) as live:
+        pending = {pool.submit(run_item, item, batch_id) for item in items}
+        try:
+            while pending:
+                _, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                live.update(batch_view(items, started, concurrency))
+        except KeyboardInterrupt:
+            # Queued items are dropped and setup polls stop; jobs already sent keep running server-side
+            _stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            live.update(batch_view(items, started, concurrency))
+
+    write_report(report, items)
+    failed = sum(1 for i in items if i["outcome"] in ("failed", "error"))
+    console.print(f"📄 Report written to [underline]{report}[/underline]. Re-run with --batch-id {batch_id} to retry without duplicating work.")
+    return 1 if failed else 0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shadow Workplace CLI. Interactive by default; --batch runs a file of items.")
+    parser.add_argument("--batch", metavar="FILE", help="role prompts and/or GitHub repo URLs, one per line")
+    parser.add_argument("--concurrency", type=int, default=8, help="items in flight at once (default 8)")
+    parser.add_argument("--report", help="JSONL or .csv report path (default batch-<id>.jsonl)")
+    parser.add_argument("--batch-id", help="reuse to retry a batch: items keep their Idempotency-Key")
+    args = parser.parse_args()
+
+    if args.batch:
+        batch_id = args.batch_id or uuid.uuid4().hex[:8]
+        sys.exit(run_batch(args.batch, max(args.concurrency, 1), args.report or f"batch-{batch_id}.jsonl", batch_id))
+
     while True:
         repo = get_hired()
         if repo:
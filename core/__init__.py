@@ -0,0 +1,5 @@
+from dotenv import load_dotenv
+
+# The one place .env is read: every module reads its config via os.getenv at import,
+# and all of them import something from core first.
+load_dotenv()
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+
+# --- CONFIG ---
+CACHE_DB_PATH = os.getenv("SHADOW_CACHE_DB", os.path.join(".shadow_cache", "cache.sqlite3"))
+
+class SQLiteLRU:
+    """
+    Persistent key -> JSON value store in a local SQLite table.
+
+    Every read refreshes the entry's last_used time; once the table grows past
+    max_entries the least recently used rows are evicted. Entries older than
+    ttl seconds (if set) are treated as misses. Hit/miss counts are per process.
+    """
+
+    def __init__(self, table, max_entries, ttl=None, path=CACHE_DB_PATH):
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)")
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """{key: value} for every key that is present and fresh."""
+        keys = list(dict.fromkeys(keys))
+        found, now = {}, time.time()
+        with self._lock:
+            # SQLite caps bound parameters, so look keys up in chunks
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, value, created FROM {self.table} WHERE key IN ({marks})", chunk
+                ).fetchall()
+                fresh = [(key, value) for key, value, created in rows if not self._expired(created, now)]
+                found.update((key, json.loads(value)) for key, value in fresh)
+                if fresh:
+                    self._db.executemany(
+                        f"UPDATE {self.table} SET last_used = ? WHERE key = ?", [(now, key) for key, _ in fresh]
+                    )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def put_many(self, items):
+        if not items: return
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                    [(key, json.dumps(value), now, now) for key, value in items.items()]
+                )
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                # Otherwise the connection stays inside the failed transaction and every later BEGIN fails
+                self._db.execute("ROLLBACK")
+                raise
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    # --- ASYNC ---
+    # SQLite may wait on another worker's write lock; async code runs the calls in a thread
+    async def aget(self, key): return await asyncio.to_thread(self.get, key)
+    async def aput(self, key, value): return await asyncio.to_thread(self.put, key, value)
+
+    def _evict(self):
+        (count,) = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+    def stats(self):
+        with self._lock:
+            (count,) = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": count, "max_entries": self.max_entries}
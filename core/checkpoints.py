@@ -0,0 +1,58 @@
+import os
+import uuid
+
+# --- CONFIG ---
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS_ENABLED", "1") == "1"
+CHECKPOINT_DB_PATH = os.getenv("SHADOW_CHECKPOINT_DB", os.path.join(".shadow_cache", "checkpoints.sqlite3"))
+
+_saver = None
+
+async def open_checkpointer():
+    """Connects the process-wide SQLite checkpointer. Call once at startup, before any graph is built."""
+    global _saver
+    if not CHECKPOINTS_ENABLED or _saver is not None: return
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    if os.path.dirname(CHECKPOINT_DB_PATH): os.makedirs(os.path.dirname(CHECKPOINT_DB_PATH), exist_ok=True)
+    _saver = AsyncSqliteSaver(await aiosqlite.connect(CHECKPOINT_DB_PATH))
+    await _saver.setup()
+
+async def close_checkpointer():
+    global _saver
+    if _saver is None: return
+    await _saver.conn.close()
+    _saver = None
+
+def checkpointer():
+    """What graphs are compiled with: the open saver, or None (no checkpoints)."""
+    return _saver
+
+# --- RUNS ---
+async def resume_point(graph, initial_state, run_id=None):
+    """
+    (input, config) for running `graph` as `run_id`. If an earlier attempt of the
+    same run stopped part-way (a node raised, or the process died), the input is
+    None, so LangGraph resumes after the last completed node and reuses what it
+    produced (the plan, the created repo, the snapshot...).
+    """
+    config = {"configurable": {"thread_id": run_id or uuid.uuid4().hex}}
+    if graph.checkpointer is None or not run_id: return initial_state, config
+
+    state = await graph.aget_state(config)
+    if state.next:
+        print(f"♻️ Resuming run {run_id} at: {', '.join(state.next)}")
+        return None, config
+    return initial_state, config
+
+async def finish(graph, config, resumable=True):
+    """
+    Drops the run's checkpoints once it completed; a failed run keeps them so it
+    can be resumed, unless nobody can ask for it again (`resumable=False`).
+    """
+    if graph.checkpointer is None: return
+    thread_id = config["configurable"]["thread_id"]
+    try:
+        if resumable and (await graph.aget_state(config)).next: return
+        await graph.checkpointer.adelete_thread(thread_id)
+    except Exception as e:
+        print(f"⚠️ Could not clear checkpoints for {thread_id}: {e}")
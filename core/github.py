@@ -0,0 +1,260 @@
+import io
+import os
+import time
+import random
+import asyncio
+import weakref
+from collections import OrderedDict, deque
+import httpx
+from core.metrics import METRICS_ENABLED, observe_github
+from core.quota import QUOTA_ENABLED, bucket
+
+# --- CONFIG ---
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_TIMEOUT = float(os.getenv("GITHUB_TIMEOUT", "30"))
+GITHUB_MAX_CONNECTIONS = int(os.getenv("GITHUB_MAX_CONNECTIONS", "20"))
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "3"))
+GITHUB_ETAG_CACHE_SIZE = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "512"))
+# Start spreading requests out once fewer than this many calls are left in the window
+GITHUB_RATE_RESERVE = int(os.getenv("GITHUB_RATE_RESERVE", "100"))
+# Never park a request longer than this waiting for the window to reset
+GITHUB_MAX_RATE_WAIT = float(os.getenv("GITHUB_MAX_RATE_WAIT", "60"))
+
+# GitHub's secondary limits: space out content-creating requests, at most ~80 per minute
+GITHUB_CONTENT_SPACING = float(os.getenv("GITHUB_CONTENT_SPACING", "0.25"))
+GITHUB_CONTENT_PER_MINUTE = int(os.getenv("GITHUB_CONTENT_PER_MINUTE", "80"))
+# Host-wide budgets shared by all worker processes (core/quota.py)
+GITHUB_QUOTA_PER_HOUR = float(os.getenv("GITHUB_QUOTA_PER_HOUR", "5000"))
+# Like GitHub's own hourly window, the whole quota may be spent in a burst by default
+GITHUB_QUOTA_BURST = float(os.getenv("GITHUB_QUOTA_BURST", str(GITHUB_QUOTA_PER_HOUR)))
+GITHUB_CONTENT_BURST = float(os.getenv("GITHUB_CONTENT_BURST", "10"))
+# How long a rate-limited request may stay queued before its 403/429 is returned
+GITHUB_MAX_QUEUE_WAIT = float(os.getenv("GITHUB_MAX_QUEUE_WAIT", "300"))
+
+RETRY_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "PATCH", "DELETE"}
+
+def parse_repo_url(repo_url):
+    """'https://github.com/owner/repo(/)' -> ('owner', 'repo')"""
+    clean_url = repo_url.rstrip("/")
+    if clean_url.endswith(".git"): clean_url = clean_url[:-4]
+    parts = clean_url.split("/")
+    return parts[-2], parts[-1]
+
+class ContentPacer:
+    """
+    Process-wide pacing for content-creating requests (anything but GET/HEAD).
+    Callers are released one at a time, in arrival order, at least `spacing`
+    seconds apart and never more than `per_minute` in any rolling minute.
+    Release order is not completion order: requests released a moment apart
+    can still reach GitHub in either order, so callers that need an order
+    (issue numbers) must wait for each response before sending the next.
+    """
+
+    def __init__(self, spacing=GITHUB_CONTENT_SPACING, per_minute=GITHUB_CONTENT_PER_MINUTE):
+        self.spacing = spacing
+        self.per_minute = per_minute
+        self._recent = deque()
+        self._locks = weakref.WeakKeyDictionary()
+
+    def _lock(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._locks: self._locks[loop] = asyncio.Lock()
+        return self._locks[loop]
+
+    async def wait(self):
+        async with self._lock():
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 60: self._recent.popleft()
+            delay = self._recent[-1] + self.spacing - now if self._recent else 0
+            if len(self._recent) >= self.per_minute:
+                delay = max(delay, self._recent[0] + 60 - now)
+            if delay > 0: await asyncio.sleep(delay)
+            self._recent.append(time.monotonic())
+
+class GitHubClient:
+    """
+    One GitHub client for every agent.
+
+    - Pools keep-alive connections (one httpx pool per event loop).
+    - Caches GET responses by ETag; a 304 is served from cache and does not count against the quota.
+    - Draws every request from a host-wide token bucket per token (core/quota.py), plus a
+      second one for content-creating requests, so worker processes share GitHub's limits.
+    - Reads X-RateLimit-* headers and paces requests when the window is nearly spent.
+    - Spaces out content-creating requests to stay under the secondary rate limits.
+    - Retries transport errors and 5xx with exponential backoff; rate-limit rejections
+      are queued behind the bucket until GitHub says to retry.
+    """
+
+    def __init__(self, token=GITHUB_TOKEN, base_url=GITHUB_API_URL):
+        self.base_url = base_url
+        self.headers = {
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+        self._pools = weakref.WeakKeyDictionary()
+        self._etags = OrderedDict()
+        self.content_pacer = ContentPacer()
+        self.quota = bucket("github", token, GITHUB_QUOTA_PER_HOUR / 3600, GITHUB_QUOTA_BURST)
+        self.content_quota = bucket("github_content", token, GITHUB_CONTENT_PER_MINUTE / 60, GITHUB_CONTENT_BURST)
+        self.rate_remaining = None
+        self.rate_reset = 0.0
+        self.stats = {"requests": 0, "not_modified": 0, "retries": 0, "rate_waits": 0}
+
+    # --- CONNECTION POOL ---
+    def _http(self):
+        loop = asyncio.get_running_loop()
+        client = self._pools.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=GITHUB_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=GITHUB_MAX_CONNECTIONS,
+                    max_keepalive_connections=GITHUB_MAX_CONNECTIONS
+                )
+            )
+            self._pools[loop] = client
+        return client
+
+    async def aclose(self):
+        client = self._pools.pop(asyncio.get_running_loop(), None)
+        if client is not None: await client.aclose()
+
+    # --- RATE LIMIT ---
+    async def _record_rate(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is not None and remaining.isdigit(): self.rate_remaining = int(remaining)
+        if reset is not None and reset.isdigit(): self.rate_reset = float(reset)
+        if QUOTA_ENABLED and self.rate_remaining is not None and self.rate_remaining <= GITHUB_RATE_RESERVE:
+            # Near the end of the window: let the shared bucket spread what's left across all workers
+            await self.quota.aobserve_remaining(self.rate_remaining, self.rate_reset)
+
+    async def _pace(self, method="GET"):
+        if QUOTA_ENABLED:
+            await self.quota.acquire()
+            if method not in ("GET", "HEAD"): await self.content_quota.acquire()
+            return
+        if self.rate_remaining is None or self.rate_remaining > GITHUB_RATE_RESERVE: return
+        window = self.rate_reset - time.time()
+        if window <= 0:
+            self.rate_remaining = None
+            return
+        # Spread what's left evenly over the rest of the window
+        delay = min(window / max(self.rate_remaining, 1), GITHUB_MAX_RATE_WAIT)
+        self.stats["rate_waits"] += 1
+        print(f"⏳ GitHub quota low ({self.rate_remaining} left), pacing {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    def _retry_after(self, response):
+        """Seconds to wait if the response is a rate-limit rejection, else None."""
+        if response.status_code not in (403, 429): return None
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit(): return float(retry_after)
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            return max(self.rate_reset - time.time(), 1.0)
+        if response.status_code == 429: return 1.0
+        return None
+
+    # --- REQUESTS ---
+    async def request(self, method, url, **kwargs):
+        method = method.upper()
+        client = self._http()
+        cache_key = None
+        if method == "GET":
+            cache_key = str(client.build_request(method, url, params=kwargs.get("params")).url)
+            cached = self._etags.get(cache_key)
+            if cached is not None:
+                kwargs["headers"] = {**kwargs.get("headers", {}), "If-None-Match": cached[0]}
+
+        attempt = 0
+        queued_since = None
+        while True:
+            await self._pace(method)
+            if method not in ("GET", "HEAD"): await self.content_pacer.wait()
+            self.stats["requests"] += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if METRICS_ENABLED: observe_github(method, url, "transport_error", time.perf_counter() - started)
+                if attempt >= GITHUB_MAX_RETRIES: raise
+                # A POST may already have been handled (timeout, dropped connection): only resend one that never left
+                if method not in IDEMPOTENT_METHODS and not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)): raise
+                wait = self._backoff(attempt)
+                print(f"⚠️ GitHub {method} {url} failed ({e!r}), retrying in {wait:.1f}s")
+            else:
+                if METRICS_ENABLED: observe_github(method, url, response.status_code, time.perf_counter() - started)
+                await self._record_rate(response)
+                wait = self._retry_after(response)
+                if wait is not None and QUOTA_ENABLED:
+                    # Rate limited: pause the shared bucket and queue this call behind it
+                    queued_since = queued_since or time.monotonic()
+                    await self._throttle(method, response, min(wait, GITHUB_MAX_QUEUE_WAIT))
+                    if time.monotonic() - queued_since + wait <= GITHUB_MAX_QUEUE_WAIT:
+                        print(f"⏳ GitHub {method} {url} -> {response.status_code}, queued for {wait:.1f}s")
+                        self.stats["rate_waits"] += 1
+                        continue
+                    return self._cache_response(cache_key, response)
+                if wait is None and response.status_code in RETRY_STATUSES and method in IDEMPOTENT_METHODS:
+                    wait = self._backoff(attempt)
+                if wait is None or attempt >= GITHUB_MAX_RETRIES:
+                    return self._cache_response(cache_key, response)
+                print(f"⚠️ GitHub {method} {url} -> {response.status_code}, retrying in {wait:.1f}s")
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(min(wait, GITHUB_MAX_RATE_WAIT))
+
+    async def _throttle(self, method, response, wait):
+        # Secondary limits come without X-RateLimit-Remaining: 0 and mostly hit content creation
+        primary = response.headers.get("X-RateLimit-Remaining") == "0"
+        content = method not in ("GET", "HEAD")
+        await (self.content_quota if content and not primary else self.quota).athrottle(wait)
+
+    def _backoff(self, attempt):
+        return (2 ** attempt) * 0.5 + random.uniform(0, 0.25)
+
+    def _cache_response(self, cache_key, response):
+        if cache_key is None: return response
+        if response.status_code == 304 and cache_key in self._etags:
+            self.stats["not_modified"] += 1
+            self._etags.move_to_end(cache_key)
+            return self._etags[cache_key][1]
+        etag = response.headers.get("ETag")
+        if response.status_code == 200 and etag:
+            self._etags[cache_key] = (etag, response)
+            self._etags.move_to_end(cache_key)
+            while len(self._etags) > GITHUB_ETAG_CACHE_SIZE:
+                self._etags.popitem(last=False)
+        return response
+
+    async def download(self, url, max_bytes):
+        """Streams a download into memory, giving up once it grows past max_bytes. None on non-200."""
+        await self._pace()
+        self.stats["requests"] += 1
+        started = time.perf_counter()
+        async with self._http().stream("GET", url) as response:
+            await self._record_rate(response)
+            if response.status_code != 200:
+                if METRICS_ENABLED: observe_github("GET", url, response.status_code, time.perf_counter() - started)
+                return None
+            buffer = io.BytesIO()
+            async for chunk in response.aiter_bytes():
+                buffer.write(chunk)
+                if buffer.tell() > max_bytes:
+                    raise ValueError(f"download exceeds {max_bytes} bytes: {url}")
+            if METRICS_ENABLED: observe_github("GET", url, 200, time.perf_counter() - started)
+            return buffer.getvalue()
+
+    async def get(self, url, **kwargs): return await self.request("GET", url, **kwargs)
+    async def post(self, url, **kwargs): return await self.request("POST", url, **kwargs)
+    async def put(self, url, **kwargs): return await self.request("PUT", url, **kwargs)
+    async def patch(self, url, **kwargs): return await self.request("PATCH", url, **kwargs)
+    async def delete(self, url, **kwargs): return await self.request("DELETE", url, **kwargs)
+
+# Process-wide shared client
+github = GitHubClient()
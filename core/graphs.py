@@ -0,0 +1,110 @@
+from typing import TypedDict, List, Optional
+from langgraph.graph import StateGraph, END
+from core.registry import agents
+from core.metrics import timed_node
+from core.review_cache import route_cache
+from core.speculative import SPECULATIVE_REVIEW
+from core.pipeline import PIPELINED_SETUP
+from core.checkpoints import checkpointer
+from agents.manager.plan import Plan
+
+def node(name, agent=None):
+    return timed_node(name, agents.get(agent or name))
+
+# --- WORKFLOW 1: SETUP (Get Hired) ---
+class SetupState(TypedDict):
+    messages: List[str]
+    plan: Optional[Plan]
+    provisioning_id: str
+    repo: dict
+    issues: List[dict]
+
+def build_setup_graph():
+    setup_workflow = StateGraph(SetupState)
+    # Pipelined: DevOps starts on the repo and issues while the plan is still streaming
+    setup_workflow.add_node("manager", node("manager", "plan_and_provision" if PIPELINED_SETUP else None))
+    # The repo gets its own node so a retried run resumes with it instead of creating another
+    setup_workflow.add_node("repo", node("repo"))
+    setup_workflow.add_node("devops", node("devops"))
+    setup_workflow.set_entry_point("manager")
+    setup_workflow.add_edge("manager", "repo")
+    setup_workflow.add_edge("repo", "devops")
+    setup_workflow.add_edge("devops", END)
+    return setup_workflow.compile(checkpointer=checkpointer())
+
+# --- WORKFLOW 2: REVIEW (The Security Pipeline) ---
+class ReviewState(TypedDict):
+    repo_url: str
+    messages: List[str]
+    security_status: str 
+    snapshot: dict
+    security_findings: List[dict]
+    review_status: str
+    head_sha: str
+    cached: bool
+    draft_review: str
+    publish: bool
+    posted: bool
+
+# Define Logic: Stop if blocked, Continue if clean
+def route_security(state):
+    status = state.get("security_status", "clean")
+    if status == "blocked":
+        return "end"       # Blocked! Stop here.
+    return "review"        # Clean! Go to roast.
+
+def build_review_graph():
+    return _review_graph(checkpointer())
+
+def build_ephemeral_review_graph():
+    """The review graph without checkpoints, for runs nobody can resume (no run ID): the snapshot isn't re-saved after every node."""
+    return _review_graph(None)
+
+def _review_graph(saver):
+    review_workflow = StateGraph(ReviewState)
+    review_workflow.add_node("cache_lookup", node("cache_lookup"))
+    review_workflow.add_node("snapshot", node("snapshot"))
+    review_workflow.add_node("publish", node("publish"))
+    review_workflow.add_node("remember", node("remember"))
+    review_workflow.add_node("deliver", node("deliver"))
+
+    # 0. Already reviewed this commit? Return the stored verdict (posting it first if it was pre-computed on push).
+    review_workflow.set_entry_point("cache_lookup")
+    review_workflow.add_conditional_edges(
+        "cache_lookup",
+        route_cache,
+        {
+            "end": END,
+            "deliver": "deliver",
+            "snapshot": "snapshot"
+        }
+    )
+    review_workflow.add_edge("deliver", END)
+
+    if SPECULATIVE_REVIEW:
+        # 1a. Fetch the repo once, then scan and draft the review at the same time
+        review_workflow.add_node("screen", node("screen"))
+        review_workflow.add_edge("snapshot", "screen")
+        gate = "screen"
+    else:
+        # 1b. Fetch the repo once, then Security, then (if clean) the Senior Dev draft
+        review_workflow.add_node("security", node("security"))
+        review_workflow.add_node("senior_dev", node("senior_dev"))
+        review_workflow.add_edge("snapshot", "security")
+        review_workflow.add_edge("senior_dev", "publish")
+        gate = "security"
+
+    # 2. Add the Conditional Edge: only a clean scan gets its review posted
+    review_workflow.add_conditional_edges(
+        gate,
+        route_security,
+        {
+            "end": "remember",
+            "review": "publish" if SPECULATIVE_REVIEW else "senior_dev"
+        }
+    )
+
+    # 3. Store the verdict for this commit
+    review_workflow.add_edge("publish", "remember")
+    review_workflow.add_edge("remember", END)
+    return review_workflow.compile(checkpointer=saver)
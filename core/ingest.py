@@ -0,0 +1,69 @@
+import os
+import io
+import hashlib
+import tarfile
+from core.github import github
+
+# --- CONFIG ---
+ARCHIVE_MAX_BYTES = int(os.getenv("INGEST_ARCHIVE_MAX_BYTES", str(50 * 1024 * 1024)))
+FILE_MAX_BYTES = int(os.getenv("INGEST_FILE_MAX_BYTES", str(512 * 1024)))
+TOTAL_MAX_BYTES = int(os.getenv("INGEST_TOTAL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+SKIP_DIRS = {
+    ".git", "node_modules", "vendor", "third_party", "bower_components",
+    "venv", ".venv", "env", "__pycache__", "site-packages",
+    "dist", "build", ".next", ".tox", ".mypy_cache", ".pytest_cache"
+}
+BINARY_SNIFF_BYTES = 8192
+
+def blob_sha(data):
+    """Git's blob SHA-1 for raw file bytes (matches the sha GitHub reports for the file)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def is_vendored(path):
+    return any(part in SKIP_DIRS for part in path.split("/")[:-1])
+
+def decode_text(data):
+    """UTF-8 text, or None for anything that looks binary."""
+    if b"\0" in data[:BINARY_SNIFF_BYTES]: return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+def iter_archive(archive_bytes, file_max=FILE_MAX_BYTES, total_max=TOTAL_MAX_BYTES, unscanned=None):
+    """
+    Yields {"path", "sha", "size", "text"} for every text file in a GitHub tarball.
+
+    The tarball is read in streaming mode ("r|gz"), one member at a time, so only
+    the current file is held in memory next to the compressed archive. Binaries
+    and vendored directories are skipped. Files over file_max, and every file
+    after total_max bytes of text, are not read but appended to `unscanned`
+    as {"path", "size", "reason"}, so callers know what they never saw.
+    """
+    total, full = 0, False
+    with tarfile.open(fileobj=io.BytesIO(archive_bytes), mode="r|gz") as tar:
+        for member in tar:
+            if not member.isfile(): continue
+            # GitHub prefixes every entry with "<owner>-<repo>-<sha>/"
+            path = member.name.split("/", 1)[-1]
+            if not path or is_vendored(path): continue
+            over_file = member.size > file_max
+            if over_file or full or total + member.size > total_max:
+                # Only the first bytes are read: a binary (an image, a model) is skipped as usual
+                if b"\0" in tar.extractfile(member).read(BINARY_SNIFF_BYTES): continue
+                if not over_file and not full:
+                    print(f"⚠️ Ingest budget of {total_max} bytes reached at {path}, skipping the rest")
+                    full = True
+                if unscanned is not None:
+                    unscanned.append({"path": path, "size": member.size, "reason": "file_too_large" if over_file else "repo_too_large"})
+                continue
+            data = tar.extractfile(member).read()
+            text = decode_text(data)
+            if text is None: continue
+            total += member.size
+            yield {"path": path, "sha": blob_sha(data), "size": member.size, "text": text}
+
+async def download_archive(owner, repo, ref):
+    """One request for the whole tree at `ref` (GitHub redirects to codeload)."""
+    return await github.download(f"/repos/{owner}/{repo}/tarball/{ref}", ARCHIVE_MAX_BYTES)
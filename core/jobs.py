@@ -0,0 +1,237 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from core.cache import CACHE_DB_PATH
+
+# --- CONFIG ---
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+# Finished jobs (and their idempotency keys) are forgotten after this many seconds
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(24 * 3600)))
+# Shared by every worker process on the host; defaults to the cache database
+JOB_DB_PATH = os.getenv("SHADOW_JOB_DB", CACHE_DB_PATH)
+# Idle workers look for jobs queued by other processes this often
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# A running job whose process stopped heartbeating this long ago is marked failed (and can be retried)
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+
+class QueueFull(Exception):
+    pass
+
+def _jsonable(value):
+    # Typed state (e.g. the setup Plan) is stored as its fields
+    if hasattr(value, "model_dump"): return value.model_dump()
+    return str(value)
+
+class JobQueue:
+    """
+    Background jobs on a bounded pool of asyncio workers, kept in SQLite so every
+    uvicorn worker on the host shares one queue: any process can take a job,
+    report its status, or return it for a repeated idempotency key.
+
+    `runner(job)` is an async callable that does the work; it can append to
+    job["progress"] and set job["repo_url"] while running (save() publishes
+    them to the other processes), and its return value becomes job["result"].
+    Submitting twice with the same idempotency key returns the original job
+    instead of queueing a second one; if that job failed, it is queued again
+    (see retry). A job left running by a process that died is marked failed.
+    """
+
+    def __init__(self, runner, workers=JOB_WORKERS, max_queued=JOB_QUEUE_MAX, path=JOB_DB_PATH):
+        self.runner = runner
+        self.workers = workers
+        self.max_queued = max_queued
+        self.coalesced = 0
+        self.owner = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._tasks = []
+        self._loop = None
+        self._wakeup = None
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE, status TEXT NOT NULL, "
+            "created REAL NOT NULL, updated REAL NOT NULL, owner TEXT, heartbeat REAL, data TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        for task in self._tasks: task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- SHARED STATE ---
+    def _transaction(self, work):
+        """Runs work() inside one write transaction on the shared database."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = work()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return result
+
+    def _load(self, job_id):
+        row = self._db.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, job, owner=None):
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs (id, idempotency_key, status, created, updated, owner, heartbeat, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job["id"], job["idempotency_key"], job["status"], job["created"], job["updated"],
+             owner, time.time() if owner else None, json.dumps(job, default=_jsonable))
+        )
+
+    def _check_room(self):
+        queued = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        if queued >= self.max_queued: raise QueueFull(f"{queued} jobs already queued")
+
+    # --- API ---
+    def submit(self, payload, idempotency_key=None):
+        def work():
+            self._prune()
+            if idempotency_key:
+                row = self._db.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+                if row:
+                    job = self._load(row[0])
+                    if job["status"] == "failed": job = self._requeue(job)
+                    else: self.coalesced += 1
+                    return job
+
+            self._check_room()
+            now = time.time()
+            job = {
+                "id": uuid.uuid4().hex,
+                "status": "queued",
+                "payload": payload,
+                "progress": [],
+                "repo_url": None,
+                "result": None,
+                "error": None,
+                "attempts": 0,
+                "idempotency_key": idempotency_key,
+                "created": now,
+                "updated": now
+            }
+            self._write(job)
+            return job
+
+        job = self._transaction(work)
+        self._wake()
+        return job
+
+    def retry(self, job_id):
+        """
+        Queues a failed job again under the same ID, so the runner can resume
+        its earlier attempt (e.g. from a graph checkpoint) instead of starting over.
+        """
+        def work():
+            job = self._load(job_id)
+            if job is None or job["status"] != "failed": return job
+            return self._requeue(job)
+
+        job = self._transaction(work)
+        self._wake()
+        return job
+
+    def _requeue(self, job):
+        self._check_room()
+        job.update(status="queued", error=None, updated=time.time())
+        self._write(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._load(job_id)
+
+    async def save(self, job):
+        """Publishes a running job's progress to the other processes."""
+        job["updated"] = time.time()
+        await asyncio.to_thread(self._transaction, lambda: self._write(job, owner=self.owner))
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {"queued": counts.get("queued", 0), "workers": self.workers, "jobs": counts, "coalesced": self.coalesced}
+
+    # --- WORKERS ---
+    def _wake(self):
+        if self._loop is not None: self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _claim(self):
+        """The oldest queued job, marked running by this process, or None."""
+        def work():
+            self._fail_stale()
+            row = self._db.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+            if row is None: return None
+            job = self._load(row[0])
+            job["status"] = "running"
+            job["attempts"] += 1
+            job["updated"] = time.time()
+            self._write(job, owner=self.owner)
+            return job
+        return self._transaction(work)
+
+    async def _worker(self):
+        while True:
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                job["result"] = await self.runner(job)
+                job["status"] = "succeeded"
+            except asyncio.CancelledError:
+                job["status"] = "failed"
+                job["error"] = "cancelled"
+                job["updated"] = time.time()
+                # Shutting down: no awaiting, record the outcome and go
+                self._transaction(lambda: self._write(job))
+                raise
+            except Exception as e:
+                print(f"❌ Job {job['id']} failed: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+            job["updated"] = time.time()
+            await asyncio.to_thread(self._transaction, lambda: self._write(job))
+
+    async def _heartbeat(self):
+        """Keeps this process's running jobs from looking abandoned to the others."""
+        while True:
+            await asyncio.sleep(JOB_STALE_SECONDS / 4)
+            await asyncio.to_thread(self._transaction, lambda: self._db.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = 'running'", (time.time(), self.owner)
+            ))
+
+    def _fail_stale(self):
+        cutoff = time.time() - JOB_STALE_SECONDS
+        for (job_id,) in self._db.execute(
+            "SELECT id FROM jobs WHERE status = 'running' AND heartbeat < ?", (cutoff,)
+        ).fetchall():
+            job = self._load(job_id)
+            print(f"⚠️ Job {job_id} was abandoned by a stopped worker")
+            job.update(status="failed", error="worker stopped", updated=time.time())
+            self._write(job)
+
+    def _prune(self):
+        self._db.execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated < ?", (time.time() - JOB_RETENTION,)
+        )
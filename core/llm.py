@@ -0,0 +1,194 @@
+import os
+import re
+import time
+import asyncio
+import threading
+from core.metrics import METRICS_ENABLED, LLM_SECONDS, LLM_TOKENS
+from core.quota import QUOTA_ENABLED, bucket
+
+# --- CONFIG ---
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash")
+# Host-wide Gemini request budget per API key, shared by all worker processes (core/quota.py)
+GEMINI_QUOTA_RPM = float(os.getenv("GEMINI_QUOTA_RPM", "300"))
+GEMINI_QUOTA_BURST = float(os.getenv("GEMINI_QUOTA_BURST", "20"))
+# A call Gemini rejects for quota is queued and sent again for up to this long before the error surfaces
+GEMINI_MAX_QUEUE_WAIT = float(os.getenv("GEMINI_MAX_QUEUE_WAIT", "120"))
+
+_clients = {}
+_lock = threading.Lock()
+_override = None
+_chat_model = None
+
+def get_llm(temperature, model=LLM_MODEL):
+    """
+    The process-wide chat model for (model, temperature), created on first use.
+    The provider SDK is only imported here, so nothing pays for it until a
+    model is actually needed.
+    """
+    if _override is not None: return _override
+    key = (model, temperature)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _chat_model_class()(
+                    model=model,
+                    google_api_key=os.getenv("GOOGLE_API_KEY"),
+                    temperature=temperature,
+                    rate_limiter=_rate_limiter(),
+                    callbacks=_callbacks()
+                )
+    return client
+
+def set_llm_override(client):
+    """Every get_llm() returns `client` until reset with None (benchmarks, offline runs)."""
+    global _override
+    _override = client
+
+def preload():
+    """Imports the provider SDK ahead of the first request (see core.registry.warm_up)."""
+    import langchain_google_genai  # noqa: F401
+
+# --- QUOTA ---
+# "Please retry in 12.3s", "'retryDelay': '7s'", "retry_delay { seconds: 41 }"
+RETRY_DELAY = re.compile(r"retry(?:_delay\s*\{\s*seconds:\s*(\d+)|\D{0,20}?(\d+(?:\.\d+)?)\s*s)", re.IGNORECASE)
+
+def _chat_model_class():
+    """ChatGoogleGenerativeAI whose calls, when Gemini answers 429, wait for quota and are sent again."""
+    global _chat_model
+    if _chat_model is None:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        class QueuedChatModel(ChatGoogleGenerativeAI):
+            # The rate limiter only runs once per call, before these; a retry re-acquires in _requeue
+            def _generate(self, *args, **kwargs):
+                queued_since = None
+                while True:
+                    try:
+                        return super()._generate(*args, **kwargs)
+                    except Exception as e:
+                        queued_since = _requeue_blocking(e, queued_since)
+
+            async def _agenerate(self, *args, **kwargs):
+                queued_since = None
+                while True:
+                    try:
+                        return await super()._agenerate(*args, **kwargs)
+                    except Exception as e:
+                        queued_since = await _requeue(e, queued_since)
+
+            async def _astream(self, *args, **kwargs):
+                queued_since = None
+                while True:
+                    streamed = False
+                    try:
+                        async for chunk in super()._astream(*args, **kwargs):
+                            streamed = True
+                            yield chunk
+                        return
+                    except Exception as e:
+                        # Gemini rejects before the first token; a stream that broke midway can't be replayed
+                        if streamed: raise
+                        queued_since = await _requeue(e, queued_since)
+
+        _chat_model = QueuedChatModel
+    return _chat_model
+
+def _gemini_quota():
+    return bucket("gemini", os.getenv("GOOGLE_API_KEY"), GEMINI_QUOTA_RPM / 60, GEMINI_QUOTA_BURST)
+
+def _rate_limiter():
+    """LangChain rate limiter backed by the shared Gemini bucket; awaited before every call, streamed or not."""
+    if not QUOTA_ENABLED: return None
+    from langchain_core.rate_limiters import BaseRateLimiter
+
+    class QuotaRateLimiter(BaseRateLimiter):
+        def __init__(self, quota):
+            self.quota = quota
+
+        def acquire(self, *, blocking=True):
+            if not blocking: return not self.quota.try_acquire()
+            self.quota.acquire_blocking()
+            return True
+
+        async def aacquire(self, *, blocking=True):
+            if not blocking: return not await self.quota.atry_acquire()
+            await self.quota.acquire()
+            return True
+
+    return QuotaRateLimiter(_gemini_quota())
+
+def is_quota_error(error):
+    text = f"{type(error).__name__} {error}"
+    return "429" in text or "ResourceExhausted" in text or "RESOURCE_EXHAUSTED" in text
+
+def retry_delay(error):
+    """Seconds Gemini asked us to wait, when the error says (e.g. 'Please retry in 12.3s')."""
+    match = RETRY_DELAY.search(str(error))
+    return float(match.group(1) or match.group(2)) if match else None
+
+def _queue_wait(error, queued_since):
+    """(queued_since, delay) when the failed call should be queued and retried; re-raises anything else."""
+    if not is_quota_error(error): raise error
+    queued_since = queued_since or time.monotonic()
+    delay = retry_delay(error) or 1.0
+    if time.monotonic() - queued_since + delay > GEMINI_MAX_QUEUE_WAIT: raise error
+    print(f"⏳ Gemini quota exceeded, call queued for {delay:.1f}s")
+    return queued_since, delay
+
+async def _requeue(error, queued_since):
+    """Pauses the shared bucket so the calls behind this one wait too, then waits for this one's turn."""
+    queued_since, delay = _queue_wait(error, queued_since)
+    if not QUOTA_ENABLED:
+        await asyncio.sleep(delay)
+        return queued_since
+    quota = _gemini_quota()
+    await quota.athrottle(delay)
+    await quota.acquire()
+    return queued_since
+
+def _requeue_blocking(error, queued_since):
+    queued_since, delay = _queue_wait(error, queued_since)
+    if not QUOTA_ENABLED:
+        time.sleep(delay)
+        return queued_since
+    quota = _gemini_quota()
+    quota.throttle(delay)
+    quota.acquire_blocking()
+    return queued_since
+
+# --- METRICS ---
+def _callbacks():
+    if not METRICS_ENABLED: return []
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMMetrics(BaseCallbackHandler):
+        """Times every chat model call and counts its tokens, labelled by the graph node that made it."""
+        run_inline = True
+
+        def __init__(self):
+            self._started = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+            node = (metadata or {}).get("langgraph_node", "standalone")
+            self._started[run_id] = (time.perf_counter(), node)
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            node = self._finish(run_id, "ok")
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    if usage.get("input_tokens"): LLM_TOKENS.inc(usage["input_tokens"], node=node, direction="input")
+                    if usage.get("output_tokens"): LLM_TOKENS.inc(usage["output_tokens"], node=node, direction="output")
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._finish(run_id, "error")
+
+        def _finish(self, run_id, outcome):
+            start, node = self._started.pop(run_id, (None, "standalone"))
+            if start is not None:
+                LLM_SECONDS.observe(time.perf_counter() - start, node=node, outcome=outcome)
+            return node
+
+    return [LLMMetrics()]
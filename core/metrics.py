@@ -0,0 +1,123 @@
+import os
+import re
+import time
+import threading
+import functools
+
+# --- CONFIG ---
+# Off: node wrappers return the node unchanged, models get no callbacks (core.llm) and /metrics is not mounted
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _labels_text(names, values):
+    if not names: return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels_text(self.labels, key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound: state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state):
+                    lines.append(f"{self.name}_bucket{_labels_text(names, key + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_labels_text(names, key + ('+Inf',))} {state[-1]}")
+                lines.append(f"{self.name}_sum{_labels_text(self.labels, key)} {state[-2]}")
+                lines.append(f"{self.name}_count{_labels_text(self.labels, key)} {state[-1]}")
+        return lines
+
+# --- METRICS ---
+NODE_SECONDS = Histogram("shadow_node_duration_seconds", "Graph node wall time", ("node", "outcome"))
+GITHUB_SECONDS = Histogram("shadow_github_request_duration_seconds", "GitHub API call latency, per attempt", ("method", "route", "status"))
+GITHUB_REQUESTS = Counter("shadow_github_requests_total", "GitHub API calls, per attempt", ("method", "route", "status"))
+LLM_SECONDS = Histogram("shadow_llm_duration_seconds", "Chat model call latency", ("node", "outcome"))
+LLM_TOKENS = Counter("shadow_llm_tokens_total", "Chat model tokens as reported by the provider", ("node", "direction"))
+
+METRICS = [NODE_SECONDS, GITHUB_SECONDS, GITHUB_REQUESTS, LLM_SECONDS, LLM_TOKENS]
+# Callables returning [(name, type, help, {label: value}, value)] read at scrape time
+COLLECTORS = []
+
+def register_collector(collect):
+    COLLECTORS.append(collect)
+    return collect
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    families = {}
+    for collect in COLLECTORS:
+        for name, kind, help_text, labels, value in collect():
+            family = families.setdefault(name, [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"])
+            family.append(f"{name}{_labels_text(tuple(labels), tuple(labels.values()))} {value}")
+    for family in families.values():
+        lines.extend(family)
+    return "\n".join(lines) + "\n"
+
+# --- INSTRUMENTATION ---
+_REPO_ROUTE = re.compile(r"^/repos/[^/]+/[^/]+(/git/[a-z]+|/[a-z]+)?")
+
+def github_route(url):
+    """Low-cardinality label for a GitHub URL: '/repos/owner/x/commits/abc' -> '/repos/:owner/:repo/commits'"""
+    if url.startswith("http"): return "raw"
+    match = _REPO_ROUTE.match(url)
+    if match: return f"/repos/:owner/:repo{match.group(1) or ''}"
+    return url.split("?", 1)[0]
+
+def observe_github(method, url, status, seconds):
+    route, status = github_route(str(url)), str(status)
+    GITHUB_SECONDS.observe(seconds, method=method, route=route, status=status)
+    GITHUB_REQUESTS.inc(method=method, route=route, status=status)
+
+def timed_node(name, node):
+    """Wraps an async graph node with a latency histogram. Returns the node itself when metrics are off."""
+    if not METRICS_ENABLED: return node
+
+    @functools.wraps(node)
+    async def wrapper(state):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await node(state)
+            outcome = "ok"
+            return result
+        finally:
+            NODE_SECONDS.observe(time.perf_counter() - start, node=name, outcome=outcome)
+    return wrapper
@@ -0,0 +1,28 @@
+import os
+import uuid
+from agents.manager.manager import astream_manager
+from agents.devops.devops import Provisioner, IN_FLIGHT
+
+# --- CONFIG ---
+# Start provisioning while the manager is still writing the plan instead of after it
+PIPELINED_SETUP = os.getenv("PIPELINED_SETUP", "1") == "1"
+
+async def aplan_and_provision_node(state):
+    """
+    The manager node, with DevOps listening in: the repo is claimed as soon as
+    the streamed plan names the project and each ticket becomes an issue as soon
+    as it is complete. The repo and devops nodes then pick up that work instead of starting it;
+    the repo also goes into the state, so it survives a restart of the process.
+    """
+    provisioner = Provisioner()
+    try:
+        result = await astream_manager(state, on_item=provisioner.on_item)
+        # Into the checkpoint with the plan: a restarted run reuses this repo instead of creating a second one
+        repo = await provisioner.started_repo()
+    except BaseException:
+        await provisioner.cancel()
+        raise
+
+    provisioning_id = uuid.uuid4().hex
+    IN_FLIGHT[provisioning_id] = provisioner
+    return {**result, "provisioning_id": provisioning_id, **({"repo": repo} if repo else {})}
@@ -0,0 +1,177 @@
+import os
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from core.cache import CACHE_DB_PATH
+
+# --- CONFIG ---
+QUOTA_ENABLED = os.getenv("QUOTA_ENABLED", "1") == "1"
+# Shared by every worker process on the host; defaults to the cache database
+QUOTA_DB_PATH = os.getenv("SHADOW_QUOTA_DB", CACHE_DB_PATH)
+# Seconds for a throttled bucket to climb back to its configured rate
+QUOTA_RECOVERY_SECONDS = float(os.getenv("QUOTA_RECOVERY_SECONDS", "60"))
+# Adaptation never takes a bucket below this share of its configured rate
+QUOTA_MIN_SHARE = float(os.getenv("QUOTA_MIN_SHARE", "0.05"))
+# Longest single sleep before a waiter re-checks the shared bucket
+QUOTA_MAX_SLEEP = float(os.getenv("QUOTA_MAX_SLEEP", "5"))
+# Threads that run bucket transactions for async callers; a locked database never blocks the event loop
+QUOTA_IO_THREADS = int(os.getenv("QUOTA_IO_THREADS", "4"))
+
+_io = ThreadPoolExecutor(max_workers=QUOTA_IO_THREADS, thread_name_prefix="quota")
+
+def credential_id(secret):
+    """Stable, non-reversible label for a token or API key."""
+    return hashlib.sha256((secret or "").encode("utf-8")).hexdigest()[:12]
+
+class TokenBucket:
+    """
+    Token bucket for one upstream and credential, kept in SQLite so every uvicorn
+    worker on the host draws from the same budget.
+
+    Callers that find it empty are queued rather than failed: one waiter per
+    process polls the shared row, the rest wait behind it in arrival order.
+    The rate adapts to the upstream: quota headers cap it to what is left in
+    the window, a rejection halves it and pauses the bucket for Retry-After,
+    and it climbs back to the configured rate over QUOTA_RECOVERY_SECONDS.
+
+    Every transaction is synchronous SQLite that may wait on another worker's
+    write lock, so async code uses the a-prefixed methods, which run it on
+    the quota thread pool.
+    """
+
+    def __init__(self, name, rate, capacity, path=QUOTA_DB_PATH):
+        self.name = name
+        self.base_rate = rate
+        self.capacity = capacity
+        self.waits = 0
+        self.waited = 0.0
+        self.throttles = 0
+        self._lock = threading.Lock()
+        self._locks = weakref.WeakKeyDictionary()
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS quota_buckets "
+            "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, rate REAL NOT NULL, paused_until REAL NOT NULL)"
+        )
+        self._db.execute(
+            "INSERT OR IGNORE INTO quota_buckets VALUES (?, ?, ?, ?, 0)", (name, capacity, time.time(), rate)
+        )
+
+    # --- SHARED STATE ---
+    def _update(self, decide):
+        """Runs decide(tokens, rate, paused_until, now) -> (tokens, rate, paused_until, result) in one write transaction."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated, rate, paused_until = self._db.execute(
+                    "SELECT tokens, updated, rate, paused_until FROM quota_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                elapsed = max(0.0, now - updated)
+                rate = min(self.base_rate, rate + self.base_rate * elapsed / QUOTA_RECOVERY_SECONDS)
+                tokens = min(self.capacity, tokens + elapsed * rate)
+                tokens, rate, paused_until, result = decide(tokens, rate, paused_until, now)
+                self._db.execute(
+                    "UPDATE quota_buckets SET tokens = ?, updated = ?, rate = ?, paused_until = ? WHERE name = ?",
+                    (tokens, now, rate, paused_until, self.name)
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return result
+
+    def try_acquire(self, cost=1.0):
+        """Takes `cost` tokens if they are there. Returns 0, or the seconds to wait before trying again."""
+        def take(tokens, rate, paused_until, now):
+            if now < paused_until: return tokens, rate, paused_until, paused_until - now
+            if tokens >= cost: return tokens - cost, rate, paused_until, 0.0
+            return tokens, rate, paused_until, (cost - tokens) / rate
+        return self._update(take)
+
+    def throttle(self, retry_after=None):
+        """The upstream rejected a call for quota: halve the rate, drain the bucket, pause for retry_after seconds."""
+        self.throttles += 1
+        floor = self.base_rate * QUOTA_MIN_SHARE
+        pause = retry_after or 0.0
+        self._update(lambda tokens, rate, paused_until, now: (0.0, max(rate / 2, floor), max(paused_until, now + pause), None))
+
+    def observe_remaining(self, remaining, reset_at):
+        """Quota headers: never plan to spend more than `remaining` calls before `reset_at` (epoch seconds)."""
+        floor = self.base_rate * QUOTA_MIN_SHARE
+
+        def adapt(tokens, rate, paused_until, now):
+            window = reset_at - now
+            if window <= 0: return tokens, rate, paused_until, None
+            if remaining <= 0: return 0.0, rate, max(paused_until, reset_at), None
+            return min(tokens, remaining), max(min(rate, remaining / window), floor), paused_until, None
+        self._update(adapt)
+
+    # --- ASYNC ---
+    async def _offload(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(_io, method, *args)
+
+    async def atry_acquire(self, cost=1.0): return await self._offload(self.try_acquire, cost)
+    async def athrottle(self, retry_after=None): return await self._offload(self.throttle, retry_after)
+    async def aobserve_remaining(self, remaining, reset_at): return await self._offload(self.observe_remaining, remaining, reset_at)
+
+    # --- WAITING ---
+    def _local_lock(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._locks: self._locks[loop] = asyncio.Lock()
+        return self._locks[loop]
+
+    async def acquire(self, cost=1.0):
+        """Waits (never fails) until `cost` tokens are available, then takes them."""
+        if not QUOTA_ENABLED: return
+        lock = self._local_lock()
+        # Fast path only when nobody is queued, so waiters keep their place in line
+        if not lock.locked() and not await self.atry_acquire(cost): return
+        async with lock:
+            started = time.monotonic()
+            wait = await self.atry_acquire(cost)
+            if not wait: return
+            while wait:
+                await asyncio.sleep(min(wait, QUOTA_MAX_SLEEP))
+                wait = await self.atry_acquire(cost)
+            self._waited(started)
+
+    def acquire_blocking(self, cost=1.0):
+        """acquire() for synchronous callers."""
+        if not QUOTA_ENABLED: return
+        started = time.monotonic()
+        wait = self.try_acquire(cost)
+        if not wait: return
+        while wait:
+            time.sleep(min(wait, QUOTA_MAX_SLEEP))
+            wait = self.try_acquire(cost)
+        self._waited(started)
+
+    def _waited(self, started):
+        self.waits += 1
+        self.waited += time.monotonic() - started
+
+    def stats(self):
+        return {"rate": self.base_rate, "capacity": self.capacity, "waits": self.waits,
+                "waited_seconds": round(self.waited, 3), "throttles": self.throttles}
+
+# --- BUCKETS ---
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def bucket(upstream, credential, rate, capacity):
+    """The process's TokenBucket for (upstream, credential); the state behind it is shared across processes."""
+    name = f"{upstream}:{credential_id(credential)}"
+    with _buckets_lock:
+        if name not in _buckets: _buckets[name] = TokenBucket(name, rate, capacity)
+        return _buckets[name]
+
+def quota_stats():
+    return {name: b.stats() for name, b in _buckets.items()}
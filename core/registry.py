@@ -0,0 +1,69 @@
+import asyncio
+import importlib
+import threading
+import time
+
+# Declared up front, imported on first use. "module:attribute"
+AGENTS = {
+    "manager": "agents.manager.manager:amanager_node",
+    "plan_and_provision": "core.pipeline:aplan_and_provision_node",
+    "repo": "agents.devops.devops:arepo_node",
+    "devops": "agents.devops.devops:adevops_node",
+    "cache_lookup": "core.review_cache:acache_lookup_node",
+    "snapshot": "core.snapshot:asnapshot_node",
+    "security": "agents.security.security:asecurity_node",
+    "senior_dev": "agents.senior_dev.senior_dev:adraft_review_node",
+    "screen": "core.speculative:ascreen_node",
+    "publish": "agents.senior_dev.senior_dev:apublish_review_node",
+    "remember": "core.review_cache:aremember_node",
+    "deliver": "agents.senior_dev.senior_dev:adeliver_review_node",
+}
+# Builders returning a compiled graph; each graph is compiled once, on first use
+GRAPHS = {
+    "setup": "core.graphs:build_setup_graph",
+    "review": "core.graphs:build_review_graph",
+    "review_ephemeral": "core.graphs:build_ephemeral_review_graph",
+}
+
+def _resolve(spec):
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+class Registry:
+    """Name -> object, loaded (and for graphs, built) the first time it is asked for."""
+
+    def __init__(self, specs, build=False):
+        self.specs = dict(specs)
+        self.build = build
+        self._loaded = {}
+        self._lock = threading.RLock()
+
+    def get(self, name):
+        obj = self._loaded.get(name)
+        if obj is not None: return obj
+        with self._lock:
+            if name not in self._loaded:
+                if name not in self.specs: raise KeyError(f"Nothing registered as '{name}'")
+                target = _resolve(self.specs[name])
+                self._loaded[name] = target() if self.build else target
+            return self._loaded[name]
+
+    async def aget(self, name):
+        """get() for the event loop: a first load (or one queued behind warm_up) waits in a thread."""
+        obj = self._loaded.get(name)
+        if obj is not None: return obj
+        return await asyncio.to_thread(self.get, name)
+
+    def loaded(self):
+        return sorted(self._loaded)
+
+agents = Registry(AGENTS)
+graphs = Registry(GRAPHS, build=True)
+
+def warm_up():
+    """Imports every agent, compiles every graph and loads the model SDK. Returns seconds taken."""
+    from core.llm import preload
+    start = time.perf_counter()
+    for name in GRAPHS: graphs.get(name)
+    preload()
+    return time.perf_counter() - start
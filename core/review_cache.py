@@ -0,0 +1,86 @@
+import os
+import asyncio
+from core.cache import SQLiteLRU
+from core.github import github, parse_repo_url
+
+# --- CONFIG ---
+REVIEW_CACHE_ENABLED = os.getenv("REVIEW_CACHE_ENABLED", "1") == "1"
+REVIEW_CACHE_MAX_VERDICTS = int(os.getenv("REVIEW_CACHE_MAX_VERDICTS", "2000"))
+REVIEW_CACHE_MAX_BLOBS = int(os.getenv("REVIEW_CACHE_MAX_BLOBS", "100000"))
+
+# Full review result per head commit, security findings per file content
+verdicts = SQLiteLRU("review_verdicts", REVIEW_CACHE_MAX_VERDICTS)
+blob_findings = SQLiteLRU("blob_findings", REVIEW_CACHE_MAX_BLOBS)
+
+# "posted" is False for a verdict pre-computed on push (core/webhooks.py) whose review isn't on GitHub yet
+VERDICT_FIELDS = ("messages", "security_status", "security_findings", "review_status", "posted")
+
+def verdict_key(owner, repo, sha):
+    return f"{owner}/{repo}@{sha}"
+
+async def resolve_head_sha(owner, repo):
+    response = await github.get(f"/repos/{owner}/{repo}/commits/HEAD")
+    return response.json()["sha"] if response.status_code == 200 else None
+
+async def review_key(repo_url):
+    """
+    ('owner/repo@sha', sha) identifying what a review request would judge; used
+    to coalesce concurrent reviews of the same commit. Falls back to the branch
+    head name when the commit can't be resolved.
+    """
+    try:
+        owner, repo = parse_repo_url(repo_url)
+        sha = await resolve_head_sha(owner, repo)
+    except Exception as e:
+        print(f"⚠️ Could not resolve head commit: {e}")
+        return repo_url.rstrip("/").lower(), None
+    return verdict_key(owner.lower(), repo.lower(), sha or "HEAD"), sha
+
+async def acache_lookup_node(state):
+    """Resolves the head commit (unless the caller already did) and short-circuits the review if it was already judged."""
+    print("--- REVIEW CACHE LOOKUP ---")
+    try:
+        owner, repo = parse_repo_url(state.get("repo_url", ""))
+        sha = state.get("head_sha") or await resolve_head_sha(owner, repo)
+    except Exception as e:
+        print(f"⚠️ Could not resolve head commit: {e}")
+        return {"head_sha": None, "cached": False}
+
+    if not sha or not REVIEW_CACHE_ENABLED:
+        return {"head_sha": sha, "cached": False}
+
+    cached = await verdicts.aget(verdict_key(owner, repo, sha))
+    if cached is None:
+        return {"head_sha": sha, "cached": False}
+
+    print(f"⚡ Cached verdict for {owner}/{repo}@{sha[:7]}")
+    return {**cached, "head_sha": sha, "cached": True}
+
+def route_cache(state):
+    if not state.get("cached"): return "snapshot"
+    # A pre-computed review is posted the first time someone submits its commit
+    if state.get("publish", True) and state.get("posted") is False: return "deliver"
+    return "end"
+
+async def aremember_node(state):
+    """Stores the finished verdict under the commit it was computed for. Errors are never cached."""
+    snapshot = state.get("snapshot") or {}
+    if not REVIEW_CACHE_ENABLED or snapshot.get("error") or not snapshot.get("sha"): return {}
+    if state.get("security_status") != "blocked" and not state.get("review_status"): return {}
+
+    key = verdict_key(snapshot["owner"], snapshot["repo"], snapshot["sha"])
+    # A pre-review racing a submit never replaces the verdict the user already got (and may have had posted)
+    if not state.get("publish", True) and await verdicts.aget(key) is not None: return {}
+    # Blocked runs have nothing to post
+    await verdicts.aput(key, {**{field: state.get(field) for field in VERDICT_FIELDS}, "posted": state.get("posted", True)})
+    return {}
+
+async def mark_posted(owner, repo, sha):
+    await asyncio.to_thread(_mark_posted, verdict_key(owner, repo, sha))
+
+def _mark_posted(key):
+    verdict = verdicts.get(key)
+    if verdict is not None: verdicts.put(key, {**verdict, "posted": True})
+
+def cache_stats():
+    return {"verdicts": verdicts.stats(), "blob_findings": blob_findings.stats()}
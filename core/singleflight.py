@@ -0,0 +1,111 @@
+import asyncio
+
+class _Broadcast:
+    """Items produced by one stream, replayed to every consumer that joins it."""
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.error = None
+        self.changed = asyncio.Event()
+
+    async def finished(self):
+        while not self.done: await self.changed.wait()
+
+    def wake(self):
+        # Each wait gets a fresh event; setting the old one releases everyone waiting on it
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work: while a call for `key` is running, more
+    calls with the same key wait for it instead of starting their own, and all
+    of them get its result. Nothing is kept once it finishes; caching finished
+    results is the caches' job.
+
+    The shared work is shielded, so a caller that goes away (a closed browser
+    tab) doesn't cancel it for the others.
+
+    do() and stream() for the same key also join each other, given a way to
+    turn one's output into the other's: `from_stream(items)` gives a plain
+    caller the result of a stream, `from_result(result)` gives a streaming
+    caller the items for a plain call's result.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.leaders = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._streams = {}
+
+    async def do(self, key, fn, from_stream=None):
+        """Result of `await fn()`, shared with every concurrent call for the same key."""
+        broadcast = self._streams.get(key)
+        if broadcast is not None and from_stream is not None:
+            self.coalesced += 1
+            print(f"🔗 Joined in-flight {self.name} stream for {key}")
+            await broadcast.finished()
+            if broadcast.error: raise broadcast.error
+            return from_stream(broadcast.items)
+
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+            print(f"🔗 Joined in-flight {self.name} run for {key}")
+        return await asyncio.shield(task)
+
+    async def stream(self, key, make_stream, from_result=None):
+        """
+        Yields the items of the async iterator `make_stream()`, shared with every
+        concurrent call for the same key. Late joiners get the items they missed first.
+        """
+        task = self._calls.get(key)
+        if task is not None and from_result is not None and key not in self._streams:
+            self.coalesced += 1
+            print(f"🔗 Joined in-flight {self.name} run for {key}")
+            for item in from_result(await asyncio.shield(task)): yield item
+            return
+
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.leaders += 1
+            broadcast = self._streams[key] = _Broadcast()
+            asyncio.ensure_future(self._pump(key, broadcast, make_stream()))
+        else:
+            self.coalesced += 1
+            print(f"🔗 Joined in-flight {self.name} stream for {key}")
+
+        seen = 0
+        while True:
+            changed = broadcast.changed
+            while seen < len(broadcast.items):
+                yield broadcast.items[seen]
+                seen += 1
+            if broadcast.done:
+                if broadcast.error: raise broadcast.error
+                return
+            await changed.wait()
+
+    async def _pump(self, key, broadcast, stream):
+        try:
+            async for item in stream:
+                broadcast.items.append(item)
+                broadcast.wake()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            broadcast.done = True
+            self._streams.pop(key, None)
+            broadcast.wake()
+
+    def stats(self):
+        return {"in_flight": len(self._calls) + len(self._streams), "leaders": self.leaders, "coalesced": self.coalesced}
+
+review_flights = SingleFlight("review")
+setup_flights = SingleFlight("setup")
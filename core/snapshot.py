@@ -0,0 +1,103 @@
+import os
+import asyncio
+from core.github import github, parse_repo_url
+from core.ingest import download_archive, iter_archive
+
+# --- CONFIG ---
+# "archive": whole repo from one tarball request. "contents": root listing only, one request per file.
+INGEST_MODE = os.getenv("INGEST_MODE", "archive")
+CODE_EXTENSIONS = (".py", ".js", ".html")
+
+def pick_target(paths):
+    """The one file both reviewers look at: main.py, then any .py, then any .js/.html (shallowest first)."""
+    ordered = sorted(paths, key=lambda p: (p.count("/"), p))
+    for path in ordered:
+        if path.rsplit("/", 1)[-1] == "main.py": return path
+    for ext in CODE_EXTENSIONS:
+        for path in ordered:
+            if path.endswith(ext): return path
+    return None
+
+async def _get_json(url, **kwargs):
+    response = await github.get(url, **kwargs)
+    return response.json() if response.status_code == 200 else None
+
+async def _download(path, url):
+    response = await github.get(url)
+    return path, response.text
+
+async def _ingest_contents(owner, repo):
+    listing = await _get_json(f"/repos/{owner}/{repo}/contents")
+    if not isinstance(listing, list): return None, None, []
+
+    files = [
+        {"path": f["path"], "sha": f["sha"], "size": f.get("size", 0), "download_url": f["download_url"]}
+        for f in listing if f.get("type") == "file"
+    ]
+    code_files = [f for f in files if f["path"].endswith(CODE_EXTENSIONS)]
+    blobs = dict(await asyncio.gather(*(_download(f["path"], f["download_url"]) for f in code_files)))
+    return files, blobs, []
+
+async def _ingest_archive(owner, repo, sha):
+    archive = await download_archive(owner, repo, sha)
+    if archive is None: return None, None, []
+    # Decompression is CPU work; keep it off the event loop
+    unscanned = []
+    entries = await asyncio.to_thread(lambda: list(iter_archive(archive, unscanned=unscanned)))
+    files = [{"path": f["path"], "sha": f["sha"], "size": f["size"]} for f in entries]
+    blobs = {f["path"]: f["text"] for f in entries}
+    return files, blobs, unscanned
+
+async def _head_sha(owner, repo, sha):
+    if sha: return sha
+    commit = await _get_json(f"/repos/{owner}/{repo}/commits/HEAD")
+    return commit["sha"] if commit else None
+
+async def fetch_snapshot(repo_url, sha=None):
+    """
+    Fetches everything a review needs in one pass:
+    head commit SHA, file listing, file blobs (plus the files too large to
+    fetch, under "unscanned") and open issues.
+    Pass `sha` when the head commit is already known.
+    """
+    try:
+        owner, repo = parse_repo_url(repo_url)
+        sha, issues = await asyncio.gather(
+            _head_sha(owner, repo, sha),
+            _get_json(f"/repos/{owner}/{repo}/issues", params={"state": "open"})
+        )
+
+        if INGEST_MODE == "archive":
+            files, blobs, unscanned = await _ingest_archive(owner, repo, sha) if sha else (None, None, [])
+        else:
+            files, blobs, unscanned = await _ingest_contents(owner, repo)
+        if files is None:
+            return {"owner": owner, "repo": repo, "error": "ERROR_ACCESS"}
+
+        return {
+            "owner": owner,
+            "repo": repo,
+            "sha": sha,
+            "files": files,
+            "blobs": blobs,
+            # Text files over the ingest limits: never read, so never scanned or reviewed
+            "unscanned": unscanned,
+            "target": pick_target([path for path in blobs if path.endswith(CODE_EXTENSIONS)]),
+            "issues": [{"number": i["number"], "title": i["title"], "body": i.get("body") or ""} for i in issues or []],
+            "error": None
+        }
+    except Exception as e:
+        return {"error": f"ERROR: {str(e)}"}
+
+async def asnapshot_node(state):
+    print("--- SNAPSHOT STARTED ---")
+    snapshot = await fetch_snapshot(state.get("repo_url", ""), sha=state.get("head_sha"))
+    if snapshot.get("error"):
+        print(f"⚠️ Snapshot failed: {snapshot['error']}")
+    else:
+        print(f"📸 Snapshot {snapshot['owner']}/{snapshot['repo']}@{(snapshot['sha'] or '')[:7]}: {len(snapshot['blobs'])} files")
+    return {"snapshot": snapshot}
+
+async def ensure_snapshot(state):
+    """Snapshot from the graph state, or a fresh one when an agent runs standalone."""
+    return state.get("snapshot") or await fetch_snapshot(state.get("repo_url", ""))
@@ -0,0 +1,41 @@
+import os
+import asyncio
+from langchain_core.callbacks.manager import adispatch_custom_event
+from agents.security.security import asecurity_node
+from agents.senior_dev.senior_dev import adraft_review_node
+
+# --- CONFIG ---
+# Draft the review while the secret scan runs instead of after it
+SPECULATIVE_REVIEW = os.getenv("SPECULATIVE_REVIEW", "1") == "1"
+
+# Custom event sent once the scan is clean; streams hold the draft's tokens until then (api/streaming.py)
+SCAN_PASSED = "scan_passed"
+
+async def ascreen_node(state):
+    """
+    Security scan and review draft side by side. The draft is only text until
+    the publish node posts it, so a blocking scan just cancels it: the LLM call
+    is abandoned and nothing reaches GitHub. Streamed draft tokens are held
+    back until SCAN_PASSED, so a blocked submission never shows them either.
+    """
+    print("--- SCREEN STARTED (scan + speculative review) ---")
+    draft = asyncio.create_task(adraft_review_node(state))
+    try:
+        verdict = await asecurity_node(state)
+    except BaseException:
+        draft.cancel()
+        raise
+
+    if verdict.get("security_status") == "blocked":
+        draft.cancel()
+        await asyncio.gather(draft, return_exceptions=True)
+        print("🗑️ Scan blocked the submission; speculative review discarded")
+        return verdict
+
+    try:
+        await adispatch_custom_event(SCAN_PASSED, {"security_status": verdict.get("security_status")})
+    except RuntimeError:
+        pass  # Not running inside a graph; nobody is streaming
+
+    # Draft errors (no draft_review) replace the scan's "passed" message, as in the sequential graph
+    return {**verdict, **(await draft)}
@@ -0,0 +1,110 @@
+import os
+import hmac
+import asyncio
+import hashlib
+from core.registry import graphs
+from agents.devops.repo_pool import CLAIMED_DESCRIPTION
+
+# --- CONFIG ---
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET")
+# Public URL of POST /github/webhook; when set (with the secret) DevOps subscribes every repo it provisions
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+# A repo must be quiet this long after a push before its head is reviewed; every newer push restarts the wait
+WEBHOOK_DEBOUNCE_SECONDS = float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "20"))
+
+NULL_SHA = "0" * 40
+
+def verify_signature(body, signature):
+    """Checks X-Hub-Signature-256 ('sha256=<hex HMAC of the raw body>') against GITHUB_WEBHOOK_SECRET."""
+    if not GITHUB_WEBHOOK_SECRET or not signature or not signature.startswith("sha256="): return False
+    expected = hmac.new(GITHUB_WEBHOOK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+def push_target(payload):
+    """
+    (target, None) for a push to the default branch of a repo DevOps provisioned,
+    else (None, reason). target is {"owner", "repo", "sha", "repo_url"}.
+    """
+    repository = payload.get("repository") or {}
+    branch = repository.get("default_branch") or "main"
+    if payload.get("ref") != f"refs/heads/{branch}": return None, f"not a push to {branch}"
+    sha = payload.get("after")
+    if payload.get("deleted") or not sha or sha == NULL_SHA: return None, "branch deleted"
+    if repository.get("description") != CLAIMED_DESCRIPTION: return None, "not a provisioned repository"
+    owner = (repository.get("owner") or {}).get("login") or (repository.get("owner") or {}).get("name")
+    if not owner or not repository.get("name"): return None, "no repository in payload"
+    return {"owner": owner, "repo": repository["name"], "sha": sha, "repo_url": repository["html_url"]}, None
+
+async def prereview(repo_url, sha):
+    """Scan + review of one commit with publishing off; the review cache keeps the verdict under its SHA, unposted."""
+    graph = await graphs.aget("review_ephemeral")
+    return await graph.ainvoke({
+        "repo_url": repo_url,
+        "messages": [],
+        "security_status": "clean",
+        "head_sha": sha,
+        "publish": False
+    })
+
+class PushReviews:
+    """
+    Reviews pushed commits in the background so Submit finds the verdict ready.
+
+    Every push (re)starts a per-repo debounce timer; once the repo has been
+    quiet for `debounce` seconds its latest commit is reviewed. A newer push
+    also cancels a review still running for an older commit, unless a submit
+    for that commit is waiting on it.
+    """
+
+    def __init__(self, debounce=WEBHOOK_DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self._repos = {}
+        self.stats = {"pushes": 0, "superseded": 0, "reviewed": 0, "failed": 0, "joined": 0}
+
+    def push(self, owner, repo, sha, repo_url):
+        name = f"{owner}/{repo}".lower()
+        self.stats["pushes"] += 1
+        current = self._repos.get(name)
+        if current and not current["task"].done():
+            if current["sha"] == sha: return  # Redelivery of a push we already have
+            if not current["waiters"]:
+                current["task"].cancel()
+                self.stats["superseded"] += 1
+        entry = {"sha": sha, "reviewing": False, "waiters": 0}
+        entry["task"] = asyncio.create_task(self._run(name, entry, repo_url))
+        self._repos[name] = entry
+
+    async def _run(self, name, entry, repo_url):
+        try:
+            await asyncio.sleep(self.debounce)
+            entry["reviewing"] = True
+            print(f"🪝 Pre-reviewing {name}@{entry['sha'][:7]}")
+            await prereview(repo_url, entry["sha"])
+            self.stats["reviewed"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"⚠️ Pre-review of {name}@{entry['sha'][:7]} failed: {e}")
+        finally:
+            if self._repos.get(name) is entry: del self._repos[name]
+
+    async def wait(self, owner, repo, sha):
+        """A submit for a commit whose pre-review is already running waits for it instead of reviewing it again."""
+        entry = self._repos.get(f"{owner}/{repo}".lower())
+        if not entry or entry["sha"] != sha or not entry["reviewing"]: return
+        self.stats["joined"] += 1
+        print(f"🔗 Waiting for the pre-review of {owner}/{repo}@{sha[:7]}")
+        entry["waiters"] += 1
+        try:
+            # asyncio.wait never raises the task's error, and cancelling the caller leaves the task running
+            await asyncio.wait({entry["task"]})
+        finally:
+            entry["waiters"] -= 1
+
+    async def stop(self):
+        tasks = [entry["task"] for entry in self._repos.values()]
+        for task in tasks: task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+push_reviews = PushReviews()
@@ -1,10 +1,9 @@
 import os
-from dotenv import load_dotenv
+import sys
 from agents.security.security import security_node
 from agents.senior_dev.senior_dev import senior_dev_node
 
-# 1. Load Environment
-load_dotenv()
+# 1. Environment (.env is loaded by the core package)
 print("--- ENVIRONMENT CHECK ---")
 if os.getenv("GITHUB_TOKEN"):
     print("✅ GITHUB_TOKEN found.")
@@ -16,9 +15,9 @@ if os.getenv("GOOGLE_API_KEY"):
 else:
     print("❌ GOOGLE_API_KEY is MISSING. Check your .env file!")
 
-# 2. Test Data (Use your actual Repo URL from the screenshot)
+# 2. Test Data: python debug_agents.py https://github.com/you/your-repo
 test_state = {
-    "repo_url": "https://github.com/saiyesh1th/simple_task_manager_api-qbte",
+    "repo_url": sys.argv[1] if len(sys.argv) > 1 else "https://github.com/saiyesh1th/simple_task_manager_api-qbte",
     "messages": [],
     "security_status": "clean"
 }
@@ -1,94 +1,330 @@
-from dotenv import load_dotenv
-load_dotenv()
-
-from fastapi import FastAPI
+import os
+import re
+import json
+import time
+import asyncio
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from langgraph.graph import StateGraph, END
-from typing import TypedDict, List
+from typing import Optional
 
-# Import Agents
-from agents.manager.manager import manager_node
-from agents.devops.devops import devops_node
-from agents.senior_dev.senior_dev import senior_dev_node
-from agents.security.security import security_node 
+# Agents and graphs are declared in core.registry and imported/compiled on first use
+from core.registry import graphs, warm_up
+from agents.manager.plan_cache import plan_cache, normalize_prompt
+from agents.devops.repo_pool import repo_pool
+from core.github import github, parse_repo_url
+from core.jobs import JobQueue, QueueFull
+from core.checkpoints import open_checkpointer, close_checkpointer, resume_point, finish as finish_run
+from api.streaming import graph_events, final_result, format_sse
+from core.review_cache import cache_stats, review_key, REVIEW_CACHE_ENABLED
+from core.webhooks import GITHUB_WEBHOOK_SECRET, verify_signature, push_target, push_reviews
+from core.singleflight import review_flights, setup_flights
+from core.quota import quota_stats
+from core.metrics import METRICS_ENABLED, register_collector, render as render_metrics
 
-app = FastAPI()
+# --- CONFIG ---
+# Import agents, compile graphs and load the model SDK in the background right after startup
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "1") == "1"
 
-# --- WORKFLOW 1: SETUP (Get Hired) ---
-class SetupState(TypedDict):
-    messages: List[str]
+app = FastAPI()
 
-setup_workflow = StateGraph(SetupState)
-setup_workflow.add_node("manager", manager_node)
-setup_workflow.add_node("devops", devops_node)
-setup_workflow.set_entry_point("manager")
-setup_workflow.add_edge("manager", "devops")
-setup_workflow.add_edge("devops", END)
-setup_graph = setup_workflow.compile()
+@app.on_event("startup")
+async def start_job_workers():
+    # Before anything builds a graph: graphs are compiled with the checkpointer that is open at the time
+    await open_checkpointer()
+    await setup_jobs.start()
+    await repo_pool.start()
+    if WARM_UP_ON_STARTUP:
+        # Off the event loop so the server is up immediately; first requests wait for it in a thread (graphs.aget)
+        asyncio.create_task(_warm_up())
 
-# --- WORKFLOW 2: REVIEW (The Security Pipeline) ---
-class ReviewState(TypedDict):
-    repo_url: str
-    messages: List[str]
-    security_status: str 
-
-review_workflow = StateGraph(ReviewState)
-review_workflow.add_node("security", security_node)
-review_workflow.add_node("senior_dev", senior_dev_node)
-
-# 1. Start at Security
-review_workflow.set_entry_point("security")
-
-# 2. Define Logic: Stop if blocked, Continue if clean
-def route_security(state):
-    status = state.get("security_status", "clean")
-    if status == "blocked":
-        return "end"       # Blocked! Stop here.
-    return "senior_dev"    # Clean! Go to roast.
-
-# 3. Add the Conditional Edge
-review_workflow.add_conditional_edges(
-    "security",
-    route_security,
-    {
-        "end": END,
-        "senior_dev": "senior_dev"
-    }
-)
+async def _warm_up():
+    try:
+        seconds = await asyncio.to_thread(warm_up)
+        print(f"🔥 Agents and graphs warmed up in {seconds:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Warm-up failed: {e}")
 
-review_workflow.add_edge("senior_dev", END)
-review_graph = review_workflow.compile()
+@app.on_event("shutdown")
+async def close_github_pool():
+    await setup_jobs.stop()
+    await repo_pool.stop()
+    await push_reviews.stop()
+    await github.aclose()
+    await close_checkpointer()
 
 # --- API ENDPOINTS ---
 
 class PromptInput(BaseModel):
     prompt: str
+    idempotency_key: Optional[str] = None
 
-@app.post("/agent/start_job")
-async def start_job(input: PromptInput):
-    """Triggers Manager -> DevOps"""
-    initial_state = {"messages": [input.prompt]}
-    result = setup_graph.invoke(initial_state)
-    return result
+async def run_setup_job(job):
+    """
+    Runs Manager -> DevOps for a queued job, recording each finished node as progress.
+    The job ID is the checkpoint key, so a retried job resumes after its last completed node.
+    """
+    final_state = {}
+    graph = await graphs.aget("setup")
+    initial_state = {"messages": [job["payload"]["prompt"]]}
+    graph_input, config = await resume_point(graph, initial_state, f"setup:{job['id']}")
+    try:
+        async for update in graph.astream(graph_input, config, stream_mode="updates"):
+            for node, output in update.items():
+                final_state.update(output or {})
+                last_msg = (final_state.get("messages") or [""])[-1]
+                job["progress"].append({
+                    "node": node,
+                    "at": time.time(),
+                    "message": last_msg if len(last_msg) < 300 else None
+                })
+                await setup_jobs.save(job)
+        if graph.checkpointer is not None:
+            # A resumed run only streams the nodes it re-ran; the checkpoint has the rest
+            final_state = dict((await graph.aget_state(config)).values)
+    finally:
+        await finish_run(graph, config)
+
+    last_msg = (final_state.get("messages") or [""])[-1]
+    url_match = re.search(r'(https://github\.com/[^\s]+)', last_msg)
+    if not url_match: raise RuntimeError(last_msg or "Provisioning produced no repository")
+    job["repo_url"] = url_match.group(0)
+    return final_state
+
+setup_jobs = JobQueue(run_setup_job)
+
+def setup_key(prompt, idempotency_key):
+    """Identical setups: same normalized prompt AND same key. Without a key every request gets its own repo."""
+    return idempotency_key and f"{normalize_prompt(prompt)}|{idempotency_key}"
+
+@app.post("/agent/start_job", status_code=202)
+async def start_job(input: PromptInput, idempotency_key: Optional[str] = Header(None)):
+    """Queues Manager -> DevOps and returns a job ID right away. Poll /agent/jobs/{id}."""
+    # Header wins over body; a retry with the same key gets the original job back
+    key = idempotency_key or input.idempotency_key
+    try:
+        job = await asyncio.to_thread(setup_jobs.submit, {"prompt": input.prompt}, setup_key(input.prompt, key))
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {e}")
+    return {"job_id": job["id"], "status": job["status"], "status_url": f"/agent/jobs/{job['id']}"}
+
+@app.post("/agent/jobs/{job_id}/retry", status_code=202)
+def retry_job(job_id: str):
+    """Queues a failed job again. It resumes after the last step that completed (plan, repo...)."""
+    job = setup_jobs.get(job_id)
+    if not job: raise HTTPException(status_code=404, detail="Unknown job ID")
+    if job["status"] != "failed": raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    try:
+        setup_jobs.retry(job_id)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {e}")
+    return {"job_id": job["id"], "status": job["status"], "status_url": f"/agent/jobs/{job['id']}"}
+
+@app.get("/agent/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status, per-node progress and (once done) the repo URL of a setup job"""
+    job = setup_jobs.get(job_id)
+    if not job: raise HTTPException(status_code=404, detail="Unknown job ID")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "prompt": job["payload"]["prompt"],
+        "progress": job["progress"],
+        "repo_url": job["repo_url"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created": job["created"],
+        "updated": job["updated"]
+    }
 
 class ReviewInput(BaseModel):
     repo_url: str
 
 @app.post("/agent/review_code")
-async def review_code(input: ReviewInput):
-    """Triggers Security -> Senior Dev"""
+async def review_code(input: ReviewInput, idempotency_key: Optional[str] = Header(None)):
+    """
+    Triggers Snapshot -> Security + Senior Dev draft -> Publish (only if clean).
+    Concurrent requests for the same commit share one run (and one posted review).
+    Retrying with the same Idempotency-Key resumes a run that failed part-way.
+    """
+    key, sha = await review_key(input.repo_url)
+    await wait_for_prereview(input.repo_url, sha)
     # Initialize with status='clean' just in case
     initial_state = {
         "repo_url": input.repo_url, 
         "messages": [], 
-        "security_status": "clean"
+        "security_status": "clean",
+        "head_sha": sha
     }
-    result = review_graph.invoke(initial_state)
+    # A streamed submit of the same commit may already be running: take its result instead of reviewing twice
+    return await review_flights.do(key, lambda: run_review(initial_state, idempotency_key), from_stream=final_result)
+
+async def wait_for_prereview(repo_url, sha):
+    """If this commit's push is being reviewed right now, let that finish: the run below then just delivers its verdict."""
+    if not sha: return
+    owner, repo = parse_repo_url(repo_url)
+    await push_reviews.wait(owner, repo, sha)
+
+async def run_review(initial_state, idempotency_key=None):
+    """One review graph run; its result is shared by every request coalesced onto it, so it is never mutated after return."""
+    run_id = idempotency_key and f"review:{idempotency_key}"
+    graph = await graphs.aget("review" if run_id else "review_ephemeral")
+    graph_input, config = await resume_point(graph, initial_state, run_id)
+    try:
+        result = await graph.ainvoke(graph_input, config)
+    finally:
+        await finish_run(graph, config, resumable=bool(run_id))
+    # The snapshot carries every file in the repo; don't echo it back
+    result.pop("snapshot", None)
+    result.pop("draft_review", None)
     return result
 
+# --- PUSH WEBHOOK ---
+@app.post("/github/webhook", status_code=202)
+async def github_webhook(
+    request: Request,
+    x_github_event: Optional[str] = Header(None),
+    x_hub_signature_256: Optional[str] = Header(None)
+):
+    """
+    GitHub push webhook. A push to main of a provisioned repo schedules a background
+    scan + review of the new head (debounced, nothing posted); Submit for that
+    commit then gets the stored verdict at once and only then posts the review.
+    """
+    if not GITHUB_WEBHOOK_SECRET: raise HTTPException(status_code=503, detail="GITHUB_WEBHOOK_SECRET is not set")
+    body = await request.body()
+    if not verify_signature(body, x_hub_signature_256): raise HTTPException(status_code=401, detail="Invalid signature")
+
+    if x_github_event == "ping": return {"status": "pong"}
+    if x_github_event != "push": return {"status": "ignored", "reason": f"'{x_github_event}' events are not handled"}
+    if not REVIEW_CACHE_ENABLED: return {"status": "ignored", "reason": "the review cache is disabled"}
+    try:
+        target, reason = push_target(json.loads(body))
+    except (ValueError, AttributeError, KeyError):
+        raise HTTPException(status_code=400, detail="Malformed push payload")
+    if target is None: return {"status": "ignored", "reason": reason}
+
+    push_reviews.push(target["owner"], target["repo"], target["sha"], target["repo_url"])
+    return {"status": "scheduled", "repo": f"{target['owner']}/{target['repo']}", "sha": target["sha"]}
+
+# --- STREAMING VARIANTS (Server-Sent Events) ---
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+async def run_events(graph_name, initial_state, run_id=None, **kwargs):
+    """graph_events for a checkpointed run: resumes `run_id` if it stopped part-way, clears it once done."""
+    graph = await graphs.aget(graph_name)
+    graph_input, config = await resume_point(graph, initial_state, run_id)
+    try:
+        async for frame in graph_events(graph, graph_input, config=config, **kwargs):
+            yield frame
+    finally:
+        await finish_run(graph, config, resumable=bool(run_id))
+
+@app.post("/agent/start_job/stream")
+async def start_job_stream(input: PromptInput, idempotency_key: Optional[str] = Header(None)):
+    """Same as /agent/start_job, streamed as node events plus the final result"""
+    initial_state = {"messages": [input.prompt]}
+    key = idempotency_key or input.idempotency_key
+    events = lambda: run_events("setup", initial_state, key and f"setup:{key}")
+    # Only keyed requests coalesce: two users asking for the same role still get a repo each
+    flight_key = setup_key(input.prompt, key)
+    return StreamingResponse(
+        setup_flights.stream(flight_key, events) if flight_key else events(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@app.post("/agent/review_code/stream")
+async def review_code_stream(input: ReviewInput, idempotency_key: Optional[str] = Header(None)):
+    """Same as /agent/review_code, streamed as node events, Senior Dev tokens and the final result"""
+    return StreamingResponse(review_frames(input.repo_url, idempotency_key), media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def review_frames(repo_url, idempotency_key):
+    # The first frame goes out before any GitHub round trip or pre-review wait
+    yield format_sse("node_started", {"node": "resolve"})
+    try:
+        key, sha = await review_key(repo_url)
+        await wait_for_prereview(repo_url, sha)
+    except Exception as e:
+        yield format_sse("error", {"message": str(e)})
+        return
+    yield format_sse("node_finished", {"node": "resolve"})
+
+    initial_state = {
+        "repo_url": repo_url,
+        "messages": [],
+        "security_status": "clean",
+        "head_sha": sha
+    }
+    events = lambda: run_events(
+        "review" if idempotency_key else "review_ephemeral", initial_state,
+        idempotency_key and f"review:{idempotency_key}", token_nodes=("senior_dev", "screen"),
+        # The speculative draft streams only once the scan has passed (core/speculative.py:SCAN_PASSED)
+        held_nodes={"screen": "scan_passed"}
+    )
+    # A double-clicked submit joins the stream already running for this commit; one that
+    # finds a plain submit running gets that run's result as its only event
+    async for frame in review_flights.stream(key, events, from_result=lambda result: [format_sse("result", result)]):
+        yield frame
+
+@app.get("/agent/cache/stats")
+def review_cache_stats():
+    """Hit/miss counters for the review, plan and GitHub ETag caches and the repo pool"""
+    return {
+        **cache_stats(),
+        "plans": plan_cache.stats(),
+        "github": github.stats,
+        "jobs": setup_jobs.stats(),
+        "coalescing": {"review": review_flights.stats(), "setup": setup_flights.stats()},
+        "repo_pool": repo_pool.stats(),
+        "quota": quota_stats(),
+        "push_reviews": push_reviews.stats
+    }
+
+# --- METRICS (Prometheus) ---
+@register_collector
+def collect_cache_metrics():
+    """Hit/miss counters kept by the caches and the GitHub client themselves, read at scrape time."""
+    lookups = ("shadow_cache_lookups_total", "counter", "Cache lookups by cache and result")
+    stores = {**cache_stats(), "plans": plan_cache.stats()}
+    plans, pool = stores["plans"], repo_pool.stats()
+    counts = {name: (store["hits"], store["misses"]) for name, store in stores.items()}
+    counts["plan_variants"] = (plans["plan_hits"], plans["plan_misses"])
+    counts["repo_pool"] = (pool["hits"], pool["misses"])
+
+    samples = []
+    for cache, (hits, misses) in counts.items():
+        samples.append((*lookups, {"cache": cache, "result": "hit"}, hits))
+        samples.append((*lookups, {"cache": cache, "result": "miss"}, misses))
+    samples.append((*lookups, {"cache": "github_etag", "result": "hit"}, github.stats["not_modified"]))
+    for name, store in stores.items():
+        samples.append(("shadow_cache_entries", "gauge", "Entries currently stored per cache", {"cache": name}, store["entries"]))
+    coalesced = ("shadow_coalesced_requests_total", "counter", "Requests that joined an identical in-flight run")
+    samples.append((*coalesced, {"flight": "review"}, review_flights.coalesced))
+    samples.append((*coalesced, {"flight": "setup"}, setup_flights.coalesced + setup_jobs.coalesced))
+    for name, quota in quota_stats().items():
+        samples.append(("shadow_quota_waits_total", "counter", "Calls queued by the quota governor", {"bucket": name}, quota["waits"]))
+        samples.append(("shadow_quota_wait_seconds_total", "counter", "Seconds calls spent queued for quota", {"bucket": name}, quota["waited_seconds"]))
+        samples.append(("shadow_quota_throttles_total", "counter", "Upstream quota rejections", {"bucket": name}, quota["throttles"]))
+    for event, count in push_reviews.stats.items():
+        samples.append(("shadow_push_reviews_total", "counter", "Push webhook deliveries and pre-reviews, by event", {"event": event}, count))
+    samples.append(("shadow_github_retries_total", "counter", "GitHub calls retried", {}, github.stats["retries"]))
+    samples.append(("shadow_github_rate_waits_total", "counter", "Times the GitHub client paused for quota", {}, github.stats["rate_waits"]))
+    return samples
+
+if METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        """Node, GitHub, LLM and cache metrics in the Prometheus text format"""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def read_root():
     return {
         "status": "Shadow Workplace is Online", 
-        "routes": ["/agent/start_job", "/agent/review_code"]
+        "routes": [
+            "/agent/start_job", "/agent/jobs/{job_id}", "/agent/jobs/{job_id}/retry", "/agent/review_code",
+            "/agent/start_job/stream", "/agent/review_code/stream", "/github/webhook", "/metrics"
+        ]
     }
\ No newline at end of file
@@ -0,0 +1,62 @@
+from agents.security.entropy import find_high_entropy
+from agents.security.scanner import _scan_batch
+
+KEY = "q8Zr2LwX0vNf7KpT4yHs9Bc1MdGe6JuA"
+
+
+def rules(source, path="app.py"):
+    return [f["rule"] for f in _scan_batch([(path, source)])]
+
+
+def test_flags_random_key_in_string_literal():
+    assert rules(f"client = Client(secret='{KEY}')\n") == ["high_entropy_string"]
+
+
+def test_flags_random_key_after_assignment():
+    assert rules(f"creds:\n  key: {KEY}\n", "config.yaml") == ["high_entropy_string"]
+
+
+def test_keyword_arguments_are_not_tokens():
+    assert rules("def configure(self, reinit_subcommands=0, verbose=1, dry_run=0):\n") == []
+    assert rules("client = Client(retry_backoff_ms=250, max_in_flight_requests=5)\n") == []
+    assert rules("server = smtpd.SMTPServer(addr, enable_SMTPUTF8=options.enable_SMTPUTF8)\n") == []
+
+
+def test_tokens_outside_values_are_ignored():
+    assert rules(f"compute_{KEY}(items)\nfor item in items_{KEY}: pass\n") == []
+
+
+def test_alphabet_tables_are_ignored():
+    assert rules('ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_"\n') == []
+    assert rules("HEX = '0123456789abcdefABCDEF'\n") == []
+
+
+def test_long_numbers_are_not_hex():
+    assert rules("x = float('260212929840496308383385347911357725310593999568896e0')\n") == []
+
+
+def test_doctest_output_is_ignored():
+    assert rules("    >>> token_hex(16)\n    'f9bf78b9a18ce6d46a0cd2b0b86df9da'\n") == []
+
+
+def test_hex_needs_no_hash_context_to_be_flagged():
+    assert rules("API_SIGNING = '9a8b7c6d5e4f30211203f4e5d6c7b8a9'\n") == ["high_entropy_hex"]
+
+
+def test_allowlists():
+    assert rules("COMMIT_SHA = '3f786850e387550fdab836ed7e6dc881de23001b'\n") == []
+    assert rules("VECTOR = '9a8b7c6d5e4f30211203f4e5d6c7b8a9'\n", "tests/test_hmac.py") == []
+    assert rules('"integrity": "sha512-Zx9kP2qR7tLmN4vB8cX1yW3oA6sD5fG0hJ"', "package-lock.json") == []
+    assert rules(f"KEY = '{KEY}'  # pragma: allowlist secret\n") == []
+
+
+def test_positions_across_files_in_one_batch():
+    batch = [("a.py", "x = 1\n" * 3), ("b.py", f"import os\ntoken = '{KEY}'\n")]
+    assert [(path, line, column) for path, line, column, _, _ in find_high_entropy(batch)] == [("b.py", 2, 10)]
+
+
+def test_columns_count_characters_not_bytes():
+    batch = [("i18n.py", f"greeting = 'héllo wörld ✓'; token = '{KEY}'\n")]
+    [(_, line, column, token, _)] = find_high_entropy(batch)
+    assert (line, column) == (1, 38)
+    assert batch[0][1][column - 1:].startswith(token)
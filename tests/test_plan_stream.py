@@ -0,0 +1,52 @@
+import json
+
+from agents.manager.plan import PlanStreamParser
+
+PLAN = {
+    "project_name": "Fintech API!",
+    "tickets": [
+        {"id": 1, "title": "Setup", "body": "Create the {app} skeleton"},
+        {"id": "2", "title": "Auth", "body": "Add \"login\" [JWT]"},
+    ],
+    "starter_files": [{"name": "main.py", "content": "print('hi')\n"}],
+}
+
+
+def stream(text, size):
+    parser = PlanStreamParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, [(kind, value if kind == "project_name" else value.model_dump()) for kind, value in events]
+
+
+def test_fenced_output_streams_every_item():
+    text = "Here is the plan:\n```json\n" + json.dumps(PLAN, indent=2) + "\n```\n"
+    _, events = stream(text, len(text))
+    assert events == [
+        ("project_name", "Fintech-API"),
+        ("ticket", {"id": "1", "title": "Setup", "body": "Create the {app} skeleton"}),
+        ("ticket", {"id": "2", "title": "Auth", "body": "Add \"login\" [JWT]"}),
+        ("starter_file", {"name": "main.py", "content": "print('hi')\n"}),
+    ]
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = json.dumps(PLAN)
+    _, whole = stream(text, len(text))
+    for size in (1, 2, 3, 7, 16):
+        assert stream(text, size)[1] == whole
+
+
+def test_keys_in_any_order():
+    text = json.dumps({"starter_files": PLAN["starter_files"], "tickets": PLAN["tickets"][:1], "project_name": "late"})
+    parser, events = stream(text, 5)
+    assert [kind for kind, _ in events] == ["starter_file", "ticket", "project_name"]
+    assert parser.partial().project_name == "late"
+
+
+def test_invalid_escape_is_skipped_not_raised():
+    text = '{"project_name": "bad \\q name", "tickets": [{"id": 1, "title": "Setup"}]}'
+    parser, events = stream(text, 4)
+    assert events == [("ticket", {"id": "1", "title": "Setup", "body": ""})]
+    assert parser.project_name is None
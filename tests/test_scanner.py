@@ -0,0 +1,59 @@
+from agents.security import scanner
+from agents.security.scanner import scan_text, scan_files
+
+
+def rules(source, path="settings.py"):
+    return [f["rule"] for f in scan_text(source, path)]
+
+
+def test_env_secret_needs_a_quoted_literal_in_source():
+    assert rules("API_KEY = 'a8Fj2kLq9Zx0Wv7N'\n") == ["env_secret"]
+    assert rules('DB_PASSWORD = "s3cr3t-Pa55word"\n') == ["env_secret"]
+    assert rules("API_KEY = load_key_from_vault\n") == []
+
+
+def test_env_secret_allows_unquoted_values_in_env_files():
+    assert rules("API_KEY=a8Fj2kLq9Zx0Wv7N\n", ".env") == ["env_secret"]
+    assert rules("export GITHUB_TOKEN=a8Fj2kLq9Zx0Wv7N\n", "config/prod.env") == ["env_secret"]
+    assert rules("API_KEY=a8Fj2kLq9Zx0Wv7N\n", ".env.local") == ["env_secret"]
+
+
+def test_env_secret_ignores_references_numbers_and_names():
+    assert rules("API_KEY = settings.GOOGLE_API_KEY\n") == []
+    assert rules("MAX_TOKENS = 1000000000\n") == []
+    assert rules('TOKEN_TYPE = "bearer_token"\n') == []
+    assert rules('PASSWORD_HASHER = "django.contrib.auth.hashers.PBKDF2PasswordHasher"\n') == []
+    assert rules("API_KEY=settings.GOOGLE_API_KEY\n", ".env") == []
+    assert rules('SECRET_KEY = "your-secret-key-here"\n') == []
+
+
+GHP = "ghp_" + "a1B2c3D4e5" * 3 + "f6G7h8"
+
+
+def test_known_tokens_inside_rejected_env_lines_are_found():
+    [finding] = scan_text(f"FROM python:3.12\nENV GITHUB_TOKEN={GHP}\n", "Dockerfile")
+    assert (finding["rule"], finding["line"], finding["column"]) == ("github_token", 2, 18)
+    assert rules(f"env:\n  GITHUB_TOKEN: {GHP}\n", ".github/workflows/ci.yml") == ["github_token"]
+    assert rules(f"RUN echo {GHP}\n", "Dockerfile") == ["github_token"]
+
+
+def test_known_token_formats_win_over_the_generic_label():
+    key = "AIza" + "Sy0aB1cD2eF3gH4iJ5kL6mN7oP8qR9sT0uV"
+    [finding] = scan_text(f'GOOGLE_API_KEY = "{key}"\n', "settings.py")
+    assert (finding["rule"], finding["label"]) == ("google_api_key", "Google API Key")
+
+
+def test_prefixed_rules_and_positions():
+    text = "import os\nclient = OpenAI(api_key='sk-" + "a1B2" * 6 + "')\n"
+    [finding] = scan_text(text, "app.py")
+    assert (finding["rule"], finding["line"], finding["column"]) == ("openai_api_key", 2, 26)
+    assert rules("task-manager --sk-flag --token-count 5\n", "run.sh") == []
+
+
+def test_pool_and_inline_scans_agree(monkeypatch):
+    monkeypatch.setattr(scanner, "PARALLEL_THRESHOLD_BYTES", 0)
+    monkeypatch.setattr(scanner, "BATCH_BYTES", 4096)
+    blobs = {f"m{i}.py": "x = 1\n" * 200 + f"token = 'ghp_{'Z9' * 18}'\n" for i in range(20)}
+    assert scan_files(blobs, processes=1) == scan_files(blobs, processes=2)
+    # The pool outlives the call
+    assert scanner._pools[2] is scanner._pool(2)